@@ -0,0 +1,7 @@
+@echo off
+REM Runs the throughput benchmarks and compares them with the stored baseline (if any)
+if exist bench_baseline.json (
+    python benchmark.py --baseline bench_baseline.json
+) else (
+    python benchmark.py --save-baseline
+)
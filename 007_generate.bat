@@ -0,0 +1,3 @@
+@echo off
+REM Bulk generation, e.g. 007_generate.bat src.models:Order -n 100000 -o orders.ndjson --seed 42
+python -m generate %*
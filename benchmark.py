@@ -0,0 +1,239 @@
+# benchmark.py
+"""
+Throughput benchmarks for the generation engine.
+
+Measures records/sec (streaming generation) and bytes/sec (generation + NDJSON serialization) for
+the demo JSON schemas and classes, with and without their rules, the per-call cost of every
+SyntheticDataGenerator primitive and the import time of the library in a fresh interpreter. Results are written as JSON and can be compared with a stored
+baseline; a metric that is worse than the baseline by more than --threshold is a regression.
+
+    python benchmark.py                                   # run, write bench_results.json
+    python benchmark.py --save-baseline                   # run, store the results as bench_baseline.json
+    python benchmark.py --only class. --save-baseline     # rerun some workloads, update them in the baseline
+    python benchmark.py --baseline bench_baseline.json --threshold 0.15   # run and compare, exit 1 on regression
+    python benchmark.py --import-budget-ms 150            # also exit 1 if importing utils.utility takes longer
+"""
+import io
+import os
+import sys
+import json
+import time
+import subprocess
+import timeit
+import argparse
+import platform
+import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.utility import Utility
+from src.models import DisputeCase, Order
+import main_json_based
+import main_class_based
+
+DEFAULT_RESULTS_PATH = "bench_results.json"
+DEFAULT_BASELINE_PATH = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.2
+
+# Metric name -> True when higher is better
+_METRICS = {"records_per_sec": True, "bytes_per_sec": True, "ns_per_call": False, "import_ms": False}
+
+# Modules whose cold import time is measured; the demo modules define their rules at import
+_IMPORTED_MODULES = ("utils.utility", "main_json_based", "main_class_based")
+
+
+def _workloads() -> Dict[str, Tuple[Any, Any]]:
+    json_rules = main_json_based.json_generation_rules
+    class_rules = main_class_based.my_generation_rules
+    workloads = {}
+    for name, target, rules in (
+        ("json.simple_user", main_json_based.simple_user_json_schema, json_rules),
+        ("json.order", main_json_based.order_json_schema, json_rules),
+        ("json.blog_post", main_json_based.blog_post_json_schema, json_rules),
+        ("class.DisputeCase", DisputeCase, class_rules),
+        ("class.Order", Order, class_rules),
+    ):
+        workloads[f"{name}.no_rules"] = (target, None)
+        workloads[f"{name}.rules"] = (target, rules)
+    return workloads
+
+
+def _best_of(repeat: int, run: Callable[[], Any]) -> Tuple[float, Any]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def _stream(target: Any, rules: Any, records: int):
+    if isinstance(target, type):
+        return Utility.StreamSyntheticTestDataForClass(target, records, rules)
+    return Utility.StreamSyntheticTestDataFromJson(target, records, rules)
+
+
+def bench_workload(target: Any, rules: Any, records: int, repeat: int) -> Dict[str, float]:
+    # Plans are compiled (and cached) before timing: the benchmark measures steady-state generation
+    if isinstance(target, dict):
+        target = Utility.CompileJsonSchema(target, rules)
+        rules = None
+    else:
+        Utility.GenerateSyntheticTestDataForClass(target, 1, rules)
+
+    def generate() -> None:
+        for _ in _stream(target, rules, records):
+            pass
+
+    def serialize() -> int:
+        sink = io.StringIO()
+        Utility.WriteSyntheticTestData(target, records, sink, rules=rules)
+        return len(sink.getvalue().encode("utf-8"))
+
+    generate_seconds, _ = _best_of(repeat, generate)
+    serialize_seconds, output_bytes = _best_of(repeat, serialize)
+    return {
+        "records_per_sec": records / generate_seconds,
+        "bytes_per_sec": output_bytes / serialize_seconds,
+    }
+
+
+def bench_primitives(calls: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """ns per value of every zero-argument SyntheticDataGenerator primitive and of its batch counterpart."""
+    generator = Utility._data_generator
+    results = {}
+    for name in sorted(dir(generator)):
+        if not name.startswith("generate_") or name.endswith("_batch"):
+            continue
+        primitive = getattr(generator, name)
+        try:
+            primitive()
+        except Exception:
+            continue  # needs arguments, or its defaults do not parse (e.g. end_date='today')
+        results[name] = {"ns_per_call": min(timeit.repeat(primitive, number=calls, repeat=repeat)) / calls * 1e9}
+        batch_primitive = getattr(generator, f"{name}_batch", None)
+        if batch_primitive is not None:
+            seconds = min(timeit.repeat(lambda: batch_primitive(calls), number=1, repeat=repeat))
+            results[f"{name}_batch"] = {"ns_per_call": seconds / calls * 1e9}
+    return results
+
+
+def bench_imports(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Cold import time of each module in a fresh interpreter (best of `repeat`), in milliseconds."""
+    results = {}
+    for module_name in _IMPORTED_MODULES:
+        code = f"import time; start = time.perf_counter(); import {module_name}; print(time.perf_counter() - start)"
+        timings = [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+                   for _ in range(repeat)]
+        results[module_name] = {"import_ms": min(timings) * 1e3}
+    return results
+
+
+def run_benchmarks(records: int = 2000, primitive_calls: int = 2000, repeat: int = 3, only: List[str] = None) -> Dict[str, Any]:
+    workloads = {}
+    for name, (target, rules) in _workloads().items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        workloads[name] = bench_workload(target, rules, records, repeat)
+        print(f"  {name:<32} {workloads[name]['records_per_sec']:>12,.0f} rec/s {workloads[name]['bytes_per_sec']:>14,.0f} B/s", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "records": records,
+            "repeat": repeat,
+        },
+        "workloads": workloads,
+        "primitives": bench_primitives(primitive_calls, repeat) if not only else {},
+        "imports": bench_imports(repeat) if not only else {},
+    }
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compares every metric present in both results and baseline. Returns one row per metric with the
+    relative change (positive = better) and whether it regressed by more than `threshold`.
+    """
+    rows = []
+    for section in ("workloads", "primitives", "imports"):
+        for name, metrics in results.get(section, {}).items():
+            baseline_metrics = baseline.get(section, {}).get(name, {})
+            for metric, value in metrics.items():
+                baseline_value = baseline_metrics.get(metric)
+                if metric not in _METRICS or not baseline_value:
+                    continue
+                change = (value - baseline_value) / baseline_value if _METRICS[metric] else (baseline_value - value) / baseline_value
+                rows.append({
+                    "name": f"{section}.{name}.{metric}",
+                    "baseline": baseline_value,
+                    "current": value,
+                    "change": change,
+                    "regression": change < -threshold,
+                })
+    return rows
+
+
+def merge_into_baseline(results: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the baseline with every metric of `results` replacing its stored counterpart; sections and
+    entries the results do not cover (e.g. after --only) keep their stored values.
+    """
+    merged = {**baseline, "meta": results["meta"]}
+    for section in ("workloads", "primitives", "imports"):
+        merged[section] = {**baseline.get(section, {}), **results.get(section, {})}
+    return merged
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'metric':<60} {'baseline':>14} {'current':>14} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<60} {row['baseline']:>14,.1f} {row['current']:>14,.1f} {row['change']:>+8.1%}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generation throughput benchmarks.")
+    parser.add_argument("--records", type=int, default=2000, help="records generated per workload run")
+    parser.add_argument("--primitive-calls", type=int, default=2000, help="calls per primitive measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best one is kept")
+    parser.add_argument("--only", nargs="*", help="only run workloads whose name contains one of these strings")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also store the results as {DEFAULT_BASELINE_PATH}; with --only, they are merged into it")
+    parser.add_argument("--import-budget-ms", type=float, help="fail if importing utils.utility takes longer than this")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.records, args.primitive_calls, args.repeat, args.only)
+    with open(args.output, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+    if args.save_baseline:
+        baseline = results
+        if args.only and os.path.exists(DEFAULT_BASELINE_PATH):
+            # A partial run only updates the workloads it ran
+            with open(DEFAULT_BASELINE_PATH, encoding="utf-8") as baseline_file:
+                baseline = merge_into_baseline(results, json.load(baseline_file))
+        with open(DEFAULT_BASELINE_PATH, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2)
+
+    import_ms = results["imports"].get("utils.utility", {}).get("import_ms")
+    over_budget = args.import_budget_ms is not None and import_ms is not None and import_ms > args.import_budget_ms
+    if over_budget:
+        print(f"Importing utils.utility took {import_ms:.0f} ms, over the {args.import_budget_ms:.0f} ms budget.")
+
+    if not args.baseline:
+        return 1 if over_budget else 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        rows = compare_results(results, json.load(baseline_file), args.threshold)
+    print(format_comparison(rows))
+    regressions = [row["name"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# generate.py
+"""
+Bulk generation command line: streams synthetic records for a JSON sample or a class to an
+NDJSON/CSV file, reporting records/sec, ETA and peak RSS on stderr while it runs. The peak RSS
+is the main process's; with --workers, the largest finished worker's is reported next to it.
+
+    python -m generate sample.json -n 1000000 -o users.ndjson --seed 42
+    python -m generate src.models:Order -n 500000 -o orders.csv --rules main_class_based:my_generation_rules --workers 4
+    python -m generate main_json_based:order_json_schema -n 1000 --rules main_json_based:json_generation_rules
+
+A target or rules argument is either a JSON file path or a 'module:attribute' reference. JSON rule
+files name their generators ({"city": {"generator": "faker.city"}}) and key cardinality weights by
+count strings ({"items": {"cardinality": {"0": 1, "5": 3}}}); rules holding arbitrary
+callables can only be given as module attributes.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+from typing import Any, List, Optional, TextIO
+
+from utils.utility import Utility
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: peak RSS is then reported as n/a
+    resource = None
+
+
+def load_reference(reference: str) -> Any:
+    """Loads a JSON file, or the attribute named by a 'module:attribute' reference (dotted attributes allowed)."""
+    if os.path.isfile(reference):
+        with open(reference, encoding="utf-8") as reference_file:
+            return json.load(reference_file)
+    module_name, separator, attribute_path = reference.partition(":")
+    if not separator or not module_name or not attribute_path:
+        raise ValueError(f"'{reference}' is neither an existing JSON file nor a 'module:attribute' reference.")
+    value = importlib.import_module(module_name)
+    for attribute in attribute_path.split("."):
+        value = getattr(value, attribute)
+    return value
+
+
+def load_rules(reference: str) -> Any:
+    """
+    Loads rules like load_reference. JSON object keys are strings, so the {count: weight}
+    cardinality weights of a JSON rules file are converted back to integer item counts.
+    """
+    rules = load_reference(reference)
+    if not os.path.isfile(reference) or not isinstance(rules, dict):
+        return rules
+    converted = {}
+    for rule_path, rule in rules.items():
+        cardinality = rule.get("cardinality") if isinstance(rule, dict) else None
+        if isinstance(cardinality, dict):
+            try:
+                rule = {**rule, "cardinality": {int(count): weight for count, weight in cardinality.items()}}
+            except ValueError:
+                raise ValueError(f"The cardinality weights of '{rule_path}' must be keyed by item counts.") from None
+        converted[rule_path] = rule
+    return converted
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """
+    Peak resident set size of this process, or with children=True of the largest worker process
+    that has finished (0 while none has).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def _format_rss(workers: int = 1) -> str:
+    peak = peak_rss_bytes()
+    if peak is None:
+        return "n/a"
+    # Worker processes only count once they have exited
+    worker_peak = peak_rss_bytes(children=True) if workers > 1 else None
+    worker_text = f", largest worker {worker_peak / (1024 * 1024):,.0f} MiB" if worker_peak else ""
+    return f"{peak / (1024 * 1024):,.0f} MiB{worker_text}"
+
+
+class ProgressReporter:
+    """Progress callback for Utility.WriteSyntheticTestData: prints at most one status line per interval."""
+    def __init__(self, total: int, interval: float = 1.0, stream: TextIO = sys.stderr, workers: int = 1):
+        self.total = total
+        self.interval = interval
+        self.workers = workers
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.written = 0
+        # Rewrite one status line on a terminal, append lines to a redirected log
+        self._line_start, self._line_end = ("\r", "  ") if stream.isatty() else ("", "\n")
+
+    def __call__(self, written: int) -> None:
+        self.written = written
+        now = time.perf_counter()
+        if now - self._last_report < self.interval and written < self.total:
+            return
+        self._last_report = now
+        elapsed = now - self.started
+        rate = written / elapsed if elapsed > 0 else 0.0
+        eta = _format_duration((self.total - written) / rate) if rate else "?"
+        self.stream.write(f"{self._line_start}{written:>{len(f'{self.total:,}')},}/{self.total:,} records  {rate:>10,.0f} rec/s  "
+                          f"ETA {eta}  peak RSS {_format_rss(self.workers)}{self._line_end}")
+        self.stream.flush()
+
+    def finish(self, output_name: str) -> None:
+        elapsed = time.perf_counter() - self.started
+        rate = self.written / elapsed if elapsed > 0 else 0.0
+        if self._line_start:
+            self.stream.write("\n")
+        self.stream.write(f"Wrote {self.written:,} records to {output_name} in {_format_duration(elapsed)} "
+                          f"({rate:,.0f} rec/s, peak RSS {_format_rss(self.workers)}).\n")
+        self.stream.flush()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m generate", description="Streams synthetic test data to an NDJSON or CSV file.")
+    parser.add_argument("target", help="JSON sample file, or a 'module:attribute' JSON sample or class (e.g. src.models:Order)")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="number of records to generate")
+    parser.add_argument("-o", "--output", default="-", help="output file; '-' (default) writes to stdout")
+    parser.add_argument("-f", "--format", choices=("ndjson", "csv"), help="output format; inferred from the output extension, ndjson otherwise")
+    parser.add_argument("-r", "--rules", help="rules as a JSON file or a 'module:attribute' reference")
+    parser.add_argument("-s", "--seed", type=int, help="seed for reproducible output")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes; rule generators must be picklable when > 1, and plans with unique rules or refreshing pools run serially")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="records generated and written per chunk")
+    parser.add_argument("--progress-interval", type=float, default=1.0, help="seconds between progress lines")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+
+    if args.count < 1:
+        parser.error("--count must be at least 1.")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    try:
+        target = load_reference(args.target)
+        rules = load_rules(args.rules) if args.rules else None
+    except (ValueError, ImportError, AttributeError, json.JSONDecodeError) as error:
+        parser.error(str(error))
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "ndjson")
+    output = sys.stdout if args.output == "-" else args.output
+    # Diagnostics go to stderr so they never end up in the records written to stdout
+    logging.basicConfig(stream=sys.stderr, format="%(message)s", level=logging.INFO)
+    Utility.ConfigureDiagnostics(logger=logging.getLogger("generate"))
+
+    reporter = None if args.quiet else ProgressReporter(args.count, args.progress_interval, workers=args.workers)
+    Utility.WriteSyntheticTestData(target, args.count, output, format=output_format, rules=rules, chunk_size=args.chunk_size,
+                                   seed=args.seed, workers=args.workers, progress=reporter)
+    if reporter is not None:
+        reporter.finish("stdout" if output is sys.stdout else args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
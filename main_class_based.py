@@ -1,46 +1,37 @@
 # main_class_based.py
 import json
-from datetime import date, datetime
-import uuid
 from utils.utility import Utility
+from utils.record_writers import CustomJSONEncoder
 from src.models import DisputeCase, Order, Product, Address # Ensure Address is imported
 
-# --- Custom JSON Encoder Class (unchanged) ---
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (date, datetime)):
-            return obj.isoformat()
-        if isinstance(obj, uuid.UUID):
-            return str(obj)
-        return json.JSONEncoder.default(self, obj)
-
 # --- Define Your Rule Engine Configuration ---
-# Keys are dot-separated paths for nested fields.
-# Values can contain 'generator' (a callable Faker method or custom function)
-# or 'choices' (a list to pick from).
+# Keys are dot-separated paths for nested fields. List items may be left out ('items.price'),
+# selected with 'items[*]' or 'items[0]', and '*' / '**' match any one field / any depth ('**.city').
+# Values can contain 'generator' (a callable, or a provider name such as "faker.city" or "generate_email")
+# or 'choices' (a list to pick from); List/Dict fields take a 'cardinality' (a count, [min, max] or {count: weight}).
 my_generation_rules = {
     # Rules for Address fields (used by DisputeCase and Order)
-    "billing_address.street": {"generator": Utility._faker_instance.street_address}, # Direct Faker method
-    "billing_address.city": {"generator": Utility._faker_instance.city},
-    "billing_address.postal_code": {"generator": Utility._faker_instance.postcode},
+    "billing_address.street": {"generator": "faker.street_address"}, # Faker provider, by name
+    "billing_address.city": {"generator": "faker.city"},
+    "billing_address.postal_code": {"generator": "faker.postcode"},
     "billing_address.country": {"choices": ["USA", "Canada", "UK", "Australia", "Germany", "France"]},
 
-    "shipping_address.street": {"generator": Utility._faker_instance.street_address},
-    "shipping_address.city": {"generator": Utility._faker_instance.city},
-    "shipping_address.postal_code": {"generator": Utility._faker_instance.postcode},
+    "shipping_address.street": {"generator": "faker.street_address"},
+    "shipping_address.city": {"generator": "faker.city"},
+    "shipping_address.postal_code": {"generator": "faker.postcode"},
     "shipping_address.country": {"choices": ["USA", "Canada", "UK", "Australia", "Japan"]},
 
     # Other specific rules
     "dispute_reason": {"choices": ["Item Not Received", "Fraudulent Charge", "Product Damaged", "Service Not As Described", "Billing Error"]},
     "status": {"choices": ["Open", "Pending Review", "Closed - Resolved", "Closed - Unresolved", "Escalated"]},
-    "contact_email": {"generator": Utility._faker_instance.free_email}, # More specific email
-    "last_updated_at": {"generator": Utility._faker_instance.date_time_between, "kwargs": {"start_date": "-2y", "end_date": "now"}},
-    "order_date": {"generator": Utility._faker_instance.date_time_this_year, "kwargs": {"before_now": True}},
+    "contact_email": {"generator": "faker.free_email"}, # More specific email
+    "last_updated_at": {"generator": "faker.date_time_between", "kwargs": {"start_date": "-2y", "end_date": "now"}},
+    "order_date": {"generator": "faker.date_time_this_year", "kwargs": {"before_now": True}},
     "payment_method": {"choices": ["Credit Card", "PayPal", "Bank Transfer", "Crypto", "Invoice"]},
-    "total_amount": {"generator": Utility._faker_instance.pyfloat, "kwargs": {"min_value": 50.0, "max_value": 2000.0, "right_digits": 2}},
+    "total_amount": {"generator": "faker.pyfloat", "kwargs": {"min_value": 50.0, "max_value": 2000.0, "right_digits": 2}},
     "items.name": {"choices": ["Laptop", "Monitor", "Keyboard", "Mouse", "Webcam", "Headphones", "SSD", "RAM"]}, # Rules for list items
-    "items.price": {"generator": Utility._faker_instance.pyfloat, "kwargs": {"min_value": 10.0, "max_value": 500.0, "right_digits": 2}},
-    "items.quantity": {"generator": Utility._faker_instance.pyint, "kwargs": {"min_value": 1, "max_value": 10}},
+    "items.price": {"generator": "faker.pyfloat", "kwargs": {"min_value": 10.0, "max_value": 500.0, "right_digits": 2}},
+    "items.quantity": {"generator": "faker.pyint", "kwargs": {"min_value": 1, "max_value": 10}},
 }
 
 
@@ -89,9 +80,9 @@ if __name__ == "__main__":
     print("\n--- Generating Address Data (Class-based, with Rules) ---")
     address_object = Address()
     address_rules = {
-        "street": {"generator": Utility._faker_instance.street_name},
-        "city": {"generator": Utility._faker_instance.city},
-        "postal_code": {"generator": Utility._faker_instance.postcode},
+        "street": {"generator": "faker.street_name"},
+        "city": {"generator": "faker.city"},
+        "postal_code": {"generator": "faker.postcode"},
         "country": {"choices": ["Mexico", "Brazil", "Argentina", "Chile"]},
     }
     address_data = Utility.GenerateSyntheticTestDataFor(
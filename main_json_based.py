@@ -1,46 +1,35 @@
 # main_json_based.py
 import json
-from datetime import date, datetime
-import uuid
 from utils.utility import Utility
-from faker import Faker # Import Faker here for rules
-
-# --- Custom JSON Encoder Class (unchanged) ---
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (date, datetime)):
-            return obj.isoformat()
-        if isinstance(obj, uuid.UUID):
-            return str(obj)
-        return json.JSONEncoder.default(self, obj)
+from utils.record_writers import CustomJSONEncoder
 
 # --- Define Your Rule Engine Configuration for JSON generation ---
 # Note: When using JSON, field paths in rules must match the keys in your JSON schema.
-# Also, if you use a direct Faker generator, make sure Faker is imported.
+# Faker providers are referenced by name ("faker.<provider>"), so defining the rules builds no Faker instance.
 json_generation_rules = {
-    "username": {"generator": Utility._faker_instance.user_name},
-    "email": {"generator": Utility._faker_instance.email},
-    "age": {"generator": Utility._faker_instance.pyint, "kwargs": {"min_value": 18, "max_value": 90}},
+    "username": {"generator": "faker.user_name"},
+    "email": {"generator": "faker.email"},
+    "age": {"generator": "faker.pyint", "kwargs": {"min_value": 18, "max_value": 90}},
     "is_active": {"choices": [True, False]},
-    "registration_date": {"generator": Utility._faker_instance.date_this_century, "kwargs": {"before_today": True}},
-    "balance": {"generator": Utility._faker_instance.pyfloat, "kwargs": {"min_value": 0.0, "max_value": 10000.0, "right_digits": 2}},
+    "registration_date": {"generator": "faker.date_this_century", "kwargs": {"before_today": True}},
+    "balance": {"generator": "faker.pyfloat", "kwargs": {"min_value": 0.0, "max_value": 10000.0, "right_digits": 2}},
 
-    "shipping_address.street": {"generator": Utility._faker_instance.street_address},
-    "shipping_address.city": {"generator": Utility._faker_instance.city},
-    "shipping_address.postal_code": {"generator": Utility._faker_instance.postcode},
+    "shipping_address.street": {"generator": "faker.street_address"},
+    "shipping_address.city": {"generator": "faker.city"},
+    "shipping_address.postal_code": {"generator": "faker.postcode"},
     "shipping_address.country": {"choices": ["USA", "Canada", "Mexico"]},
 
     "items.name": {"choices": ["Book", "E-reader", "Headphones", "Charger", "Stylus"]},
-    "items.price": {"generator": Utility._faker_instance.pyfloat, "kwargs": {"min_value": 10.0, "max_value": 300.0, "right_digits": 2}},
+    "items.price": {"generator": "faker.pyfloat", "kwargs": {"min_value": 10.0, "max_value": 300.0, "right_digits": 2}},
 
-    "comments.user": {"generator": Utility._faker_instance.first_name},
-    "comments.text": {"generator": Utility._faker_instance.paragraph, "kwargs": {"nb_sentences": 2}},
-    "comments.timestamp": {"generator": Utility._faker_instance.date_time_this_year},
-    "post_id": {"generator": Utility._faker_instance.uuid4},
-    "title": {"generator": Utility._faker_instance.sentence, "kwargs": {"nb_words": 10, "variable_nb_words": True}},
-    "author": {"generator": Utility._faker_instance.name},
-    "publish_date": {"generator": Utility._faker_instance.date_this_decade},
-    "content": {"generator": Utility._faker_instance.text},
+    "comments.user": {"generator": "faker.first_name"},
+    "comments.text": {"generator": "faker.paragraph", "kwargs": {"nb_sentences": 2}},
+    "comments.timestamp": {"generator": "faker.date_time_this_year"},
+    "post_id": {"generator": "faker.uuid4"},
+    "title": {"generator": "faker.sentence", "kwargs": {"nb_words": 10, "variable_nb_words": True}},
+    "author": {"generator": "faker.name"},
+    "publish_date": {"generator": "faker.date_this_decade"},
+    "content": {"generator": "faker.text"},
     "tags": {"choices": ["AI", "Tech", "Science", "History", "Art", "Travel", "Food"]},
     "is_published": {"choices": [True, False]},
 }
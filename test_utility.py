@@ -0,0 +1,694 @@
+import random
+from typing import Dict
+
+import pytest
+
+from utils.utility import Utility
+from src.models import Address, Order
+
+
+def test_class_plan_is_compiled_once_per_class_and_rules():
+    Utility.InvalidateGenerationPlans()
+    rules = {"country": {"choices": ["Chile"]}}
+
+    first = Utility.GenerateSyntheticTestDataForClass(Address, count=5, rules=rules)
+    cached_plans = dict(Utility._class_plan_cache)
+    second = Utility.GenerateSyntheticTestDataFor(Address(), rules=rules)
+
+    assert len(first) == 5
+    assert all(record["country"] == "Chile" for record in first)
+    assert second["country"] == "Chile"
+    assert Utility._class_plan_cache == cached_plans
+
+    # A new rules dict per call compiles a new plan, but the cache stays bounded
+    for _ in range(Utility._MAX_CLASS_PLANS + 20):
+        Utility.GenerateSyntheticTestDataForClass(Address, count=1, rules={"country": {"choices": ["Peru"]}})
+    assert len(Utility._class_plan_cache) == Utility._MAX_CLASS_PLANS
+
+
+def test_invalidate_generation_plans_drops_dependent_plans():
+    Utility.InvalidateGenerationPlans()
+    Utility.GenerateSyntheticTestDataForClass(Order, count=1)
+    Utility.GenerateSyntheticTestDataForClass(Address, count=1)
+
+    removed = Utility.InvalidateGenerationPlans(target_class=Address)
+
+    # Order embeds the shipping_address plan, so it goes together with the Address plans
+    assert removed >= 2
+    assert all(Address not in plan.dependencies for _, plan in Utility._class_plan_cache.values())
+
+
+def test_class_kwargs_choices_are_bound_per_call():
+    records = Utility.GenerateSyntheticTestDataForClass(Address, count=3, field_name_city={"choices": ["Lima"]})
+    assert [record["city"] for record in records] == ["Lima"] * 3
+
+    with pytest.raises(TypeError):
+        Utility.GenerateSyntheticTestDataForClass(Address, field_name_city={"choices": "Lima"})
+
+
+def test_bind_generator_filters_kwargs_once_and_reports_at_bind_time(capsys):
+    from utils.generator_dispatch import bind_generator, BoundGeneratorCall
+
+    def pick(min_value=0, max_value=10):
+        return (min_value, max_value)
+
+    bound = bind_generator(pick, {"min_value": 3, "unknown": 1}, "age")
+    bind_output = capsys.readouterr().out
+
+    assert isinstance(bound, BoundGeneratorCall)
+    assert [bound() for _ in range(3)] == [(3, 10)] * 3
+    assert "Unaccepted kwargs ['unknown']" in bind_output
+    assert capsys.readouterr().out == ""
+    assert bind_generator(pick, {}, "age")() == (0, 10)
+    # Same generator and kwargs, another field: reported for that field as well
+    bind_generator(pick, {"min_value": 3, "unknown": 1}, "height")
+    assert "for field 'height'" in capsys.readouterr().out
+
+    calls = []
+
+    def fragile(value=None):
+        calls.append(value)
+        if value == "bad":
+            raise TypeError("bad value")
+        return value
+
+    # A TypeError raised by the generator body yields None: no retry without kwargs, and the kwargs stay bound
+    bound = bind_generator(fragile, {"value": "bad"}, "code")
+    assert bound() is None and bound() is None and bound.kwargs == {"value": "bad"}
+    assert calls == ["bad", "bad"] and "Unexpected error calling generator 'fragile'" in capsys.readouterr().out
+
+
+def test_compiled_json_schema_is_reusable_and_picklable():
+    import pickle
+
+    sample = {"order_id": "ord-1", "total": 1.5, "shipping_address": {"city": "X", "country": "Y"}, "tags": ["a"]}
+    rules = {"shipping_address.country": {"choices": ["Peru"]}, "city": {"generator": Utility._faker_instance.city}}
+    compiled = Utility.CompileJsonSchema(sample, rules=rules)
+
+    restored = pickle.loads(pickle.dumps(compiled))
+    records = Utility.GenerateSyntheticTestDataFromJson(restored, count=4)
+
+    assert len(records) == 4
+    for record in records:
+        assert list(record.keys()) == ["order_id", "total", "shipping_address", "tags"]
+        assert record["shipping_address"]["country"] == "Peru"
+        assert isinstance(record["total"], float)
+        assert 1 <= len(record["tags"]) <= 3
+
+
+def test_streaming_generation_is_lazy_and_chunked():
+    from src.models import Product
+
+    stream = Utility.StreamSyntheticTestDataFromJson({"name": "x", "price": 1.0}, count=7, chunk_size=3)
+    assert not isinstance(stream, list)
+    assert [len(chunk) for chunk in stream] == [3, 3, 1]
+
+    class_stream = Utility.StreamSyntheticTestDataForClass(Product, count=2)
+    assert [sorted(record.keys()) for record in class_stream] == [sorted(["product_id", "name", "price", "quantity", "description"])] * 2
+
+    with pytest.raises(ValueError):
+        Utility.StreamSyntheticTestDataFromJson({"name": "x"}, count=2, chunk_size=0)
+
+
+def test_parallel_generation_matches_seeded_serial_run(tmp_path):
+    import json
+
+    sample = {"id": "x", "name": "n", "score": 1, "tags": ["t"], "address": {"city": "c", "street": "s"}}
+    compiled = Utility.CompileJsonSchema(sample, rules={"tags": {"choices": ["a", "b"]}})
+    serial = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(compiled, count=50, seed=7)]
+
+    parallel = [record.get_data() for record in Utility.StreamSyntheticTestDataParallel(compiled, 50, seed=7, workers=2, shard_size=8)]
+    shard_paths = Utility.WriteSyntheticTestDataShards(compiled, 50, str(tmp_path), seed=7, workers=3, shard_size=20)
+
+    assert parallel == serial
+    assert [json.loads(line)["name"] for path in shard_paths for line in open(path)] == [record["name"] for record in serial]
+    assert serial != [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(compiled, count=50, seed=8)]
+
+    # Unique rules dedup across the whole run, so their plans are not split between workers
+    unique_rules = {"code": {"generator": "generate_str", "kwargs": {"pattern": "##"}, "unique": True}}
+    unique_serial = [record["code"] for record in Utility.StreamSyntheticTestDataFromJson({"code": "c"}, count=60, rules=unique_rules, seed=1)]
+    for workers in (2, 3):
+        unique_parallel = [record["code"] for record in Utility.StreamSyntheticTestDataParallel({"code": "c"}, 60, rules=unique_rules, seed=1,
+                                                                                               workers=workers, shard_size=10)]
+        assert unique_parallel == unique_serial and len(set(unique_parallel)) == 60
+    unique_output = tmp_path / "unique.ndjson"
+    Utility.WriteSyntheticTestData({"code": "c"}, 60, str(unique_output), rules=unique_rules, seed=1, workers=2, chunk_size=10)
+    assert [json.loads(line)["code"] for line in open(unique_output)] == unique_serial
+
+
+def _random_age():
+    return random.randint(18, 99)
+
+
+def test_seeded_streams_are_per_field_and_reproducible():
+    from utils.rng import CounterRandom, derive_seed
+
+    sample = {"email": "a@b.c", "age": 30, "tags": ["x"]}
+    rules = {"tags": {"choices": ["a", "b", "c"]}}
+    first = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, rules=rules, seed=11)]
+    again = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, rules=rules, seed=11)]
+    # Pinning one field to a constant must not shift the values drawn for the other fields
+    pinned = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, rules={**rules, "age": {"choices": [1]}}, seed=11)]
+
+    assert first == again
+    assert [record["email"] for record in pinned] == [record["email"] for record in first]
+    assert [record["tags"] for record in pinned] == [record["tags"] for record in first]
+
+    # Custom callables drawing from the random module are seeded without touching the caller's random state
+    random_rules = {"age": {"generator": _random_age}}
+    random.seed(99)
+    expected_next = random.random()
+    random.seed(99)
+    ages = [record["age"] for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, rules=random_rules, seed=11)]
+    assert random.random() == expected_next
+    assert ages == [record["age"] for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, rules=random_rules, seed=11)]
+
+    assert derive_seed(1, 2, 3) == derive_seed(1, 2, 3) != derive_seed(1, 3, 2)
+    # Tuple seeds are derived from their elements, never from hash(), so they are stable across processes
+    import subprocess
+    import sys
+    script = "from utils.rng import StreamContext; print(StreamContext(('run', 3, 1.5)).seed)"
+    assert len({subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout for _ in range(2)}) == 1
+    with pytest.raises(TypeError):
+        CounterRandom(object())
+    stream = CounterRandom(5)
+    state = stream.getstate()
+    draws = [stream.randint(0, 100) for _ in range(5)]
+    stream.setstate(state)
+    assert [stream.randint(0, 100) for _ in range(5)] == draws
+
+
+def test_batch_primitives_and_columnar_streaming():
+    from utils.synthetic_data_generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=3)
+    ints = generator.generate_int_batch(200, min_value=5, max_value=9)
+    uuids = generator.generate_uuid_batch(50)
+    dates = generator.generate_date_batch(20, start_date="-1y", end_date="today")
+
+    assert len(ints) == 200 and min(ints) >= 5 and max(ints) <= 9
+    assert len(set(uuids)) == 50 and all(value.version == 4 for value in uuids)
+    assert len(dates) == 20
+
+    records = list(Utility.StreamSyntheticTestDataFromJson({"id": "x", "age": 1, "tags": ["a"]}, count=2500))
+    assert len(records) == 2500
+    assert all(type(record["age"]) is int and 1 <= len(record["tags"]) <= 3 for record in records)
+
+    # A failing batch fill is reported before falling back to per-value generation
+    Utility.ResetDiagnostics()
+    bad_dates = {"day": {"generator": Utility._data_generator.generate_date, "kwargs": {"start_date": "not a date"}}}
+    assert Utility.GenerateSyntheticTestDataColumns({"day": "x"}, 3, rules=bad_dates)["day"] == [None] * 3
+    assert set(Utility.GetDiagnostics()) == {"day:batch_fallback", "day:generator_error"}
+    Utility.ResetDiagnostics()
+
+
+def test_columnar_batches_flatten_nested_objects_and_convert_to_rows():
+    sample = {"id": "x", "age": 1, "location": {"city": "c", "zip": "z"}}
+    batch = Utility.GenerateSyntheticTestDataColumns(sample, count=6, rules={"location.city": {"choices": ["Quito"]}})
+
+    assert len(batch) == 6
+    assert batch.column_names == ["id", "age", "location.city", "location.zip"]
+    assert list(batch["location.city"]) == ["Quito"] * 6
+    rows = batch.to_rows()
+    assert rows[2] == batch.row(2) and rows[2]["location"]["city"] == "Quito" and type(rows[2]["age"]) is int
+
+    seeded = list(Utility.StreamSyntheticTestDataColumns(sample, count=5, chunk_size=2, seed=4))
+    serial = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=5, seed=4)]
+    assert [len(chunk) for chunk in seeded] == [2, 2, 1]
+    assert [row for chunk in seeded for row in chunk.to_rows()] == serial
+
+
+def test_ndjson_and_csv_writers_serialize_generated_types(tmp_path):
+    import csv
+    import json
+    import datetime
+    import uuid
+    from utils.record_writers import NDJSONWriter, write_csv
+
+    record_id = uuid.uuid4()
+    records = [
+        {"id": record_id, "when": datetime.date(2024, 1, 2), "at": datetime.datetime(2024, 1, 2, 3, 4), "ok": True, "tags": ["a"], "place": {"city": "X"}},
+        {"id": record_id, "when": None, "at": datetime.datetime(2024, 1, 2, 3, 4), "ok": False, "tags": [], "place": {"city": "Y"}},
+    ]
+    with NDJSONWriter(str(tmp_path / "out.ndjson")) as writer:
+        assert writer.write_many(records) == 2
+    lines = [json.loads(line) for line in open(tmp_path / "out.ndjson")]
+    assert lines[0] == {"id": str(record_id), "when": "2024-01-02", "at": "2024-01-02T03:04:00", "ok": True, "tags": ["a"], "place": {"city": "X"}}
+    assert lines[1]["when"] is None
+
+    assert write_csv(records, str(tmp_path / "out.csv")) == 2
+    rows = list(csv.DictReader(open(tmp_path / "out.csv", newline="")))
+    assert list(rows[0]) == ["id", "when", "at", "ok", "tags", "place.city"]
+    assert rows[0]["at"] == "2024-01-02T03:04:00" and rows[0]["tags"] == '["a"]' and rows[1]["place.city"] == "Y"
+
+    written = Utility.WriteSyntheticTestData({"name": "n", "score": 1}, 25, str(tmp_path / "gen.csv"), format="csv", chunk_size=10)
+    assert written == 25 and len(list(csv.DictReader(open(tmp_path / "gen.csv", newline="")))) == 25
+
+
+def test_value_pools_sample_pre_generated_values_and_refresh():
+    from utils.value_pools import ValuePool
+
+    calls = []
+    pool = ValuePool(lambda: calls.append(1) or len(calls), size=10, refresh_interval=5, refresh_count=2, seed=1)
+    assert len(calls) == 10
+    assert all(1 <= pool() <= 10 for _ in range(4))
+    pool()
+    assert len(calls) == 12
+    assert len(pool.sample_batch(10)) == 10 and len(calls) == 16
+
+    Utility.EnableValuePools(pool_size=20)
+    try:
+        records = Utility.GenerateSyntheticTestDataFromJson({"city": "c", "email": "e", "age": 1}, count=200)
+        assert len(Utility._value_pools) == 2
+        assert len({record["city"] for record in records}) <= 20
+    finally:
+        Utility.DisableValuePools()
+
+    # Refreshing pools turn over as they are drawn from: seeded runs stay reproducible and parallel runs match them
+    Utility.EnableValuePools(pool_size=5, refresh_interval=3, refresh_count=2)
+    try:
+        sample = {"city": "c", "name": "n"}
+        serial = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=60, seed=4)]
+        assert serial == [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(sample, count=60, seed=4)]
+        assert len({record["city"] for record in serial}) > 5
+        for workers in (2, 3):
+            assert [record.get_data() for record in Utility.StreamSyntheticTestDataParallel(sample, 60, seed=4, workers=workers, shard_size=7)] == serial
+    finally:
+        Utility.DisableValuePools()
+    assert Utility._value_pools == {}
+
+
+def test_compiled_patterns_keep_the_pattern_syntax():
+    import re
+    from utils.pattern_template import compile_pattern
+    from utils.synthetic_data_generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=2)
+    assert compile_pattern("CUST-#####") is compile_pattern("CUST-#####")
+    assert re.fullmatch(r"CUST-\d{5}", generator.generate_str(pattern="CUST-#####"))
+    assert re.fullmatch(r"\{[a-zA-Z]{2}\}-\d", generator.generate_str(pattern="{@@}-#"))
+
+    batch = generator.generate_str_batch(500, pattern="ID-###-@")
+    assert len(batch) == 500 and all(re.fullmatch(r"ID-\d{3}-[a-zA-Z]", value) for value in batch)
+    assert all(2 <= len(value) <= 6 for value in generator.generate_str_batch(100, min_length=2, max_length=6))
+
+
+def test_unique_rule_retries_collisions_and_reports_stats():
+    from utils.uniqueness import BloomFilterBackend
+
+    Utility.ResetUniqueness()
+    rules = {"code": {"choices": list(range(40)), "unique": True}}
+    records = Utility.GenerateSyntheticTestDataFromJson({"code": "x", "note": "n"}, count=30, rules=rules)
+    assert len({record["code"] for record in records}) == 30
+    stats = Utility.GetUniquenessStats()["code"]
+    assert stats["unique_values"] == 30 and stats["collisions"] > 0 and stats["backend"] == "ExactSetBackend"
+
+    bloom_rules = {"code": {"choices": list(range(40)), "unique": {"backend": "bloom", "capacity": 1000, "max_retries": 500}}}
+    seeded = [record["code"] for record in Utility.StreamSyntheticTestDataFromJson({"code": "x"}, count=30, rules=bloom_rules, seed=9)]
+    again = [record["code"] for record in Utility.StreamSyntheticTestDataFromJson({"code": "x"}, count=30, rules=bloom_rules, seed=9)]
+    assert len(set(seeded)) == 30 and seeded == again
+
+    with pytest.raises(ValueError):
+        Utility.GenerateSyntheticTestDataFromJson({"code": "x"}, count=5, rules={"code": {"choices": [1, 2], "unique": True}})
+
+    # Cached class plans dedup per run: repeated calls with the same seed give the same values
+    class_rules = {"city": {"choices": [f"c{i}" for i in range(40)], "unique": True}}
+    runs = [[record["city"] for record in Utility.GenerateSyntheticTestDataForClass(Address, count=30, rules=class_rules, seed=4)]
+            for _ in range(3)]
+    assert runs[0] == runs[1] == runs[2] and len(set(runs[0])) == 30
+
+    backend = BloomFilterBackend(capacity=100, error_rate=0.01)
+    assert backend.add("a") and not backend.add("a") and len(backend) == 1
+
+
+def test_foreign_keys_sample_from_a_compact_parent_key_index(tmp_path):
+    import json
+    from src.models import DisputeCase
+    from utils.key_index import KeyIndex
+
+    parent_rules = {"customer_id": {"generator": Utility._data_generator.generate_str, "kwargs": {"pattern": "CUST-####"}, "unique": True}}
+    customers = Utility.BuildKeyIndex({"customer_id": "c", "name": "n"}, 50, "customer_id", name="test_customers",
+                                      rules=parent_rules, output=str(tmp_path / "customers.ndjson"))
+    parent_keys = {json.loads(line)["customer_id"] for line in open(tmp_path / "customers.ndjson")}
+
+    assert len(customers) == 50 and customers.kind == "str" and {customers[i] for i in range(50)} == parent_keys
+    child_rules = {"customer_id": {"foreign_key": "test_customers"}}
+    disputes = Utility.GenerateSyntheticTestDataForClass(DisputeCase, count=20, rules=child_rules)
+    assert all(record["customer_id"] in parent_keys for record in disputes)
+
+    # Rebuilding a named index: cached class plans sample the new keys
+    Utility.BuildKeyIndex({"customer_id": "c"}, 5, "customer_id", name="test_customers", rules={"customer_id": {"choices": ["A"]}})
+    Utility.GenerateSyntheticTestDataForClass(DisputeCase, count=1, rules=child_rules)
+    Utility.BuildKeyIndex({"customer_id": "c"}, 5, "customer_id", name="test_customers", rules={"customer_id": {"choices": ["B"]}})
+    assert {record["customer_id"] for record in Utility.GenerateSyntheticTestDataForClass(DisputeCase, count=10, rules=child_rules)} == {"B"}
+
+    ids = KeyIndex("ids", keys=range(5, 10))
+    assert ids.kind == "int" and ids[4] == 9 and ids.nbytes() == 40
+    with pytest.raises(ValueError):
+        Utility.GenerateSyntheticTestDataFromJson({"ref": "x"}, count=1, rules={"ref": {"foreign_key": "missing_index"}})
+
+
+def test_benchmark_comparison_flags_regressions_beyond_threshold():
+    from benchmark import compare_results, merge_into_baseline
+
+    baseline = {"workloads": {"json.simple_user.rules": {"records_per_sec": 1000.0, "bytes_per_sec": 5000.0}},
+                "primitives": {"generate_int": {"ns_per_call": 100.0}}}
+    results = {"workloads": {"json.simple_user.rules": {"records_per_sec": 700.0, "bytes_per_sec": 4900.0}},
+               "primitives": {"generate_int": {"ns_per_call": 150.0}, "generate_uuid": {"ns_per_call": 90.0}}}
+
+    rows = {row["name"]: row for row in compare_results(results, baseline, threshold=0.2)}
+    assert rows["workloads.json.simple_user.rules.records_per_sec"]["regression"]
+    assert not rows["workloads.json.simple_user.rules.bytes_per_sec"]["regression"]
+    assert rows["primitives.generate_int.ns_per_call"]["regression"]
+    assert "primitives.generate_uuid.ns_per_call" not in rows
+
+    # A partial run (--only) updates the workloads it ran and keeps the rest of the stored baseline
+    partial = {"meta": {"records": 10}, "workloads": {"class.order": {"records_per_sec": 50.0}}, "primitives": {}, "imports": {}}
+    merged = merge_into_baseline(partial, baseline)
+    assert merged["workloads"] == {**baseline["workloads"], "class.order": {"records_per_sec": 50.0}}
+    assert merged["primitives"] == baseline["primitives"] and merged["meta"] == {"records": 10}
+
+
+def test_field_timing_reports_per_path_and_generator_when_enabled():
+    import json
+    from src.models import Order
+
+    Utility.DisableFieldTiming()
+    sample = {"name": "n", "address_info": {"city": "c"}, "lines": [{"sku": "s"}]}
+    Utility.GenerateSyntheticTestDataFromJson(sample, count=5)
+    assert Utility.GetFieldTimings() is None
+
+    timings = Utility.EnableFieldTiming()
+    try:
+        Utility.GenerateSyntheticTestDataFromJson(sample, count=20)
+        Utility.GenerateSyntheticTestDataForClass(Order, count=3, seed=1)
+    finally:
+        assert Utility.DisableFieldTiming() is timings
+
+    report = json.loads(timings.to_json())
+    assert report["fields"]["name"]["calls"] == 20
+    assert report["fields"]["address_info.city"]["calls"] == 20 and "lines.sku" in report["fields"]
+    assert report["fields"]["shipping_address.street"]["calls"] == 3
+    assert "SyntheticDataGenerator.generate_name" in report["generators"]
+    assert "address_info.city" in timings.as_table()
+
+
+def _failing_generator():
+    raise RuntimeError("boom")
+
+
+def test_diagnostics_emit_each_event_once_and_summarize_repeats(capsys, caplog):
+    import logging
+
+    Utility.ResetDiagnostics()
+    rules = {"name": {"generator": _failing_generator}}
+    records = Utility.GenerateSyntheticTestDataFromJson({"name": "n"}, count=50, rules=rules)
+    output = capsys.readouterr().out
+
+    assert all(record["name"] is None for record in records)
+    assert sum(line.startswith("Unexpected error calling generator '_failing_generator'") for line in output.splitlines()) == 1
+    assert "Diagnostics summary:" in output and "49 more occurrence(s) (50 in total)" in output
+    assert Utility.GetDiagnostics()["name:generator_error"]["count"] == 50
+
+    logger = logging.getLogger("synthetic.diagnostics")
+    Utility.ConfigureDiagnostics(logger=logger, summary=False)
+    try:
+        with caplog.at_level(logging.WARNING, logger="synthetic.diagnostics"):
+            Utility.GenerateSyntheticTestDataFromJson({"name": "n"}, count=10, rules={"name": {"generator": _failing_generator, "kwargs": {"x": 1}}})
+    finally:
+        Utility.ConfigureDiagnostics()
+        Utility.ResetDiagnostics()
+    assert "Unaccepted kwargs ['x']" in caplog.text
+    assert "Diagnostics summary" not in caplog.text and capsys.readouterr().out == ""
+
+
+def test_async_stream_matches_sync_output_and_applies_backpressure():
+    import asyncio
+    import itertools
+
+    compiled = Utility.CompileJsonSchema({"name": "n", "age": 30, "tags": ["t"]})
+    expected = [record.get_data() for record in Utility.StreamSyntheticTestDataFromJson(compiled, 25, seed=3)]
+    calls = itertools.count()
+
+    def counting_generator():
+        return next(calls)
+
+    async def consume():
+        records = [record.get_data() async for record in Utility.StreamSyntheticTestDataAsync(compiled, 25, seed=3)]
+        stream = Utility.StreamSyntheticTestDataAsync({"id": 1}, 1000, rules={"id": {"generator": counting_generator}},
+                                                      chunk_size=10, max_pending_chunks=2)
+        first_chunk = await stream.__anext__()
+        await asyncio.sleep(0.2)
+        generated_ahead = next(calls)
+        await stream.aclose()
+        return records, first_chunk, generated_ahead
+
+    records, first_chunk, generated_ahead = asyncio.run(consume())
+    assert records == expected
+    assert [record["id"] for record in first_chunk] == list(range(10))
+    assert generated_ahead <= 30
+
+    # A multi-threaded executor never generates two chunks of one stream at once
+    from concurrent.futures import ThreadPoolExecutor
+    expected = [record.get_data() for record in Utility.StreamSyntheticTestDataForClass(Order, 400, seed=5)]
+
+    async def consume_on(executor):
+        return [record.get_data() async for chunk in Utility.StreamSyntheticTestDataAsync(
+            Order, 400, seed=5, chunk_size=20, max_pending_chunks=4, executor=executor) for record in chunk]
+
+    with ThreadPoolExecutor(4) as executor:
+        assert asyncio.run(consume_on(executor)) == expected
+
+
+def test_generate_cli_streams_records_to_a_file(tmp_path, capsys):
+    import json
+    import generate
+
+    sample_path = tmp_path / "sample.json"
+    sample_path.write_text(json.dumps({"name": "n", "age": 30}))
+    output_path = tmp_path / "records.ndjson"
+
+    assert generate.main([str(sample_path), "-n", "250", "-o", str(output_path), "--seed", "5", "--chunk-size", "100"]) == 0
+    lines = output_path.read_text().splitlines()
+    assert len(lines) == 250 and set(json.loads(lines[0])) == {"name", "age"}
+    assert "Wrote 250 records" in capsys.readouterr().err
+    if generate.resource is not None:
+        # Worker processes that have exited are reported next to the main process
+        import subprocess
+        import sys
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        assert generate.peak_rss_bytes(children=True) > 0 and "largest worker" in generate._format_rss(workers=2)
+        assert "largest worker" not in generate._format_rss()
+
+    csv_path = tmp_path / "addresses.csv"
+    generate.main(["src.models:Address", "-n", "10", "-o", str(csv_path), "-q"])
+    assert csv_path.read_text().splitlines()[0] == "street,city,postal_code,country"
+    with pytest.raises(SystemExit):
+        generate.main(["missing-target", "-n", "1"])
+    for bad_arguments in (["-n", "0"], ["-n", "-5"], ["--chunk-size", "-1"]):
+        with pytest.raises(SystemExit):
+            generate.main([str(sample_path), "-o", str(output_path), "-q", *bad_arguments])
+    assert "must be at least 1" in capsys.readouterr().err
+
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"tags": {"cardinality": {"2": 1, "4": 3}}}))
+    list_sample_path = tmp_path / "list_sample.json"
+    list_sample_path.write_text(json.dumps({"tags": ["t"]}))
+    list_path = tmp_path / "lists.ndjson"
+    generate.main([str(list_sample_path), "-n", "20", "-o", str(list_path), "-q", "-r", str(rules_path)])
+    assert {len(json.loads(line)["tags"]) for line in list_path.read_text().splitlines()} <= {2, 4}
+    Utility.ConfigureDiagnostics()
+
+
+def test_importing_the_library_and_demo_rules_builds_no_faker():
+    import subprocess
+    import sys
+
+    code = ("import sys, utils.utility, main_json_based, main_class_based; "
+            "print(sorted(name for name in ('faker', 'numpy', 'asyncio', 'multiprocessing') if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_rules_can_reference_providers_by_name():
+    rules = {"city": {"generator": "faker.city"}, "email": {"generator": "email"}, "code": {"generator": "generate_str", "kwargs": {"pattern": "##-@@"}}}
+    records = Utility.GenerateSyntheticTestDataFromJson({"city": "c", "email": "e", "code": "x"}, count=3, rules=rules, seed=4)
+
+    assert all(isinstance(record["city"], str) and record["city"] for record in records)
+    assert all("@" in record["email"] for record in records)
+    assert all(len(record["code"]) == 5 and record["code"][2] == "-" for record in records)
+    with pytest.raises(ValueError, match="Unknown generator provider 'faker.no_such_provider'"):
+        Utility.CompileJsonSchema({"city": "c"}, {"city": {"generator": "faker.no_such_provider"}})
+
+
+def test_locale_pool_evicts_least_recently_used_locale():
+    from utils.locale_pool import LocaleGeneratorPool
+
+    pool = LocaleGeneratorPool(max_size=2)
+    german = pool.get("de_DE")
+    pool.get("fr_FR")
+    assert pool.get("de_DE") is german
+    pool.get("it_IT")
+
+    assert pool.stats() == {"locales": ["de_DE", "it_IT"], "max_size": 2, "hits": 1, "misses": 3, "evictions": 1}
+    assert pool.get("fr_FR") is not None and pool.stats()["locales"] == ["it_IT", "fr_FR"]
+
+
+def test_records_and_rules_can_pick_weighted_locales():
+    from src.models import Address
+
+    Utility.EnableLocales({"de_DE": 1, "ja_JP": 1})
+    try:
+        first = [record.get_data() for record in Utility.GenerateSyntheticTestDataForClass(Address, 30, seed=2)]
+        second = [record.get_data() for record in Utility.GenerateSyntheticTestDataForClass(Address, 30, seed=2)]
+        unseeded = Utility.GenerateSyntheticTestDataColumns(Address, 30).to_rows()
+    finally:
+        Utility.DisableLocales()
+    assert first == second
+    japanese = [record for record in first + unseeded if any(ord(char) > 0x3000 for char in record["city"])]
+    assert 0 < len(japanese) < 60
+    assert {"de_DE", "ja_JP"} <= set(Utility.GetLocalePoolStats()["locales"])
+
+    rules = {"name": {"generator": "faker.first_name", "locale": "ja_JP"}}
+    records = Utility.GenerateSyntheticTestDataFromJson({"name": "n", "email": "e"}, count=5, rules=rules)
+    assert all(any(ord(char) > 0x3000 for char in record["name"]) for record in records)
+    with pytest.raises(ValueError, match="Unknown Faker locale"):
+        Utility.CompileJsonSchema({"name": "n"}, {"name": {"generator": "faker.first_name", "locale": "xx_XX"}})
+
+
+def test_compact_records_share_one_field_index_and_materialize_on_demand():
+    import pickle
+    from utils.generated_test_data import CompactRecord
+
+    compact = Utility.GenerateSyntheticTestDataCompact(Order, 20, seed=4)
+    regular = Utility.GenerateSyntheticTestDataForClass(Order, 20, seed=4)
+    assert [record.get_data() for record in compact] == [record.get_data() for record in regular]
+
+    record = compact[0]
+    assert type(record) is type(compact[1]) and type(record).__name__ == "Order"
+    assert record.keys() == tuple(regular[0].keys()) and "shipping_address" in record
+    address = record["shipping_address"]
+    assert isinstance(address, CompactRecord) and address["city"] == regular[0]["shipping_address"]["city"]
+    assert all(isinstance(item, CompactRecord) for record in compact for item in record["items"])
+    assert pickle.loads(pickle.dumps(record)).get_data() == record.get_data()
+
+    json_records = Utility.GenerateSyntheticTestDataCompact({"name": "n", "tags": ["t"], "location": {"city": "c"}}, 3)
+    assert json_records[0]["location"].keys() == ("city",) and isinstance(json_records[0]["tags"][0], str)
+
+
+def test_synthetic_dataset_generates_any_record_directly_from_its_index():
+    streamed = [record.get_data() for record in Utility.GenerateSyntheticTestDataForClass(Order, 50, seed=11)]
+    dataset = Utility.OpenSyntheticDataset(Order, 48_213_008, seed=11)
+
+    assert len(dataset) == 48_213_008
+    assert dataset[37].get_data() == streamed[37] and dataset[37].get_data() == dataset[37].get_data()
+    assert [record.get_data() for record in dataset[10:40:3]] == streamed[10:40:3]
+    assert dataset[-1].get_data() == dataset[48_213_007].get_data()
+    assert Utility.OpenSyntheticDataset(Order, 50, seed=11, compact=True)[5].get_data() == streamed[5]
+    with pytest.raises(IndexError):
+        dataset[48_213_008]
+    with pytest.raises(ValueError, match="unique rule"):
+        Utility.OpenSyntheticDataset({"id": "x"}, 10, seed=1, rules={"id": {"generator": "generate_uuid", "unique": True}})
+
+
+def test_dataset_cache_serves_hits_by_fingerprint_and_evicts_least_recently_used(tmp_path):
+    from utils.dataset_cache import dataset_fingerprint
+
+    faker_rules = {"city": {"generator": Utility._faker_instance.city}}
+    assert dataset_fingerprint(Address, faker_rules, 1, 10) == dataset_fingerprint(Address, {"city": {"generator": Utility._faker_instance.city}}, 1, 10)
+    assert dataset_fingerprint(Address, faker_rules, 1, 10) != dataset_fingerprint(Address, faker_rules, 2, 10)
+    # Faker provider methods are told apart by the locale of the Faker they are bound to
+    from utils.dataset_cache import describe
+    from utils.locale_pool import default_pool
+    assert describe(Utility._faker_instance.city)["locale"] == "en_US"
+    assert describe(default_pool.get("de_DE").fake.city)["locale"] == "de_DE"
+    # Set constants in rule functions are digested in a stable order, whatever the hash seed
+    import os
+    import subprocess
+    import sys
+    script = ("from utils.dataset_cache import describe\n"
+              "def rule(value): return value in {'alpha', 'beta', 'gamma', ('delta', frozenset({'x', 'y'}))}\n"
+              "print(describe(rule)['code'])")
+    digests = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                              env={**os.environ, "PYTHONHASHSEED": str(hash_seed)}).stdout for hash_seed in (1, 2, 3)}
+    assert len(digests) == 1
+
+    cache = Utility.ConfigureDatasetCache(str(tmp_path), max_bytes=1 << 20)
+    try:
+        with Utility.GenerateCachedTestData(Address, 300, seed=5, rules=faker_rules, chunk_size=64) as first:
+            expected = [record.get_data() for record in first]
+        with Utility.GenerateCachedTestData(Address, 300, seed=5, rules=faker_rules, chunk_size=64) as second:
+            assert [record.get_data() for record in second] == expected
+            assert second[-1].get_data() == expected[-1] and [r.get_data() for r in second[62:66]] == expected[62:66]
+        assert expected == [record.get_data() for record in Utility.GenerateSyntheticTestDataForClass(Address, 300, rules=faker_rules, seed=5)]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+        cache.max_bytes = cache.stats()["bytes"] + 1
+        Utility.GenerateCachedTestData({"name": "n"}, 300, seed=5).close()
+        assert cache.stats()["datasets"] == 1 and cache.evictions == 1
+
+        # Collection size settings are part of the fingerprint
+        Utility.ConfigureCollectionSizes(list_items=7)
+        try:
+            with Utility.GenerateCachedTestData({"tags": ["t"]}, 20, seed=5) as sized:
+                assert {len(record["tags"]) for record in sized} == {7}
+        finally:
+            Utility.ConfigureCollectionSizes()
+        with Utility.GenerateCachedTestData({"tags": ["t"]}, 20, seed=5) as default_sized:
+            assert all(1 <= len(record["tags"]) <= 3 for record in default_sized)
+    finally:
+        Utility._dataset_cache = None
+
+
+def test_rule_paths_match_list_items_and_wildcards_alike_for_classes_and_json():
+    from utils.rule_index import RuleIndex
+
+    index = RuleIndex({"items.price": 1, "items[0].price": 2, "*.city": 3, "**.city": 4, "items[*]": 5, "shipping_address.city": 6})
+    assert index.match(("items", 1, "price")) == 1 and index.match(("items", 0, "price")) == 2
+    assert index.match(("billing_address", "city")) == 3 and index.match(("a", "b", "city")) == 4
+    assert index.match(("shipping_address", "city")) == 6 and index.match(("items", 2)) == 5 and index.match(("items",)) is None
+    assert RuleIndex({"items.items_item_1.price": 7}).match(("items", 1, "price")) == 7
+
+    rules = {"items.price": {"choices": [9.99]}, "items[0].quantity": {"choices": [1]}, "**.city": {"choices": ["Springfield"]}}
+    order_json = {"items": [{"price": 1.0, "quantity": 2}], "shipping_address": {"city": "c"}}
+    for record in Utility.GenerateSyntheticTestDataForClass(Order, 5, rules=rules) + Utility.GenerateSyntheticTestDataFromJson(order_json, 5, rules=rules):
+        assert all(item["price"] == 9.99 for item in record["items"]) and record["items"][0]["quantity"] == 1
+        assert record["shipping_address"]["city"] == "Springfield"
+
+
+class _Labelled:
+    def __init__(self, labels: Dict[str, int]):
+        self.labels = labels
+
+
+def test_collection_cardinality_is_configurable_per_path_and_items_share_one_plan():
+    from utils.cardinality import Cardinality
+    from utils.generation_plan import ListNode
+
+    rules = {"items": {"cardinality": [0, 40]}, "items[0].quantity": {"choices": [1]}}
+    root = Utility._resolve_plan_root(Order, rules, {})
+    items_node = dict(root.fields)["items"]
+    assert isinstance(items_node, ListNode) and len(items_node.item_nodes) == 2
+
+    unseeded = Utility.GenerateSyntheticTestDataColumns(Order, 50, rules=rules).to_rows()
+    seeded = [record.get_data() for record in Utility.GenerateSyntheticTestDataForClass(Order, 50, rules=rules, seed=8)]
+    for records in (unseeded, seeded):
+        assert all(0 <= len(record["items"]) <= 40 for record in records) and max(len(record["items"]) for record in records) > 3
+        assert all(record["items"][0]["quantity"] == 1 for record in records if record["items"])
+        ids = [item["product_id"] for record in records for item in record["items"]]
+        assert len(set(ids)) == len(ids)
+    assert Utility.OpenSyntheticDataset(Order, 50, seed=8, rules=rules)[33].get_data() == seeded[33]
+
+    json_records = Utility.GenerateSyntheticTestDataFromJson({"tags": ["a"], "scores": [1]}, 20, rules={"tags": {"cardinality": 4}, "scores": {"cardinality": {0: 1, 2: 1}}})
+    assert all(len(record["tags"]) == 4 and len(record["scores"]) in (0, 2) for record in json_records)
+    with pytest.raises(ValueError):
+        Cardinality.from_option([5, 2])
+
+    # Positions named for another list do not give this list more item nodes
+    other_list_rules = {"items": {"cardinality": [0, 40]}, "evidence_files[5].name": {"choices": ["f"]}}
+    assert len(dict(Utility._resolve_plan_root(Order, other_list_rules, {}).fields)["items"].item_nodes) == 1
+
+    # Dict entries share one key and one value node; the former '<field>_value_<i>' rule paths still apply to them
+    for labels_rules in ({"labels.labels_value": {"choices": [7]}}, {"labels.labels_value_0": {"choices": [7]}}):
+        records = Utility.GenerateSyntheticTestDataForClass(_Labelled, 10, rules={**labels_rules, "labels": {"cardinality": 3}})
+        assert all(set(record["labels"].values()) == {7} for record in records)
@@ -0,0 +1,68 @@
+# utils/async_generation.py
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from utils.generation_plan import RecordGenerator
+
+
+class AsyncGenerationEngine:
+    """
+    Generates records in fixed-size chunks on an executor, for asyncio consumers.
+
+    Chunks are generated one at a time, in index order: on a single worker thread by default, or
+    on the given executor, which never runs two chunks of a stream at once (a RecordGenerator
+    shares its streams and generators between chunks). The output is therefore the same as a
+    synchronous run, identical with a seed. At most max_pending_chunks chunks are generated ahead
+    of the consumer: a slow consumer pauses generation instead of letting finished chunks pile up
+    in memory. For parallel generation, use Utility.StreamSyntheticTestDataParallel.
+    """
+    def __init__(self, chunk_size: int = 1024, max_pending_chunks: int = 2, executor: Optional[Executor] = None):
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("chunk_size must be an integer greater than or equal to 1.")
+        if not isinstance(max_pending_chunks, int) or max_pending_chunks < 1:
+            raise ValueError("max_pending_chunks must be an integer greater than or equal to 1.")
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+        self.executor = executor
+
+    async def stream(self, record_generator: RecordGenerator, count: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields `count` records as lists of at most chunk_size records, in index order."""
+        loop = asyncio.get_running_loop()
+        executor = self.executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="synthetic-data")
+        # Finished chunks (or the error that stopped generation); None marks the end
+        finished = deque()
+        chunk_ready = asyncio.Event()
+        free_slots = asyncio.Semaphore(self.max_pending_chunks)
+
+        async def produce() -> None:
+            try:
+                for start in range(0, count, self.chunk_size):
+                    await free_slots.acquire()
+                    # The next chunk is only submitted once the previous one is done
+                    finished.append(await loop.run_in_executor(executor, record_generator.generate_batch, start, min(start + self.chunk_size, count)))
+                    chunk_ready.set()
+                finished.append(None)
+            except Exception as error:
+                finished.append(error)
+            chunk_ready.set()
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                while not finished:
+                    chunk_ready.clear()
+                    await chunk_ready.wait()
+                records = finished.popleft()
+                if records is None:
+                    return
+                if isinstance(records, Exception):
+                    raise records
+                # The consumer took this chunk: another one may be generated ahead
+                free_slots.release()
+                yield records
+        finally:
+            producer.cancel()
+            if self.executor is None:
+                executor.shutdown(wait=False, cancel_futures=True)
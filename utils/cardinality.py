@@ -0,0 +1,67 @@
+# utils/cardinality.py
+import bisect
+import itertools
+import random
+from typing import Any, Dict, List, Optional
+
+
+class Cardinality:
+    """
+    How many items a generated list or dict gets: uniform between min_items and max_items, or
+    drawn from {count: weight} weights. Built from a rule's "cardinality" option by from_option.
+    """
+    __slots__ = ("min_items", "max_items", "counts", "cumulative_weights")
+
+    def __init__(self, min_items: int, max_items: int, weights: Optional[Dict[int, float]] = None):
+        if weights is not None:
+            if not weights or any(not isinstance(count, int) or count < 0 or weight <= 0 for count, weight in weights.items()):
+                raise ValueError("Cardinality weights must map non-negative item counts to positive weights.")
+            self.counts = tuple(weights)
+            self.cumulative_weights = tuple(itertools.accumulate(weights.values()))
+            min_items, max_items = min(self.counts), max(self.counts)
+        else:
+            self.counts = None
+            self.cumulative_weights = None
+        if not isinstance(min_items, int) or not isinstance(max_items, int) or not 0 <= min_items <= max_items:
+            raise ValueError("Cardinality bounds must be integers with 0 <= min_items <= max_items.")
+        self.min_items = min_items
+        self.max_items = max_items
+
+    @classmethod
+    def from_option(cls, option: Any) -> "Cardinality":
+        """Builds a cardinality from an item count (5), a [min, max] range or a {count: weight} dictionary."""
+        if isinstance(option, Cardinality):
+            return option
+        if isinstance(option, int) and not isinstance(option, bool):
+            return cls(option, option)
+        if isinstance(option, (list, tuple)) and len(option) == 2:
+            return cls(option[0], option[1])
+        if isinstance(option, dict):
+            return cls(0, 0, option)
+        raise TypeError("A cardinality must be an item count, a [min, max] range or a {count: weight} dictionary.")
+
+    def draw(self, rng: random.Random) -> int:
+        if self.counts is not None:
+            return self.counts[bisect.bisect(self.cumulative_weights, rng.random() * self.cumulative_weights[-1])]
+        if self.min_items == self.max_items:
+            return self.min_items
+        return rng.randint(self.min_items, self.max_items)
+
+    def draw_many(self, n: int, rng: random.Random) -> List[int]:
+        if self.counts is not None:
+            return rng.choices(self.counts, cum_weights=self.cumulative_weights, k=n)
+        if self.min_items == self.max_items:
+            return [self.min_items] * n
+        randint = rng.randint
+        return [randint(self.min_items, self.max_items) for _ in range(n)]
+
+    def __reduce__(self):
+        if self.counts is None:
+            return (Cardinality, (self.min_items, self.max_items))
+        weights = [b - a for a, b in zip((0,) + self.cumulative_weights[:-1], self.cumulative_weights)]
+        return (Cardinality, (self.min_items, self.max_items, dict(zip(self.counts, weights))))
+
+    def __repr__(self) -> str:
+        if self.counts is not None:
+            return f"Cardinality(weights={self.__reduce__()[1][2]!r})"
+        return f"Cardinality({self.min_items}, {self.max_items})"
@@ -0,0 +1,314 @@
+# utils/dataset_cache.py
+import os
+import sys
+import mmap
+import glob
+import types
+import struct
+import pickle
+import bisect
+import hashlib
+import inspect
+import tempfile
+import functools
+import importlib.metadata
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union, get_args
+
+from utils.generated_test_data import GeneratedTestData
+from utils.key_index import KeyIndex
+from utils.locale_pool import LocaleChoice
+from utils.cardinality import Cardinality
+
+_MAGIC = b"SDCACHE1"
+_TRAILER = struct.Struct("<Q")
+_SUFFIX = ".dataset"
+# Modules whose classes are field value types, not nested record classes
+_VALUE_TYPE_MODULES = frozenset({"builtins", "typing", "datetime", "uuid", "decimal", "collections.abc"})
+
+
+@functools.lru_cache(maxsize=None)
+def library_digest() -> str:
+    """Digest of everything besides the inputs that decides generated values: this package's sources and the Faker/NumPy/Python versions."""
+    content = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as source:
+            content.update(os.path.basename(path).encode("utf-8") + b"\0" + source.read())
+    for package in ("faker", "numpy"):
+        try:
+            content.update(f"{package}={importlib.metadata.version(package)};".encode("utf-8"))
+        except importlib.metadata.PackageNotFoundError:
+            content.update(f"{package}=;".encode("utf-8"))
+    content.update(f"python={sys.version_info[0]}.{sys.version_info[1]}".encode("utf-8"))
+    return content.hexdigest()
+
+
+def _code_digest(code: types.CodeType) -> str:
+    content = hashlib.sha256(code.co_code)
+    content.update(repr(code.co_names).encode("utf-8"))
+    for constant in code.co_consts:
+        content.update((_code_digest(constant) if isinstance(constant, types.CodeType) else _constant_repr(constant)).encode("utf-8"))
+    return content.hexdigest()
+
+
+def _constant_repr(constant: Any) -> str:
+    # Set constants (e.g. `x in {"a", "b"}`) iterate in hash order, which varies between processes
+    if isinstance(constant, frozenset):
+        return "frozenset(" + repr(sorted(map(_constant_repr, constant))) + ")"
+    if isinstance(constant, tuple):
+        return "(" + ", ".join(map(_constant_repr, constant)) + ")"
+    return repr(constant)
+
+
+def _method_locale(owner: Any) -> Optional[str]:
+    """The locale a bound generator or Faker provider method generates in."""
+    # SyntheticDataGenerators carry it on .fake; a Faker provider on the generator it was built for
+    locale = getattr(getattr(owner, "fake", None), "locale", None) or getattr(owner, "locale", None)
+    if not isinstance(locale, str):
+        config = getattr(getattr(owner, "generator", None), "_Generator__config", None)
+        locale = config.get("locale") if isinstance(config, dict) else None
+    if not isinstance(locale, str):
+        locale = getattr(owner, "__lang__", None)
+    return locale if isinstance(locale, str) else None
+
+
+def _qualified_name(value: Any) -> str:
+    return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', getattr(value, '__name__', '?'))}"
+
+
+def _describe_class(target_class: type, seen: Dict[type, Any]) -> Any:
+    if target_class in seen:
+        return _qualified_name(target_class)
+    seen[target_class] = None
+    try:
+        source = inspect.getsource(target_class)
+    except (OSError, TypeError):
+        source = None
+    nested = []
+    try:
+        parameters = inspect.signature(target_class.__init__).parameters.values()
+    except (TypeError, ValueError):
+        parameters = ()
+    signature = []
+    for parameter in parameters:
+        signature.append([parameter.name, repr(parameter.annotation), repr(parameter.default)])
+        pending = [parameter.annotation]
+        while pending:
+            annotation = pending.pop()
+            pending.extend(get_args(annotation))
+            if inspect.isclass(annotation) and annotation.__module__ not in _VALUE_TYPE_MODULES:
+                nested.append(_describe_class(annotation, seen))
+    return {"class": _qualified_name(target_class), "source": source, "signature": signature, "nested": nested}
+
+
+def describe(value: Any, seen: Optional[Dict[type, Any]] = None) -> Any:
+    """
+    A JSON-serializable description of a schema, rules value or setting that is equal across
+    processes and runs exactly when the value would generate the same data: no ids or addresses.
+    Functions are described by name and bytecode, bound generator/Faker methods by their class,
+    method name and locale. Raises TypeError for values that cannot be described that way.
+    """
+    seen = {} if seen is None else seen
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {"dict": sorted(([describe(key, seen), describe(item, seen)] for key, item in value.items()), key=repr)}
+    if isinstance(value, (list, tuple)):
+        return [describe(item, seen) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted((describe(item, seen) for item in value), key=repr)}
+    if inspect.isclass(value):
+        return _describe_class(value, seen)
+    if isinstance(value, functools.partial):
+        return {"partial": describe(value.func, seen), "args": describe(value.args, seen), "keywords": describe(value.keywords, seen)}
+    if inspect.ismethod(value) or (inspect.isbuiltin(value) and not inspect.ismodule(getattr(value, "__self__", None))
+                                   and getattr(value, "__self__", None) is not None):
+        owner = value.__self__
+        return {"method": _qualified_name(type(owner)) + "." + value.__name__, "locale": _method_locale(owner)}
+    if inspect.isfunction(value):
+        closure = [describe(cell.cell_contents, seen) for cell in value.__closure__ or ()]
+        return {"function": _qualified_name(value), "code": _code_digest(value.__code__),
+                "defaults": describe(value.__defaults__, seen), "closure": closure}
+    if inspect.isbuiltin(value):
+        return {"builtin": _qualified_name(value)}
+    if isinstance(value, KeyIndex):
+        return {"key_index": value.digest()}
+    if isinstance(value, LocaleChoice):
+        return {"locales": describe(value.__reduce__()[1], seen)}
+    if isinstance(value, Cardinality):
+        return {"cardinality": describe(value.__reduce__()[1], seen)}
+    raise TypeError(f"Cannot fingerprint a value of type {type(value).__name__!r}; "
+                    "rules must use JSON-like values, functions, bound generator/Faker methods, KeyIndexes or Cardinalities.")
+
+
+def dataset_fingerprint(target: Any, rules: Optional[Dict[str, Any]], seed: Any, count: int, **settings: Any) -> str:
+    """Content address of a dataset: SHA-256 of (target, rules, seed, count, settings, library digest)."""
+    description = describe({"target": target, "rules": rules, "seed": seed, "count": count, "settings": settings,
+                            "library": library_digest()})
+    return hashlib.sha256(repr(description).encode("utf-8")).hexdigest()
+
+
+class CachedDataset:
+    """
+    A cached dataset, read through a memory map: records are unpickled a chunk at a time, on access.
+    Supports len(), indexing, slicing (returns a list) and iteration; records are GeneratedTestData.
+    Close it (or use it as a context manager) to release the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"{path} is not a dataset cache file.")
+            (index_offset,) = _TRAILER.unpack(self._map[-_TRAILER.size:])
+            self.count, self._chunk_starts, self._chunk_offsets = pickle.loads(self._map[index_offset:-_TRAILER.size])
+        except Exception:
+            self.close()
+            raise
+        self._loaded_chunk: Tuple[int, List[Dict[str, Any]]] = (-1, [])
+
+    def _chunk(self, chunk_number: int) -> List[Dict[str, Any]]:
+        if self._loaded_chunk[0] != chunk_number:
+            start, stop = self._chunk_offsets[chunk_number]
+            self._loaded_chunk = (chunk_number, pickle.loads(self._map[start:stop]))
+        return self._loaded_chunk[1]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[GeneratedTestData, List[GeneratedTestData]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.count))]
+        if not -self.count <= index < self.count:
+            raise IndexError("CachedDataset index out of range")
+        index %= self.count
+        chunk_number = bisect.bisect_right(self._chunk_starts, index) - 1
+        return GeneratedTestData(self._chunk(chunk_number)[index - self._chunk_starts[chunk_number]])
+
+    def __iter__(self) -> Iterator[GeneratedTestData]:
+        for chunk_number in range(len(self._chunk_offsets)):
+            for record in self._chunk(chunk_number):
+                yield GeneratedTestData(record)
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "CachedDataset":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"CachedDataset({self.count} records, path={self.path!r})"
+
+
+class DatasetCache:
+    """
+    A directory of generated datasets, one file per fingerprint (see dataset_fingerprint).
+
+    A miss generates the dataset into a temporary file of the same directory and renames it into
+    place, so concurrent jobs never read a partial dataset. Files are kept below max_bytes in total
+    by evicting the least recently used ones (by modification time, bumped on every hit).
+    Cache files are pickles: only point the cache at a directory you trust.
+    """
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        if not isinstance(max_bytes, int) or max_bytes < 1:
+            raise ValueError("max_bytes must be an integer greater than or equal to 1.")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint + _SUFFIX)
+
+    def get(self, fingerprint: str) -> Optional[CachedDataset]:
+        path = self.path_for(fingerprint)
+        try:
+            dataset = CachedDataset(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError):
+            self._remove(path)  # truncated or foreign file: regenerate it
+            return None
+        os.utime(path)
+        return dataset
+
+    def put(self, fingerprint: str, chunks: Iterable[List[Dict[str, Any]]]) -> CachedDataset:
+        """Writes a dataset given as chunks of records and returns it, read back from the cache."""
+        descriptor, temp_path = tempfile.mkstemp(prefix=fingerprint[:16], suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                output.write(_MAGIC)
+                count, chunk_starts, chunk_offsets = 0, [], []
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    start = output.tell()
+                    pickle.dump(chunk, output, protocol=pickle.HIGHEST_PROTOCOL)
+                    chunk_starts.append(count)
+                    chunk_offsets.append((start, output.tell()))
+                    count += len(chunk)
+                index_offset = output.tell()
+                pickle.dump((count, chunk_starts, chunk_offsets), output, protocol=pickle.HIGHEST_PROTOCOL)
+                output.write(_TRAILER.pack(index_offset))
+            os.replace(temp_path, self.path_for(fingerprint))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self.evict(keep=self.path_for(fingerprint))
+        return CachedDataset(self.path_for(fingerprint))
+
+    def get_or_generate(self, fingerprint: str, generate_chunks: Callable[[], Iterable[List[Dict[str, Any]]]]) -> CachedDataset:
+        dataset = self.get(fingerprint)
+        if dataset is not None:
+            self.hits += 1
+            return dataset
+        self.misses += 1
+        return self.put(fingerprint, generate_chunks())
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*" + _SUFFIX)):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue  # removed concurrently
+            entries.append((status.st_mtime, status.st_size, path))
+        return sorted(entries)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Removes least recently used datasets until the cache fits in max_bytes; returns how many."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path != keep and self._remove(path):
+                total -= size
+                removed += 1
+        self.evictions += removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False  # already gone, or still open elsewhere on Windows
+
+    def clear(self) -> int:
+        return sum(self._remove(path) for _, _, path in self._entries())
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {"directory": self.directory, "datasets": len(entries), "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
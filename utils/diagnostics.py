@@ -0,0 +1,101 @@
+# utils/diagnostics.py
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+class DiagnosticEvent:
+    """Occurrences of one (field path, kind) event: the first message and how often it happened."""
+    __slots__ = ("kind", "field_path", "level", "message", "count", "unreported")
+
+    def __init__(self, kind: str, field_path: str, level: int, message: str):
+        self.kind = kind
+        self.field_path = field_path
+        self.level = level
+        self.message = message
+        self.count = 0
+        self.unreported = 0  # occurrences not emitted individually since the last summary
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "field_path": self.field_path, "level": logging.getLevelName(self.level),
+                "count": self.count, "message": self.message}
+
+
+class DiagnosticsCollector:
+    """
+    Collects the warnings and errors of plan compilation and generation, deduplicated by
+    (field path, kind). The first occurrence of an event is emitted; repeats are only counted and
+    reported once, in the summary emitted at the end of each run (end_run()).
+
+    Messages go to stdout by default, or to a logging.Logger, and at most max_messages_per_second
+    individual messages are emitted; anything over the limit is counted into the summary instead.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None, max_messages_per_second: Optional[float] = None, summary: bool = True):
+        self.events: Dict[Tuple[str, str], DiagnosticEvent] = {}
+        self.configure(logger, max_messages_per_second, summary)
+
+    def configure(self, logger: Optional[logging.Logger] = None, max_messages_per_second: Optional[float] = None, summary: bool = True) -> None:
+        self.logger = logger
+        self.max_messages_per_second = max_messages_per_second
+        self.summary = summary
+        self._tokens = max_messages_per_second or 0.0
+        self._last_refill = time.monotonic()
+
+    def report(self, kind: str, field_path: str, message: Union[str, Callable[[], str]], level: int = WARNING) -> None:
+        """Records one occurrence; message may be a callable so it is only formatted for a new event."""
+        event = self.events.get((kind, field_path))
+        if event is None:
+            event = self.events[(kind, field_path)] = DiagnosticEvent(kind, field_path, level, message() if callable(message) else message)
+            event.count = 1
+            if self._allow():
+                self._emit(level, event.message)
+            else:
+                event.unreported = 1
+            return
+        event.count += 1
+        event.unreported += 1
+
+    def _allow(self) -> bool:
+        if self.max_messages_per_second is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.max_messages_per_second, self._tokens + (now - self._last_refill) * self.max_messages_per_second)
+        self._last_refill = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _emit(self, level: int, message: str) -> None:
+        if self.logger is not None:
+            self.logger.log(level, message)
+        else:
+            print(message)
+
+    def end_run(self) -> None:
+        """Emits one summary line per event that had unreported occurrences since the last summary."""
+        pending = [event for event in self.events.values() if event.unreported]
+        if not pending:
+            return
+        if self.summary:
+            lines = ["Diagnostics summary:"]
+            for event in sorted(pending, key=lambda event: -event.unreported):
+                lines.append(f"  {event.kind} for '{event.field_path}': {event.unreported} more occurrence(s) "
+                             f"({event.count} in total). First: {event.message}")
+            self._emit(max(event.level for event in pending), "\n".join(lines))
+        for event in pending:
+            event.unreported = 0
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {f"{event.field_path}:{event.kind}": event.as_dict() for event in self.events.values()}
+
+    def reset(self) -> None:
+        self.events.clear()
+
+
+# Process-wide collector used by the plan compiler and the bound generator calls
+diagnostics = DiagnosticsCollector()
@@ -0,0 +1,169 @@
+# utils/field_timing.py
+import json
+import random
+import dataclasses
+from time import perf_counter_ns
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.generation_plan import batch_counterpart, PlanNode, ValueNode, ObjectNode, ListNode, DictNode, NullableNode, UniqueNode, RecordLocaleNode
+from utils.locale_pool import LocalizedCall
+from utils.rng import StreamContext
+from utils.value_pools import ValuePool
+
+
+class LatencyStats:
+    """Call count, cumulative and max latency, plus a fixed-size reservoir sample for percentiles."""
+    __slots__ = ("count", "total_ns", "max_ns", "reservoir", "reservoir_size", "_random")
+
+    def __init__(self, reservoir_size: int = 1024):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.reservoir: List[int] = []
+        self.reservoir_size = reservoir_size
+        self._random = random.Random(0)
+
+    def record(self, elapsed_ns: int, calls: int = 1) -> None:
+        # A batch of calls is recorded as `calls` calls of its mean latency
+        per_call_ns = elapsed_ns // calls if calls > 1 else elapsed_ns
+        self.count += calls
+        self.total_ns += elapsed_ns
+        if per_call_ns > self.max_ns:
+            self.max_ns = per_call_ns
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(per_call_ns)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = per_call_ns
+
+    def percentile(self, fraction: float) -> float:
+        if not self.reservoir:
+            return 0.0
+        ordered = sorted(self.reservoir)
+        return float(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(0.50) / 1e3,
+            "p90_us": self.percentile(0.90) / 1e3,
+            "p99_us": self.percentile(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+class FieldTimings:
+    """Latency statistics collected by instrumented plans, per dotted field path and per generator."""
+    def __init__(self, reservoir_size: int = 1024):
+        self.reservoir_size = reservoir_size
+        self.fields: Dict[str, LatencyStats] = {}
+        self.generators: Dict[str, LatencyStats] = {}
+
+    def _stats(self, table: Dict[str, LatencyStats], key: str) -> LatencyStats:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = LatencyStats(self.reservoir_size)
+        return stats
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Both tables, each sorted by cumulative time, slowest first."""
+        def ordered(table: Dict[str, LatencyStats]) -> Dict[str, Dict[str, Any]]:
+            return {key: stats.as_dict() for key, stats in sorted(table.items(), key=lambda item: -item[1].total_ns)}
+        return {"fields": ordered(self.fields), "generators": ordered(self.generators)}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.report(), indent=indent)
+
+    def as_table(self, limit: Optional[int] = None) -> str:
+        lines = []
+        for title, rows in self.report().items():
+            lines.append(f"{title:<48} {'calls':>10} {'total ms':>10} {'mean us':>9} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9}")
+            for key, row in list(rows.items())[:limit]:
+                lines.append(f"{key:<48} {row['calls']:>10} {row['total_ms']:>10.1f} {row['mean_us']:>9.1f} "
+                             f"{row['p50_us']:>9.1f} {row['p90_us']:>9.1f} {row['p99_us']:>9.1f}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def generator_name(node: PlanNode) -> Optional[str]:
+    """Name a leaf is reported under in the per-generator table ('SyntheticDataGenerator.generate_str', 'pool:city', ...)."""
+    if not isinstance(node, ValueNode):
+        return None
+    call = node.call
+    if isinstance(call, ValuePool):
+        return f"pool:{getattr(getattr(call.source, 'generator', None), '__name__', 'value')}"
+    if isinstance(call, LocalizedCall):
+        return f"locale:{call.method_name}"
+    generator = getattr(call, 'generator', None)
+    if generator is None:
+        return None
+    return getattr(generator, '__qualname__', None) or getattr(generator, '__name__', repr(generator))
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class TimedNode(PlanNode):
+    """Wraps a field's node and records how long each value (or column) of it takes to generate."""
+    value_node: PlanNode
+    field_stats: LatencyStats
+    generator_stats: Optional[LatencyStats] = None
+    vectorized: bool = False
+
+    def generate(self) -> Any:
+        start = perf_counter_ns()
+        value = self.value_node.generate()
+        elapsed = perf_counter_ns() - start
+        self.field_stats.record(elapsed)
+        if self.generator_stats is not None:
+            self.generator_stats.record(elapsed)
+        return value
+
+    def generate_typed_column(self, n: int) -> Any:
+        if not self.vectorized:
+            # Time every value, so percentiles stay meaningful for generators without a batch primitive
+            return [self.generate() for _ in range(n)]
+        start = perf_counter_ns()
+        column = self.value_node.generate_typed_column(n)
+        elapsed = perf_counter_ns() - start
+        if n:
+            self.field_stats.record(elapsed, n)
+            if self.generator_stats is not None:
+                self.generator_stats.record(elapsed, n)
+        return column
+
+    def generate_column(self, n: int) -> list:
+        column = self.generate_typed_column(n)
+        return column.tolist() if hasattr(column, 'tolist') else column
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        return TimedNode(self.value_node.seeded(context, slots), self.field_stats, self.generator_stats, self.vectorized)
+
+
+def instrument_plan(node: PlanNode, timings: FieldTimings, prefix: str = "") -> PlanNode:
+    """
+    Returns a copy of a plan whose object fields are wrapped in TimedNodes. Fields of nested objects
+    (including objects inside lists and dicts) are reported under dotted paths such as
+    'shipping_address.city' or 'items.price'; nested objects themselves are not timed separately.
+    """
+    if isinstance(node, ObjectNode):
+        fields = []
+        for name, child in node.fields:
+            path = f"{prefix}{name}"
+            instrumented_child = instrument_plan(child, timings, f"{path}.")
+            if not isinstance(instrumented_child, ObjectNode):
+                generator = generator_name(child)
+                instrumented_child = TimedNode(instrumented_child, timings._stats(timings.fields, path),
+                                               timings._stats(timings.generators, generator) if generator else None,
+                                               isinstance(child, ValueNode) and batch_counterpart(child.call) is not None)
+            fields.append((name, instrumented_child))
+        return ObjectNode(tuple(fields))
+    if isinstance(node, ListNode):
+        return dataclasses.replace(node, item_nodes=tuple(instrument_plan(item, timings, prefix) for item in node.item_nodes))
+    if isinstance(node, DictNode):
+        return dataclasses.replace(node, key_nodes=tuple(instrument_plan(key, timings, prefix) for key in node.key_nodes),
+                                   value_nodes=tuple(instrument_plan(value, timings, prefix) for value in node.value_nodes))
+    if isinstance(node, (NullableNode, UniqueNode, RecordLocaleNode)):
+        return dataclasses.replace(node, value_node=instrument_plan(node.value_node, timings, prefix))
+    return node
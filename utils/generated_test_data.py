@@ -1,5 +1,7 @@
 # utils/generated_test_data.py
-from typing import Any, Dict
+import operator
+import functools
+from typing import Any, Dict, List, Tuple
 
 class GeneratedTestData:
     """
@@ -32,4 +34,204 @@ class GeneratedTestData:
         return self._data.keys()
 
     def values(self):
-        return self._data.values()
\ No newline at end of file
+        return self._data.values()
+
+class CompactRecord(tuple):
+    """
+    A generated record stored as a plain tuple of its field values, in declaration order.
+    Each record shape gets its own subclass (see compact_record_type) holding the field names and
+    the name -> position index once, so a record costs a single tuple instead of a dict plus a
+    GeneratedTestData wrapper. Nested objects and list items of objects are CompactRecords too.
+
+    Supports the read-only GeneratedTestData surface (record['city'], 'city' in record, keys(),
+    values(), items(), get_data()); get_data() builds the equivalent nested dicts on demand.
+    Integer indexes and iteration behave as for a tuple of the values.
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _field_index: Dict[str, int] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._field_index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._field_index.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._field_index
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(self)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(zip(self._fields, self))
+
+    def get_data(self) -> Dict[str, Any]:
+        return {name: _materialize(value) for name, value in zip(self._fields, self)}
+
+    def __str__(self) -> str:
+        return str(self.get_data())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in zip(self._fields, self))})"
+
+    def __reduce__(self):
+        # Record types are created at runtime: pickle the shape and rebuild (or reuse) the type on load
+        return (_rebuild_compact_record, (type(self).__name__, self._fields, tuple(self)))
+
+
+@functools.lru_cache(maxsize=None)
+def compact_record_type(name: str, fields: Tuple[str, ...]) -> type:
+    """The CompactRecord subclass for records named `name` with these fields (one type per shape)."""
+    return type(name, (CompactRecord,), {"__slots__": (), "__qualname__": name, "_fields": fields,
+                                         "_field_index": {field_name: position for position, field_name in enumerate(fields)}})
+
+
+def _rebuild_compact_record(name: str, fields: Tuple[str, ...], values: Tuple[Any, ...]) -> CompactRecord:
+    return compact_record_type(name, fields)(values)
+
+
+def _materialize(value: Any) -> Any:
+    if isinstance(value, CompactRecord):
+        return value.get_data()
+    if isinstance(value, list):
+        return [item.get_data() if isinstance(item, CompactRecord) else item for item in value]
+    return value
+
+
+class RecordSchema:
+    """
+    Converts the dict records generated by one plan into CompactRecords. nested lists the
+    (position, schema, is_list) of fields holding objects, or lists of objects, to convert as well.
+    """
+    __slots__ = ("record_type", "nested", "_get_values")
+
+    def __init__(self, name: str, fields: Tuple[str, ...], nested: Tuple[Tuple[int, "RecordSchema", bool], ...] = ()):
+        self.record_type = compact_record_type(name, fields)
+        self.nested = nested
+        if len(fields) == 1:
+            field_name = fields[0]
+            self._get_values = lambda data: (data[field_name],)
+        elif fields:
+            self._get_values = operator.itemgetter(*fields)
+        else:
+            self._get_values = lambda data: ()
+
+    @property
+    def signature(self) -> tuple:
+        """Everything that determines the converted shape; equal signatures convert alike."""
+        return (self.record_type._fields, tuple((position, schema.signature, is_list) for position, schema, is_list in self.nested))
+
+    def convert(self, data: Dict[str, Any]) -> CompactRecord:
+        values = self._get_values(data)
+        if self.nested:
+            values = list(values)
+            for position, schema, is_list in self.nested:
+                value = values[position]
+                if value is None:
+                    continue
+                if is_list:
+                    values[position] = [item if item is None else schema.convert(item) for item in value]
+                else:
+                    values[position] = schema.convert(value)
+        return self.record_type(values)
+
+    def convert_many(self, rows: List[Dict[str, Any]]) -> List[CompactRecord]:
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+    def __reduce__(self):
+        return (RecordSchema, (self.record_type.__name__, self.record_type._fields, self.nested))
+
+
+class ColumnarBatch:
+    """
+    A batch of generated records stored column-wise: one list (or NumPy array, for columns
+    filled by a vectorized primitive) per field path. Nested objects are flattened to dotted
+    paths such as 'shipping_address.city'; layout records how to nest them back into rows.
+    Rows are only built on demand (row(), to_rows(), to_records()).
+    """
+    __slots__ = ("_columns", "_layout", "_length")
+
+    def __init__(self, columns: Dict[str, Any], layout: Tuple[Tuple[str, Any], ...], length: int):
+        self._columns = columns
+        self._layout = layout
+        self._length = length
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], layout: Tuple[Tuple[str, Any], ...]) -> "ColumnarBatch":
+        columns: Dict[str, Any] = {}
+        _columns_from_rows(layout, rows, columns)
+        return cls(columns, layout, len(rows))
+
+    def get_columns(self) -> Dict[str, Any]:
+        return self._columns
+
+    @property
+    def layout(self) -> Tuple[Tuple[str, Any], ...]:
+        return self._layout
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, path: str) -> Any:
+        return self._columns[path]
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._columns
+
+    def __repr__(self) -> str:
+        return f"ColumnarBatch({self._length} rows, columns={self.column_names})"
+
+    def row(self, index: int) -> Dict[str, Any]:
+        if not -self._length <= index < self._length:
+            raise IndexError("ColumnarBatch row index out of range")
+        return _row_from_layout(self._layout, self._columns, index % self._length)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        columns = {path: column.tolist() if hasattr(column, 'tolist') else column for path, column in self._columns.items()}
+        return _rows_from_layout(self._layout, columns, self._length)
+
+    def to_records(self) -> List[GeneratedTestData]:
+        return [GeneratedTestData(row) for row in self.to_rows()]
+
+
+def _rows_from_layout(layout: Tuple[Tuple[str, Any], ...], columns: Dict[str, list], length: int) -> List[Dict[str, Any]]:
+    names = []
+    values = []
+    for name, entry in layout:
+        names.append(name)
+        values.append(_rows_from_layout(entry, columns, length) if isinstance(entry, tuple) else columns[entry])
+    if not names:
+        return [{} for _ in range(length)]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _row_from_layout(layout: Tuple[Tuple[str, Any], ...], columns: Dict[str, Any], index: int) -> Dict[str, Any]:
+    row = {}
+    for name, entry in layout:
+        if isinstance(entry, tuple):
+            row[name] = _row_from_layout(entry, columns, index)
+        else:
+            value = columns[entry][index]
+            row[name] = value.item() if hasattr(value, 'item') else value
+    return row
+
+
+def _columns_from_rows(layout: Tuple[Tuple[str, Any], ...], rows: List[Dict[str, Any]], columns: Dict[str, Any]) -> None:
+    for name, entry in layout:
+        values = [None if row is None else row.get(name) for row in rows]
+        if isinstance(entry, tuple):
+            _columns_from_rows(entry, values, columns)
+        else:
+            columns[entry] = values
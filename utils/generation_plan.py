@@ -0,0 +1,696 @@
+# utils/generation_plan.py
+import random
+import operator
+import itertools
+import functools
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from utils.rng import CounterRandom, StreamContext, SubStream, derive_seed
+from utils.generated_test_data import ColumnarBatch, RecordSchema
+from utils.value_pools import ValuePool
+from utils.uniqueness import UniqueConstraint
+from utils.key_index import KeyIndex
+from utils.lazy_imports import is_faker_generator
+from utils.locale_pool import LocaleChoice, LocalizedCall, record_locale
+from utils.cardinality import Cardinality
+from utils.diagnostics import diagnostics, INFO
+
+# Draws made by unseeded plans never touch (or depend on) the global random module state
+_unseeded_random = random.Random()
+
+
+class PlanNode:
+    """
+    Base class for the nodes of a compiled generation plan.
+    A plan is resolved once (field list, generators, rule bindings) and then
+    replayed for every record by calling .generate() on its root node.
+    """
+    def generate(self) -> Any:
+        raise NotImplementedError
+
+    def as_callable(self) -> Callable[[], Any]:
+        """Returns the cheapest zero-argument callable producing this node's value."""
+        return self.generate
+
+    def generate_column(self, n: int) -> list:
+        """
+        Generates this node's values for n records at once. Nodes override this with a
+        vectorized/batched fill where they can; the default is n independent generate() calls.
+        """
+        return [self.generate() for _ in range(n)]
+
+    def generate_typed_column(self, n: int) -> Any:
+        """Like generate_column, but leaves filled by a vectorized primitive keep their NumPy array."""
+        return self.generate_column(n)
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> "PlanNode":
+        """
+        Returns a copy of this subtree in which every node drawing random values has its own
+        SubStream. Slots are allocated depth-first in generation order, so they only depend on
+        the plan structure and are the same in every process.
+        """
+        return self
+
+
+def _random_sources_of(call: Callable[[], Any]) -> Optional[Tuple[random.Random, ...]]:
+    """
+    Returns the random.Random objects a bound generator draws from (see ValueNode.seeded),
+    or None for a callable expected to draw from the global random module.
+    """
+    if isinstance(call, ValuePool):
+        return (call.random,)  # pooled values: only the pick from the pool is re-seeded
+    if isinstance(call, LocalizedCall):
+        return (call.pool.random,)  # every pooled locale draws from the pool's stream
+    generator_func = getattr(call, 'generator', None)
+    if generator_func is None:
+        return ()  # constant value
+    owner = getattr(generator_func, '__self__', None)
+    if owner is not None and isinstance(getattr(owner, 'random', None), random.Random) and hasattr(owner, 'fake'):
+        return (owner.random,)  # SyntheticDataGenerator method; its Faker shares owner.random
+    factory = getattr(owner, 'generator', None)
+    if is_faker_generator(factory):
+        # Faker provider method: give that Faker generator its own cheaply re-seedable stream
+        if not isinstance(factory.random, CounterRandom):
+            factory.random = CounterRandom()
+        return (factory.random,)
+    # Any other callable is expected to draw from the random module
+    return None
+
+
+def batch_counterpart(call: Callable[[], Any]) -> Optional[Callable[[int], Any]]:
+    """
+    Returns a callable producing n values of `call` at once: ValuePool.sample_batch, or
+    SyntheticDataGenerator.generate_<name>_batch for a bound (or record-locale) generate_<name> call.
+    None otherwise.
+    """
+    if isinstance(call, ValuePool):
+        return call.sample_batch
+    if isinstance(call, LocalizedCall):
+        return call.batch_counterpart()
+    generator_func = getattr(call, 'generator', None)
+    owner = getattr(generator_func, '__self__', None)
+    if owner is None or not hasattr(owner, 'fake'):
+        return None
+    batch_generator = getattr(owner, f"{generator_func.__name__}_batch", None)
+    return functools.partial(batch_generator, **call.kwargs) if batch_generator is not None else None
+
+
+class SeededCall:
+    """Re-seeds a generator's random sources from its SubStream before every call."""
+    __slots__ = ("call", "random_sources", "stream")
+
+    def __init__(self, call: Callable[[], Any], random_sources: Tuple[random.Random, ...], stream: SubStream):
+        self.call = call
+        self.random_sources = random_sources
+        self.stream = stream
+
+    def __call__(self) -> Any:
+        stream_seed = self.stream.current_seed()
+        for offset, random_source in enumerate(self.random_sources):
+            random_source.seed(stream_seed + offset)
+        return self.call()
+
+
+class GlobalRandomSeededCall:
+    """
+    Seeds the global random module from a SubStream around every call of a custom callable, then
+    restores the caller's random state, so seeded runs never change what random.random() returns next.
+    """
+    __slots__ = ("call", "stream")
+
+    def __init__(self, call: Callable[[], Any], stream: SubStream):
+        self.call = call
+        self.stream = stream
+
+    def __call__(self) -> Any:
+        state = random.getstate()
+        random.seed(self.stream.current_seed())
+        try:
+            return self.call()
+        finally:
+            random.setstate(state)
+
+
+class RefreshSeededCall:
+    """
+    Seeds a pooled generator's random sources from its pool's stream before every refill, so the
+    values a seeded run refreshes into a pool are reproducible too.
+    """
+    __slots__ = ("call", "random_sources", "seed_random")
+
+    def __init__(self, call: Callable[[], Any], random_sources: Optional[Tuple[random.Random, ...]], seed_random: random.Random):
+        self.call = call
+        self.random_sources = random_sources
+        self.seed_random = seed_random
+
+    def __call__(self) -> Any:
+        seed = self.seed_random.getrandbits(64)
+        if self.random_sources is None:
+            state = random.getstate()
+            random.seed(seed)
+            try:
+                return self.call()
+            finally:
+                random.setstate(state)
+        for offset, random_source in enumerate(self.random_sources):
+            random_source.seed(seed + offset)
+        return self.call()
+
+
+@dataclass(frozen=True, eq=False)
+class ValueNode(PlanNode):
+    """Leaf node wrapping a zero-argument callable (a generator with its kwargs already bound)."""
+    call: Callable[[], Any]
+
+    def generate(self) -> Any:
+        return self.call()
+
+    def as_callable(self) -> Callable[[], Any]:
+        return self.call
+
+    def generate_column(self, n: int) -> list:
+        column = self.generate_typed_column(n)
+        return column.tolist() if hasattr(column, 'tolist') else column
+
+    def generate_typed_column(self, n: int) -> Any:
+        batch_generator = batch_counterpart(self.call)
+        if batch_generator is not None:
+            try:
+                return batch_generator(n)
+            except (ValueError, TypeError, OverflowError) as error:
+                # e.g. unparseable date bounds: report it, then keep the per-value error handling below
+                field_name = getattr(self.call, 'field_name', None) or getattr(getattr(self.call, 'source', None), 'field_name', '?')
+                error_text = str(error)
+                diagnostics.report("batch_fallback", field_name,
+                                   lambda: f"Info: Batch generation failed for field '{field_name}' ({error_text}). Generating its values one by one.", INFO)
+        call = self.call
+        return [call() for _ in range(n)]
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        call = self.call
+        if isinstance(call, ValuePool) and call.refresh_interval is not None:
+            # A refreshing pool changes as it is drawn from: the seeded run gets its own copy,
+            # refilled with values seeded from the copy's stream
+            call = call.renewed()
+            call.source = RefreshSeededCall(self.call.source, _random_sources_of(self.call.source), call.random)
+        random_sources = _random_sources_of(call)
+        if random_sources is None:
+            return ValueNode(GlobalRandomSeededCall(call, SubStream(context, next(slots))))
+        if not random_sources:
+            return self
+        return ValueNode(SeededCall(call, random_sources, SubStream(context, next(slots))))
+
+
+@dataclass(frozen=True, eq=False)
+class ChoiceNode(PlanNode):
+    """Leaf node picking a value from a fixed list of choices."""
+    choices: Tuple[Any, ...]
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> Any:
+        return (self.stream.next_random() if self.stream else _unseeded_random).choice(self.choices)
+
+    def as_callable(self) -> Callable[[], Any]:
+        if self.stream is None:
+            return functools.partial(_unseeded_random.choice, self.choices)
+        return self.generate
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        return _unseeded_random.choices(self.choices, k=n)
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        return ChoiceNode(self.choices, SubStream(context, next(slots)))
+
+
+@dataclass(frozen=True, eq=False)
+class ForeignKeyNode(PlanNode):
+    """Leaf node sampling a key of a previously generated parent entity from its KeyIndex, in O(1)."""
+    key_index: KeyIndex
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> Any:
+        return self.key_index.sample(self.stream.next_random() if self.stream else _unseeded_random)
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        return self.key_index.sample_batch(n, _unseeded_random)
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        return ForeignKeyNode(self.key_index, SubStream(context, next(slots)))
+
+
+@dataclass(frozen=True, eq=False)
+class NullableNode(PlanNode):
+    """Generates None with the given probability, otherwise delegates to value_node."""
+    value_node: PlanNode
+    null_probability: float
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> Any:
+        if (self.stream.next_random() if self.stream else _unseeded_random).random() < self.null_probability:
+            return None
+        return self.value_node.generate()
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        null_probability = self.null_probability
+        return [None if _unseeded_random.random() < null_probability else value for value in self.value_node.generate_column(n)]
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        stream = SubStream(context, next(slots))
+        return NullableNode(self.value_node.seeded(context, slots), self.null_probability, stream)
+
+
+@dataclass(frozen=True, eq=False)
+class UniqueNode(PlanNode):
+    """
+    Regenerates value_node's value until the constraint's dedup backend has not seen it yet,
+    at most constraint.max_retries times. The dedup state lives in the constraint, so uniqueness
+    holds across every record of a run without keeping any record; each run starts from fresh
+    constraints (see renew_unique_constraints).
+    """
+    value_node: PlanNode
+    constraint: UniqueConstraint
+    context: Optional[StreamContext] = None
+
+    def generate(self) -> Any:
+        value = self.value_node.generate()
+        if self.constraint.backend.add(value):
+            self.constraint.record_attempts(1)
+            return value
+        return self._retry(value)
+
+    def _retry(self, value: Any) -> Any:
+        constraint = self.constraint
+        record_key = self.context.record_key if self.context is not None else None
+        try:
+            for attempt in range(2, constraint.max_retries + 1):
+                if record_key is not None:
+                    # Seeded: retry from a stream derived from (record key, attempt), then restore the record key
+                    self.context.record_key = derive_seed(record_key, attempt)
+                value = self.value_node.generate()
+                if constraint.backend.add(value):
+                    constraint.record_attempts(attempt)
+                    return value
+        finally:
+            if record_key is not None:
+                self.context.record_key = record_key
+        raise constraint.exhausted(value)
+
+    def generate_column(self, n: int) -> list:
+        if self.context is not None:
+            return PlanNode.generate_column(self, n)
+        add = self.constraint.backend.add
+        record_attempts = self.constraint.record_attempts
+        column = self.value_node.generate_column(n)
+        for row, value in enumerate(column):
+            if add(value):
+                record_attempts(1)
+            else:
+                column[row] = self._retry(value)
+        return column
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        return UniqueNode(self.value_node.seeded(context, slots), self.constraint, context)
+
+
+def _fill_positions(item_nodes: Tuple[PlanNode, ...], lengths: List[int]) -> List[list]:
+    """
+    Unseeded: generates lists of the given lengths. Each leading position node fills its column for
+    every list reaching it; the last node fills all later items of all lists in one batch.
+    """
+    lists = [[] for _ in lengths]
+    head = len(item_nodes) - 1
+    for position in range(head):
+        rows = [row for row, length in enumerate(lengths) if length > position]
+        if not rows:
+            return lists
+        for row, value in zip(rows, item_nodes[position].generate_column(len(rows))):
+            lists[row].append(value)
+    total = sum(length - head for length in lengths if length > head)
+    if total:
+        values = item_nodes[-1].generate_column(total)
+        offset = 0
+        for row, length in enumerate(lengths):
+            if length > head:
+                lists[row].extend(values[offset:offset + length - head])
+                offset += length - head
+    return lists
+
+
+def _generate_positions(item_nodes: Tuple[PlanNode, ...], count: int, stream: SubStream, *salt: int) -> list:
+    """
+    Seeded: generates `count` items. Each item generated by the shared last node draws from streams
+    re-derived from (record key, list slot, salt, position), so items differ and stay addressable.
+    """
+    head = len(item_nodes) - 1
+    items = [item_nodes[position].generate() for position in range(min(count, head))]
+    if count > head:
+        context = stream.context
+        record_key = context.record_key
+        generate_item = item_nodes[-1].generate
+        try:
+            for position in range(head, count):
+                context.record_key = derive_seed(record_key, stream.slot, *salt, position)
+                items.append(generate_item())
+        finally:
+            context.record_key = record_key
+    return items
+
+
+@dataclass(frozen=True, eq=False)
+class ListNode(PlanNode):
+    """
+    Generates a list whose length is drawn from cardinality. item_nodes holds a node for each
+    leading position that needs its own (position-specific rules or kwargs); the last node generates
+    every later item, so lists of any length share one item plan, filled in one batched pass.
+    """
+    item_nodes: Tuple[PlanNode, ...]
+    cardinality: Cardinality = Cardinality(1, 3)
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> list:
+        if self.stream is None:
+            return _fill_positions(self.item_nodes, [self.cardinality.draw(_unseeded_random)])[0]
+        return _generate_positions(self.item_nodes, self.cardinality.draw(self.stream.next_random()), self.stream)
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        # Draw all lengths first, then fill the items of every list of the batch together
+        return _fill_positions(self.item_nodes, self.cardinality.draw_many(n, _unseeded_random))
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        stream = SubStream(context, next(slots))
+        return ListNode(tuple(node.seeded(context, slots) for node in self.item_nodes), self.cardinality, stream)
+
+
+@dataclass(frozen=True, eq=False)
+class DictNode(PlanNode):
+    """
+    Generates a dict whose size is drawn from cardinality (fewer entries when generated keys
+    collide), from key/value nodes laid out like ListNode.item_nodes.
+    """
+    key_nodes: Tuple[PlanNode, ...]
+    value_nodes: Tuple[PlanNode, ...]
+    cardinality: Cardinality = Cardinality(1, 2)
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> dict:
+        if self.stream is None:
+            return self.generate_column(1)[0]
+        size = self.cardinality.draw(self.stream.next_random())
+        return dict(zip(_generate_positions(self.key_nodes, size, self.stream, 0),
+                        _generate_positions(self.value_nodes, size, self.stream, 1)))
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        sizes = self.cardinality.draw_many(n, _unseeded_random)
+        return [dict(zip(keys, values)) for keys, values in zip(_fill_positions(self.key_nodes, sizes), _fill_positions(self.value_nodes, sizes))]
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        stream = SubStream(context, next(slots))
+        seeded_pairs = [(key_node.seeded(context, slots), value_node.seeded(context, slots))
+                        for key_node, value_node in zip(self.key_nodes, self.value_nodes)]
+        return DictNode(tuple(pair[0] for pair in seeded_pairs), tuple(pair[1] for pair in seeded_pairs), self.cardinality, stream)
+
+
+@dataclass(frozen=True, eq=False)
+class ObjectNode(PlanNode):
+    """Generates a dict with one entry per (field_name, node) pair, in declaration order."""
+    fields: Tuple[Tuple[str, PlanNode], ...]
+    _field_callables: Tuple[Tuple[str, Callable[[], Any]], ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_field_callables", tuple((name, node.as_callable()) for name, node in self.fields))
+
+    def generate(self) -> dict:
+        return {name: generate_value() for name, generate_value in self._field_callables}
+
+    def generate_column(self, n: int) -> list:
+        # Column-wise: every field is filled for all n records, then the columns are zipped into rows
+        if not self.fields:
+            return [{} for _ in range(n)]
+        field_names = tuple(name for name, _ in self.fields)
+        columns = [node.generate_column(n) for _, node in self.fields]
+        return [dict(zip(field_names, row)) for row in zip(*columns)]
+
+    def column_layout(self, prefix: str = "") -> tuple:
+        """
+        Returns (field name, column path) pairs in declaration order. Nested objects are flattened:
+        their entry holds their own layout instead, with dotted paths such as 'shipping_address.city'.
+        """
+        return tuple((name, node.column_layout(f"{prefix}{name}.") if isinstance(node, ObjectNode) else f"{prefix}{name}")
+                     for name, node in self.fields)
+
+    def generate_columns(self, n: int, prefix: str = "") -> dict:
+        """Generates n records as {column path: column}, following column_layout()."""
+        columns = {}
+        for name, node in self.fields:
+            if isinstance(node, ObjectNode):
+                columns.update(node.generate_columns(n, f"{prefix}{name}."))
+            else:
+                columns[f"{prefix}{name}"] = node.generate_typed_column(n)
+        return columns
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        return ObjectNode(tuple((name, node.seeded(context, slots)) for name, node in self.fields))
+
+    def __reduce__(self):
+        # Field callables are derived state: rebuild them in the unpickling process
+        return (ObjectNode, (self.fields,))
+
+    def with_fields(self, overrides: dict) -> "ObjectNode":
+        """Returns a copy of this node with some field nodes replaced (used to bind per-call kwargs)."""
+        return ObjectNode(tuple((name, overrides.get(name, node)) for name, node in self.fields))
+
+
+@dataclass(frozen=True, eq=False)
+class RecordLocaleNode(PlanNode):
+    """
+    Picks a locale per record and generates value_node (a record's root) with it as the current
+    record locale, which the LocalizedCalls of the record use. Columns are generated per locale
+    group, so each group still uses the batched fills.
+    """
+    value_node: PlanNode
+    locale_choice: LocaleChoice
+    stream: Optional[SubStream] = None
+
+    def generate(self) -> Any:
+        previous_locale = record_locale.locale
+        record_locale.locale = self.locale_choice.pick(self.stream.next_random() if self.stream else _unseeded_random)
+        try:
+            return self.value_node.generate()
+        finally:
+            record_locale.locale = previous_locale
+
+    def _locale_groups(self, n: int) -> dict:
+        groups = {}
+        for row, locale in enumerate(self.locale_choice.pick_many(n, _unseeded_random)):
+            groups.setdefault(locale, []).append(row)
+        return groups
+
+    def _generate_for(self, locale: str, fill: Callable[[], Any]) -> Any:
+        previous_locale = record_locale.locale
+        record_locale.locale = locale
+        try:
+            return fill()
+        finally:
+            record_locale.locale = previous_locale
+
+    def generate_column(self, n: int) -> list:
+        if self.stream is not None:
+            return PlanNode.generate_column(self, n)
+        column = [None] * n
+        for locale, rows in self._locale_groups(n).items():
+            for row, value in zip(rows, self._generate_for(locale, lambda: self.value_node.generate_column(len(rows)))):
+                column[row] = value
+        return column
+
+    def column_layout(self, prefix: str = "") -> tuple:
+        return self.value_node.column_layout(prefix)
+
+    def generate_columns(self, n: int, prefix: str = "") -> dict:
+        columns = {}
+        for locale, rows in self._locale_groups(n).items():
+            group_columns = self._generate_for(locale, lambda: self.value_node.generate_columns(len(rows), prefix))
+            for path, group_column in group_columns.items():
+                column = columns.setdefault(path, [None] * n)
+                for row, value in zip(rows, group_column.tolist() if hasattr(group_column, 'tolist') else group_column):
+                    column[row] = value
+        return columns
+
+    def seeded(self, context: StreamContext, slots: Iterator[int]) -> PlanNode:
+        stream = SubStream(context, next(slots))
+        return RecordLocaleNode(self.value_node.seeded(context, slots), self.locale_choice, stream)
+
+
+@dataclass(frozen=True, eq=False)
+class ClassPlan:
+    """
+    Compiled generation plan for a class at a given parent path.
+    field_types and ruled_fields are kept so per-call kwargs can be bound without re-introspecting the class;
+    dependencies lists the class itself and every nested class whose plan is embedded in root.
+    """
+    target_class: type
+    path: Tuple[Any, ...]  # field names, and list item positions as ints
+    field_types: Tuple[Tuple[str, Any], ...]
+    root: ObjectNode
+    ruled_fields: frozenset
+    dependencies: frozenset
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledJsonSchema:
+    """
+    A JSON sample plus rules compiled into a tree of node generators (see Utility.CompileJsonSchema).
+    Immutable and picklable; generate() returns one record as a dict.
+    """
+    root: ObjectNode
+
+    def generate(self) -> dict:
+        return self.root.generate()
+
+
+def iter_plan_nodes(node: PlanNode) -> Iterator[PlanNode]:
+    """Yields every node of a plan tree, depth-first in generation order."""
+    yield node
+    if isinstance(node, ObjectNode):
+        children = tuple(child for _, child in node.fields)
+    elif isinstance(node, ListNode):
+        children = node.item_nodes
+    elif isinstance(node, DictNode):
+        children = tuple(child for pair in zip(node.key_nodes, node.value_nodes) for child in pair)
+    elif isinstance(node, (NullableNode, UniqueNode, RecordLocaleNode)):
+        children = (node.value_node,)
+    else:
+        children = ()
+    for child in children:
+        yield from iter_plan_nodes(child)
+
+
+def localize_plan(node: PlanNode, localize_call: Callable[[Callable[[], Any]], Optional[Callable[[], Any]]]) -> PlanNode:
+    """
+    Returns a copy of a plan in which every leaf call that localize_call maps to a localized call
+    (see Utility.EnableLocales) is replaced by it; other nodes are kept as they are.
+    """
+    if isinstance(node, ValueNode):
+        localized_call = localize_call(node.call)
+        return node if localized_call is None else ValueNode(localized_call)
+    if isinstance(node, ObjectNode):
+        return ObjectNode(tuple((name, localize_plan(child, localize_call)) for name, child in node.fields))
+    if isinstance(node, ListNode):
+        return replace(node, item_nodes=tuple(localize_plan(item, localize_call) for item in node.item_nodes))
+    if isinstance(node, DictNode):
+        return replace(node, key_nodes=tuple(localize_plan(key, localize_call) for key in node.key_nodes),
+                       value_nodes=tuple(localize_plan(value, localize_call) for value in node.value_nodes))
+    if isinstance(node, (NullableNode, UniqueNode, RecordLocaleNode)):
+        return replace(node, value_node=localize_plan(node.value_node, localize_call))
+    return node
+
+
+def renew_unique_constraints(node: PlanNode) -> PlanNode:
+    """
+    Returns a copy of a plan in which every UniqueNode dedups against a renewed constraint, so a
+    run never sees the values of earlier runs of the same (cached) plan. Subtrees without unique
+    rules are shared with the original plan.
+    """
+    if isinstance(node, UniqueNode):
+        return UniqueNode(renew_unique_constraints(node.value_node), node.constraint.renewed(), node.context)
+    if isinstance(node, ObjectNode):
+        fields = tuple((name, renew_unique_constraints(child)) for name, child in node.fields)
+        return node if all(new is old for (_, new), (_, old) in zip(fields, node.fields)) else ObjectNode(fields)
+    if isinstance(node, ListNode):
+        item_nodes = tuple(renew_unique_constraints(item) for item in node.item_nodes)
+        return node if all(map(operator.is_, item_nodes, node.item_nodes)) else replace(node, item_nodes=item_nodes)
+    if isinstance(node, DictNode):
+        key_nodes = tuple(renew_unique_constraints(key) for key in node.key_nodes)
+        value_nodes = tuple(renew_unique_constraints(value) for value in node.value_nodes)
+        if all(map(operator.is_, key_nodes + value_nodes, node.key_nodes + node.value_nodes)):
+            return node
+        return replace(node, key_nodes=key_nodes, value_nodes=value_nodes)
+    if isinstance(node, (NullableNode, RecordLocaleNode)):
+        value_node = renew_unique_constraints(node.value_node)
+        return node if value_node is node.value_node else replace(node, value_node=value_node)
+    return node
+
+
+def _unwrapped(node: PlanNode) -> PlanNode:
+    # Nullable/unique/record-locale/timing wrappers generate whatever their value_node generates
+    while hasattr(node, "value_node"):
+        node = node.value_node
+    return node
+
+
+def record_schema(node: PlanNode, name: str = "Record") -> Optional[RecordSchema]:
+    """
+    The RecordSchema converting the records generated by node to compact records, with nested
+    objects and lists of objects converted as well (None when node does not generate objects).
+    A list is only converted when all of its item positions generate the same shape.
+    """
+    node = _unwrapped(node)
+    if not isinstance(node, ObjectNode):
+        return None
+    nested = []
+    for position, (field_name, child) in enumerate(node.fields):
+        child = _unwrapped(child)
+        if isinstance(child, ListNode):
+            item_schemas = [record_schema(item, f"{name}.{field_name}") for item in child.item_nodes]
+            if item_schemas and item_schemas[0] is not None and all(
+                    schema is not None and schema.signature == item_schemas[0].signature for schema in item_schemas):
+                nested.append((position, item_schemas[0], True))
+        else:
+            schema = record_schema(child, f"{name}.{field_name}")
+            if schema is not None:
+                nested.append((position, schema, False))
+    return RecordSchema(name, tuple(field_name for field_name, _ in node.fields), tuple(nested))
+
+
+class RecordGenerator:
+    """
+    Produces record #index of a dataset from a plan root.
+
+    Without a seed, the index is ignored. With a seed, the plan is copied once with a SubStream
+    per random node (field generators, rules, list lengths, choices), and each stream is derived
+    from (seed, index, slot). Record #index is therefore the same no matter which process, shard
+    or worker count produces it, and one field's draws never shift another field's values.
+    """
+    def __init__(self, root: PlanNode, seed: Optional[Any] = None):
+        self.root = root
+        self.seed = seed
+        if seed is None:
+            self._context = None
+            self._generate = root.generate
+        else:
+            self._context = StreamContext(seed)
+            self._generate = root.seeded(self._context, itertools.count()).generate
+
+    def __call__(self, index: int) -> dict:
+        if self._context is not None:
+            self._context.begin_record(index)
+        return self._generate()
+
+    def generate_batch(self, start: int, stop: int) -> list:
+        """
+        Generates records #start..#stop-1. Unseeded plans are filled column by column with the
+        batch primitives; seeded plans stay record by record so every record remains addressable.
+        """
+        if self._context is None:
+            return self.root.generate_column(stop - start)
+        return [self(index) for index in range(start, stop)]
+
+    def generate_column_batch(self, start: int, stop: int) -> ColumnarBatch:
+        """Generates records #start..#stop-1 as a ColumnarBatch (the root must be an ObjectNode)."""
+        layout = self.root.column_layout()
+        if self._context is None:
+            return ColumnarBatch(self.root.generate_columns(stop - start), layout, stop - start)
+        return ColumnarBatch.from_rows(self.generate_batch(start, stop), layout)
+
+    def __reduce__(self):
+        return (RecordGenerator, (self.root, self.seed))
@@ -0,0 +1,148 @@
+# utils/generator_dispatch.py
+import inspect
+import importlib
+import functools
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from utils.diagnostics import diagnostics, ERROR
+from utils.lazy_imports import LazyFaker, is_faker_instance
+
+# (generator, kwargs key set) -> (names of the kwargs the generator accepts, or None when it takes **kwargs
+# or has no introspectable signature; names of the rejected kwargs to warn about)
+_dispatch_cache: Dict[Tuple[Any, FrozenSet[str]], Tuple[Optional[FrozenSet[str]], FrozenSet[str]]] = {}
+_MAX_DISPATCH_CACHE_SIZE = 4096
+
+# name -> shared generator owner (SyntheticDataGenerator or Faker); bound methods of these objects are
+# pickled by reference and re-resolved against the unpickling process's own instance
+_shared_instances: Dict[str, Any] = {}
+
+
+def _return_constant(value: Any) -> Any:
+    return value
+
+
+def _resolve_accepted_params(generator_func: Callable, kwarg_names: FrozenSet[str]) -> Tuple[Optional[FrozenSet[str]], FrozenSet[str]]:
+    """Inspects the generator signature once and decides which kwargs it will receive, and which to warn about."""
+    try:
+        parameters = inspect.signature(generator_func).parameters.values()
+    except (TypeError, ValueError):
+        # No introspectable signature (some builtins): pass the kwargs through unchanged
+        return None, frozenset()
+
+    keyword_params = frozenset(p.name for p in parameters if p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY))
+    is_faker_method = hasattr(generator_func, '__self__') and is_faker_instance(generator_func.__self__)
+    if is_faker_method:
+        # Faker methods have fixed signatures: only pass what they explicitly declare, silently
+        return keyword_params & kwarg_names, frozenset()
+
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return None, frozenset()
+
+    accepted_params = keyword_params & kwarg_names
+    unaccepted = kwarg_names - accepted_params
+    # Suppress this warning for 'choices' which is handled before calling generator
+    if any(k.startswith("field_name_") and 'choices' in kwarg_names for k in unaccepted):
+        unaccepted = frozenset()
+    return accepted_params, unaccepted
+
+
+class BoundGeneratorCall:
+    """
+    Zero-argument callable invoking a generator with kwargs already checked against its signature
+    (see bind_generator), so the call never changes after binding and can be shared between plans.
+    Any error, a TypeError included, yields None: the call is not retried without its kwargs, since
+    those already match the signature. Occurrences are counted by the diagnostics collector, which
+    only emits the first one and summarizes the rest at the end of the run.
+    """
+    __slots__ = ("generator", "kwargs", "field_name")
+
+    def __init__(self, generator: Callable, kwargs: Dict[str, Any], field_name: str):
+        self.generator = generator
+        self.kwargs = kwargs
+        self.field_name = field_name
+
+    def __call__(self) -> Any:
+        try:
+            return self.generator(**self.kwargs)
+        except Exception as e:
+            return self._report_error(e)
+
+    def _report_error(self, error: Exception) -> None:
+        diagnostics.report("generator_error", self.field_name,
+                           lambda: f"Unexpected error calling generator '{getattr(self.generator, '__name__', self.generator)}' for field '{self.field_name}': {error}. Returning None.",
+                           ERROR)
+        return None
+
+    def __reduce__(self):
+        shared_reference = _shared_method_reference(self.generator)
+        if shared_reference is not None:
+            return (_rebind_shared_method, (*shared_reference, self.kwargs, self.field_name))
+        return (BoundGeneratorCall, (self.generator, self.kwargs, self.field_name))
+
+
+def register_shared_instance(name: str, instance: Any) -> None:
+    _shared_instances[name] = instance
+
+
+def _shared_method_reference(generator: Any) -> Optional[Tuple[str, str]]:
+    owner = getattr(generator, '__self__', None)
+    method_name = getattr(generator, '__name__', None)
+    if owner is None or method_name is None:
+        return None
+    # Faker provider methods are bound to a provider whose .generator is one of the Faker's factories
+    owner_factory = getattr(owner, 'generator', None)
+    for name, instance in _shared_instances.items():
+        if isinstance(instance, LazyFaker):
+            # A Faker that was never built cannot own the method
+            if instance.is_built and owner_factory in instance.get_faker().factories:
+                return name, method_name
+        elif owner is instance or (is_faker_instance(instance) and owner_factory in instance.factories):
+            return name, method_name
+    return None
+
+
+def _rebind_shared_method(instance_name: str, method_name: str, kwargs: Dict[str, Any], field_name: str) -> "BoundGeneratorCall":
+    if instance_name not in _shared_instances:
+        # Importing the Utility module registers its shared instances
+        importlib.import_module("utils.utility")
+    return BoundGeneratorCall(getattr(_shared_instances[instance_name], method_name), kwargs, field_name)
+
+
+def bind_generator(generator_func: Any, specific_kwargs: Dict[str, Any], field_name: str) -> Callable[[], Any]:
+    """
+    Returns a zero-argument callable producing one value from generator_func.
+
+    The signature inspection and the unaccepted-kwargs decision are computed once per
+    (generator, kwargs key set) and cached, so binding is a dict lookup after the first time.
+    Kwargs the signature rejects are dropped here and reported for every field binding them.
+    """
+    if not callable(generator_func):
+        return functools.partial(_return_constant, generator_func)
+    if not specific_kwargs:
+        return BoundGeneratorCall(generator_func, {}, field_name)
+
+    kwarg_names = frozenset(specific_kwargs)
+    try:
+        cache_key = (generator_func, kwarg_names)
+        accepted_params, unaccepted = _dispatch_cache[cache_key]
+    except TypeError:
+        # Unhashable generator: resolve without caching
+        accepted_params, unaccepted = _resolve_accepted_params(generator_func, kwarg_names)
+    except KeyError:
+        accepted_params, unaccepted = _resolve_accepted_params(generator_func, kwarg_names)
+        if len(_dispatch_cache) >= _MAX_DISPATCH_CACHE_SIZE:
+            _dispatch_cache.clear()
+        _dispatch_cache[cache_key] = (accepted_params, unaccepted)
+
+    if unaccepted:
+        diagnostics.report("unaccepted_kwargs", field_name, f"Warning: Unaccepted kwargs {sorted(unaccepted)} for field '{field_name}' in '{getattr(generator_func, '__name__', generator_func)}'. Ignoring.")
+
+    if accepted_params is None:
+        filtered_kwargs = dict(specific_kwargs)
+    else:
+        filtered_kwargs = {k: v for k, v in specific_kwargs.items() if k in accepted_params}
+    return BoundGeneratorCall(generator_func, filtered_kwargs, field_name)
+
+
+def clear_dispatch_cache() -> None:
+    _dispatch_cache.clear()
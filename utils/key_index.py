@@ -0,0 +1,100 @@
+# utils/key_index.py
+import uuid
+import hashlib
+import random
+from array import array
+from typing import Any, Iterable, List, Optional
+
+
+class KeyIndex:
+    """
+    A compact, append-only index of the primary keys of a generated parent entity.
+
+    Keys are packed by type instead of being kept as Python objects: UUIDs as 16 raw bytes each,
+    ints in an array('q'), strings as one UTF-8 buffer plus an offsets array ('object' keys, the
+    fallback, are kept in a list). Any key is read back by position, so sampling a foreign key is O(1).
+    """
+    _UUID, _INT, _STR, _OBJECT = "uuid", "int", "str", "object"
+
+    def __init__(self, name: Optional[str] = None, keys: Optional[Iterable[Any]] = None):
+        self.name = name
+        self.kind: Optional[str] = None
+        self._data: Any = None
+        self._offsets = array("Q", [0])
+        self._count = 0
+        if keys is not None:
+            self.extend(keys)
+
+    def _initialize(self, key: Any) -> None:
+        if isinstance(key, uuid.UUID):
+            self.kind, self._data = self._UUID, bytearray()
+        elif isinstance(key, int) and not isinstance(key, bool) and -(1 << 63) <= key < (1 << 63):
+            self.kind, self._data = self._INT, array("q")
+        elif isinstance(key, str):
+            self.kind, self._data = self._STR, bytearray()
+        else:
+            self.kind, self._data = self._OBJECT, []
+
+    def add(self, key: Any) -> None:
+        if self.kind is None:
+            self._initialize(key)
+        try:
+            if self.kind == self._UUID:
+                self._data += key.bytes
+            elif self.kind == self._STR:
+                self._data += key.encode("utf-8")
+                self._offsets.append(len(self._data))
+            else:
+                self._data.append(key)
+        except (AttributeError, TypeError, OverflowError):
+            raise TypeError(f"Key {key!r} does not match the {self.kind} keys of index '{self.name}'.") from None
+        self._count += 1
+
+    def extend(self, keys: Iterable[Any]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> Any:
+        if not 0 <= position < self._count:
+            raise IndexError("KeyIndex position out of range")
+        if self.kind == self._UUID:
+            return uuid.UUID(bytes=bytes(self._data[16 * position:16 * position + 16]))
+        if self.kind == self._STR:
+            return self._data[self._offsets[position]:self._offsets[position + 1]].decode("utf-8")
+        return self._data[position]
+
+    def sample(self, rng: random.Random) -> Any:
+        if not self._count:
+            raise ValueError(f"Key index '{self.name}' is empty: generate the parent entity before its children.")
+        return self[int(rng.random() * self._count)]
+
+    def sample_batch(self, n: int, rng: random.Random) -> List[Any]:
+        if not self._count:
+            raise ValueError(f"Key index '{self.name}' is empty: generate the parent entity before its children.")
+        count = self._count
+        return [self[int(rng.random() * count)] for _ in range(n)]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the packed keys."""
+        if self.kind in (self._UUID, self._STR):
+            return len(self._data) + self._offsets.itemsize * len(self._offsets)
+        if self.kind == self._INT:
+            return self._data.itemsize * len(self._data)
+        return 0 if self._data is None else 8 * len(self._data)
+
+    def digest(self) -> str:
+        """SHA-256 of the indexed keys, in order (identifies the index's content, e.g. in dataset fingerprints)."""
+        content = hashlib.sha256(f"{self.kind}:{self._count}:".encode("utf-8"))
+        if self.kind in (self._UUID, self._STR, self._INT):
+            content.update(bytes(self._data))
+            if self.kind == self._STR:
+                content.update(self._offsets.tobytes())
+        elif self._data is not None:
+            content.update(repr(self._data).encode("utf-8"))
+        return content.hexdigest()
+
+    def __repr__(self) -> str:
+        return f"KeyIndex(name={self.name!r}, kind={self.kind!r}, keys={self._count})"
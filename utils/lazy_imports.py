@@ -0,0 +1,70 @@
+# utils/lazy_imports.py
+import sys
+import random
+import functools
+from typing import Any, Optional
+
+
+@functools.lru_cache(maxsize=None)
+def optional_numpy() -> Optional[Any]:
+    """NumPy, imported on first use; None when it is not installed (batch methods then fall back to per-value draws)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def is_faker_instance(value: Any) -> bool:
+    # Nothing can be a Faker while faker has not been imported, so this never imports it
+    faker_module = sys.modules.get("faker")
+    return faker_module is not None and isinstance(value, faker_module.Faker)
+
+
+def is_faker_generator(value: Any) -> bool:
+    generator_module = sys.modules.get("faker.generator")
+    return generator_module is not None and isinstance(value, generator_module.Generator)
+
+
+class LazyFaker:
+    """
+    Stands in for faker.Faker(locale): faker is only imported, and the Faker built, on the first
+    attribute access (fake.city, fake.random, ...), which is then delegated to it. Assigning
+    .random before that is remembered and applied when the Faker is built.
+    """
+    __slots__ = ("locale", "random_source", "_faker")
+
+    def __init__(self, locale: str = 'en_US', random_source: Optional[random.Random] = None):
+        object.__setattr__(self, "locale", locale)
+        object.__setattr__(self, "random_source", random_source)
+        object.__setattr__(self, "_faker", None)
+
+    @property
+    def is_built(self) -> bool:
+        return self._faker is not None
+
+    def get_faker(self) -> Any:
+        if self._faker is None:
+            from faker import Faker
+            fake = Faker(self.locale)
+            if self.random_source is not None:
+                fake.random = self.random_source
+            object.__setattr__(self, "_faker", fake)
+        return self._faker
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)  # copy/pickle probing special methods must not build the Faker
+        return getattr(self.get_faker(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "random" and self._faker is None:
+            object.__setattr__(self, "random_source", value)
+        else:
+            setattr(self.get_faker(), name, value)
+
+    def __reduce__(self):
+        return (LazyFaker, (self.locale, self.random_source))
+
+    def __repr__(self) -> str:
+        return f"LazyFaker(locale={self.locale!r}, built={self.is_built})"
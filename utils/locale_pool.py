@@ -0,0 +1,189 @@
+# utils/locale_pool.py
+import bisect
+import itertools
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from utils.rng import CounterRandom
+from utils.synthetic_data_generator import SyntheticDataGenerator
+from utils.diagnostics import diagnostics, ERROR
+
+DEFAULT_LOCALE = 'en_US'
+
+
+class LocaleChoice:
+    """A fixed locale, or a weighted random choice between locales (uniform for a plain list)."""
+    __slots__ = ("locales", "cumulative_weights")
+
+    def __init__(self, locales: Sequence[str], weights: Optional[Sequence[float]] = None):
+        if not locales:
+            raise ValueError("At least one locale is required.")
+        if weights is not None and (len(weights) != len(locales) or any(weight <= 0 for weight in weights)):
+            raise ValueError("Locale weights must be positive, one per locale.")
+        self.locales = tuple(locales)
+        self.cumulative_weights = tuple(itertools.accumulate(weights if weights is not None else [1] * len(locales)))
+
+    @classmethod
+    def from_option(cls, option: Union[str, Sequence[str], Dict[str, float], "LocaleChoice"]) -> "LocaleChoice":
+        """Builds a choice from a locale ('de_DE'), a list of locales or a {locale: weight} dictionary."""
+        if isinstance(option, LocaleChoice):
+            return option
+        if isinstance(option, str):
+            choice = cls((option,))
+        elif isinstance(option, dict):
+            choice = cls(tuple(option), tuple(option.values()))
+        elif isinstance(option, (list, tuple)):
+            choice = cls(tuple(option))
+        else:
+            raise TypeError("A locale option must be a locale, a list of locales or a {locale: weight} dictionary.")
+        from faker.config import AVAILABLE_LOCALES
+        unknown = [locale for locale in choice.locales if locale not in AVAILABLE_LOCALES]
+        if unknown:
+            raise ValueError(f"Unknown Faker locale(s) {unknown}.")
+        return choice
+
+    def pick(self, rng: random.Random) -> str:
+        if len(self.locales) == 1:
+            return self.locales[0]
+        return self.locales[bisect.bisect(self.cumulative_weights, rng.random() * self.cumulative_weights[-1])]
+
+    def pick_many(self, n: int, rng: random.Random) -> List[str]:
+        if len(self.locales) == 1:
+            return [self.locales[0]] * n
+        return rng.choices(self.locales, cum_weights=self.cumulative_weights, k=n)
+
+    def __reduce__(self):
+        weights = [b - a for a, b in zip((0,) + self.cumulative_weights[:-1], self.cumulative_weights)]
+        return (LocaleChoice, (self.locales, weights))
+
+
+class LocaleGeneratorPool:
+    """
+    A bounded pool of per-locale SyntheticDataGenerators (each with its own lazily built Faker),
+    evicting the least recently used locale once more than max_size are alive.
+
+    Every pooled generator draws from the pool's single random stream, so a localized call has one
+    random source to re-seed in seeded runs, whichever locale it ends up using. Nothing else keeps
+    a reference to a pooled generator: an evicted locale is freed, and rebuilt if it is used again.
+    """
+    def __init__(self, max_size: int = 8, default_locale: str = DEFAULT_LOCALE):
+        self._generators: "OrderedDict[str, SyntheticDataGenerator]" = OrderedDict()
+        self.default_locale = default_locale
+        self.random = CounterRandom()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resize(max_size)
+
+    def resize(self, max_size: int) -> None:
+        if not isinstance(max_size, int) or max_size < 1:
+            raise ValueError("max_size must be an integer greater than or equal to 1.")
+        self.max_size = max_size
+        self._evict()
+
+    def get(self, locale: str) -> SyntheticDataGenerator:
+        generators = self._generators
+        generator = generators.get(locale)
+        if generator is not None:
+            generators.move_to_end(locale)
+            self.hits += 1
+            return generator
+        self.misses += 1
+        generator = SyntheticDataGenerator(locale)
+        generator.random = generator.fake.random = self.random
+        generators[locale] = generator
+        self._evict()
+        return generator
+
+    def _evict(self) -> None:
+        while len(self._generators) > self.max_size:
+            self._generators.popitem(last=False)
+            self.evictions += 1
+
+    def warm_up(self, locales: Iterable[str]) -> None:
+        """Builds the Faker instances of `locales` ahead of generation (the last max_size of them stay pooled)."""
+        for locale in locales:
+            self.get(locale).fake.get_faker()
+
+    def clear(self) -> None:
+        self._generators.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"locales": list(self._generators), "max_size": self.max_size,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __reduce__(self):
+        # The process-wide pool is pickled by reference: each worker process uses (and fills) its own
+        if self is default_pool:
+            return (_default_pool_of_size, (self.max_size,))
+        return (LocaleGeneratorPool, (self.max_size, self.default_locale))
+
+
+class _RecordLocale:
+    """Locale chosen for the record being generated, set by RecordLocaleNode (None outside of one)."""
+    __slots__ = ("locale",)
+
+    def __init__(self):
+        self.locale: Optional[str] = None
+
+
+record_locale = _RecordLocale()
+
+
+class LocalizedCall:
+    """
+    Zero-argument call of a SyntheticDataGenerator method ("generator") or Faker provider ("faker")
+    on the pooled generator of a locale: the rule's own locale choice if it has one, otherwise
+    the current record's locale (see RecordLocaleNode), otherwise the pool's default locale.
+    Like BoundGeneratorCall, errors are reported to the diagnostics collector and yield None.
+    """
+    __slots__ = ("method_name", "owner", "kwargs", "field_name", "pool", "locale_choice")
+
+    def __init__(self, method_name: str, owner: str, kwargs: Dict[str, Any], field_name: str,
+                 pool: LocaleGeneratorPool, locale_choice: Optional[LocaleChoice] = None):
+        self.method_name = method_name
+        self.owner = owner
+        self.kwargs = kwargs
+        self.field_name = field_name
+        self.pool = pool
+        self.locale_choice = locale_choice
+
+    def __call__(self) -> Any:
+        if self.locale_choice is not None:
+            locale = self.locale_choice.pick(self.pool.random)
+        else:
+            locale = record_locale.locale or self.pool.default_locale
+        generator = self.pool.get(locale)
+        try:
+            owner = generator if self.owner == "generator" else generator.fake
+            return getattr(owner, self.method_name)(**self.kwargs)
+        except Exception as error:
+            # The except variable is unbound once the block ends: capture its text, not the variable
+            error_text = str(error)
+            diagnostics.report("generator_error", self.field_name,
+                               lambda: f"Unexpected error calling generator '{self.method_name}' ({locale}) for field '{self.field_name}': {error_text}. Returning None.",
+                               ERROR)
+            return None
+
+    def batch_counterpart(self) -> Optional[Callable[[int], Any]]:
+        """generate_<name>_batch of the current record locale's generator, for record-locale generator methods that have one."""
+        if self.owner != "generator" or self.locale_choice is not None or not hasattr(SyntheticDataGenerator, f"{self.method_name}_batch"):
+            return None
+        return self._generate_batch
+
+    def _generate_batch(self, n: int) -> Any:
+        generator = self.pool.get(record_locale.locale or self.pool.default_locale)
+        return getattr(generator, f"{self.method_name}_batch")(n, **self.kwargs)
+
+    def __reduce__(self):
+        return (LocalizedCall, (self.method_name, self.owner, self.kwargs, self.field_name, self.pool, self.locale_choice))
+
+
+# Process-wide pool used by locale rules and Utility.EnableLocales
+default_pool = LocaleGeneratorPool()
+
+
+def _default_pool_of_size(max_size: int) -> LocaleGeneratorPool:
+    default_pool.resize(max_size)
+    return default_pool
@@ -0,0 +1,137 @@
+# utils/parallel_generation.py
+import os
+import random
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.generation_plan import RecordGenerator, UniqueNode, ValueNode, iter_plan_nodes
+from utils.value_pools import ValuePool
+from utils.record_writers import NDJSONWriter
+from utils.diagnostics import diagnostics, INFO
+
+# Set in each worker process by _init_worker
+_worker_record_generator: Optional[RecordGenerator] = None
+
+
+def _init_worker(record_generator: RecordGenerator) -> None:
+    global _worker_record_generator
+    _worker_record_generator = record_generator
+
+
+def _generate_shard(start: int, stop: int) -> List[Dict[str, Any]]:
+    return _worker_record_generator.generate_batch(start, stop)
+
+
+def _write_shard_with(record_generator: RecordGenerator, start: int, stop: int, path: str) -> Tuple[str, int]:
+    # Write to a temporary file first so a shard file only ever exists complete
+    temp_path = f"{path}.tmp"
+    with NDJSONWriter(temp_path) as writer:
+        writer.write_many(record_generator.generate_batch(start, stop))
+    os.replace(temp_path, path)
+    return path, stop - start
+
+
+def _write_shard(start: int, stop: int, path: str) -> Tuple[str, int]:
+    return _write_shard_with(_worker_record_generator, start, stop, path)
+
+
+def _order_dependent_reason(record_generator: RecordGenerator) -> Optional[str]:
+    """Why records of this plan depend on the records generated before them, if they do."""
+    nodes = list(iter_plan_nodes(record_generator.root))
+    if any(isinstance(node, UniqueNode) for node in nodes):
+        return "unique rules"
+    if any(isinstance(node, ValueNode) and isinstance(node.call, ValuePool) and node.call.refresh_interval is not None for node in nodes):
+        return "refreshing value pools"
+    return None
+
+
+class ParallelGenerationEngine:
+    """
+    Splits a record count into fixed-size shards and generates them in a process pool.
+
+    Each worker unpickles its own copy of the compiled plan, bound to the worker's own
+    SyntheticDataGenerator/Faker instances. Records are addressed by index and seeded from
+    (seed, index), so the output is identical to a serial run with the same seed regardless of
+    the number of workers or the shard size. Results are returned in index order, with at most
+    2 * workers shards in flight. Plans whose records depend on the records before them (unique
+    rules dedup against every earlier value, refreshing value pools turn over as they are drawn
+    from) are generated serially in the calling process instead.
+    """
+    def __init__(self, workers: Optional[int] = None, shard_size: int = 10000, mp_context: Optional[str] = None):
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError("workers must be an integer greater than or equal to 1.")
+        if not isinstance(shard_size, int) or shard_size < 1:
+            raise ValueError("shard_size must be an integer greater than or equal to 1.")
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.mp_context = mp_context
+
+    def _shards(self, count: int) -> List[Tuple[int, int]]:
+        return [(start, min(start + self.shard_size, count)) for start in range(0, count, self.shard_size)]
+
+    @staticmethod
+    def _ensure_seeded(record_generator: RecordGenerator) -> RecordGenerator:
+        # Forked workers would otherwise replay the parent's random state and emit duplicate shards
+        if record_generator.seed is None:
+            return RecordGenerator(record_generator.root, random.SystemRandom().getrandbits(64))
+        return record_generator
+
+    def _workers_for(self, record_generator: RecordGenerator) -> int:
+        if self.workers == 1:
+            return 1
+        reason = _order_dependent_reason(record_generator)
+        if reason is None:
+            return self.workers
+        diagnostics.report("serial_fallback", "*", f"Info: The plan uses {reason}, which workers cannot share. Generating serially.", INFO)
+        return 1
+
+    def _run_ordered(self, record_generator: RecordGenerator, tasks: List[Tuple[Any, ...]], task_func) -> Iterator[Any]:
+        # Imported here: multiprocessing is only needed once a pool is actually started
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        mp_context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(record_generator,)) as executor:
+            pending_tasks = iter(tasks)
+            in_flight = deque()
+            for task in pending_tasks:
+                in_flight.append(executor.submit(task_func, *task))
+                if len(in_flight) >= 2 * self.workers:
+                    break
+            while in_flight:
+                result = in_flight.popleft().result()
+                next_task = next(pending_tasks, None)
+                if next_task is not None:
+                    in_flight.append(executor.submit(task_func, *next_task))
+                yield result
+
+    def stream(self, record_generator: RecordGenerator, count: int) -> Iterator[Dict[str, Any]]:
+        """Yields `count` records in index order, generated by the worker pool."""
+        record_generator = self._ensure_seeded(record_generator)
+        if self._workers_for(record_generator) == 1:
+            for index in range(count):
+                yield record_generator(index)
+            return
+        for shard_records in self._run_ordered(record_generator, self._shards(count), _generate_shard):
+            yield from shard_records
+
+    def stream_shards(self, record_generator: RecordGenerator, count: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the records of each shard as one list, in index order."""
+        record_generator = self._ensure_seeded(record_generator)
+        if self._workers_for(record_generator) == 1:
+            for start, stop in self._shards(count):
+                yield record_generator.generate_batch(start, stop)
+            return
+        yield from self._run_ordered(record_generator, self._shards(count), _generate_shard)
+
+    def write_shards(self, record_generator: RecordGenerator, count: int, output_dir: str, prefix: str = "shard") -> List[str]:
+        """Writes one NDJSON file per shard into output_dir and returns their paths in index order."""
+        record_generator = self._ensure_seeded(record_generator)
+        os.makedirs(output_dir, exist_ok=True)
+        tasks = [
+            (start, stop, os.path.join(output_dir, f"{prefix}-{shard_index:05d}.ndjson"))
+            for shard_index, (start, stop) in enumerate(self._shards(count))
+        ]
+        if self._workers_for(record_generator) == 1:
+            return [_write_shard_with(record_generator, *task)[0] for task in tasks]
+        return [path for path, _ in self._run_ordered(record_generator, tasks, _write_shard)]
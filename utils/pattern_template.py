@@ -0,0 +1,86 @@
+# utils/pattern_template.py
+import random
+import itertools
+import functools
+from typing import Any, List, Optional, Tuple
+
+from utils.lazy_imports import optional_numpy
+
+DIGIT_SLOT = '#'
+LETTER_SLOT = '@'
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Longest digit run drawn as one int64 by NumPy (10**18 < 2**63)
+_MAX_NUMPY_DIGITS = 18
+
+
+class PatternTemplate:
+    """
+    A generate_str pattern compiled once into literal text and runs of random slots
+    ('#' is a digit, '@' an ASCII letter, anything else is kept as is).
+
+    Each run of k '#' is filled by a single zero-padded randrange(10**k) draw and each run of
+    '@' by a single choices() call, then everything is assembled with one str.format call.
+    """
+    __slots__ = ("pattern", "runs", "format_string")
+
+    def __init__(self, pattern: str):
+        runs: List[Tuple[str, int]] = []
+        parts: List[str] = []
+        for char, group in itertools.groupby(pattern):
+            run_length = len(list(group))
+            if char == DIGIT_SLOT:
+                runs.append((DIGIT_SLOT, run_length))
+                parts.append(f"{{:0{run_length}d}}")
+            elif char == LETTER_SLOT:
+                runs.append((LETTER_SLOT, run_length))
+                parts.append("{}")
+            else:
+                parts.append((char * run_length).replace("{", "{{").replace("}", "}}"))
+        self.pattern = pattern
+        self.runs = tuple(runs)
+        self.format_string = "".join(parts)
+
+    def fill(self, rng: random.Random) -> str:
+        return self.format_string.format(*[
+            rng.randrange(10 ** run_length) if kind == DIGIT_SLOT else "".join(rng.choices(LETTERS, k=run_length))
+            for kind, run_length in self.runs
+        ])
+
+    def fill_batch(self, n: int, rng: random.Random, np_generator: Optional[Any] = None) -> List[str]:
+        """Fills n strings; with a NumPy generator, each run is drawn for all n rows in one call."""
+        if not self.runs:
+            return [self.format_string.format()] * n
+        columns = [self._run_column(kind, run_length, n, rng, np_generator) for kind, run_length in self.runs]
+        format_row = self.format_string.format
+        return [format_row(*row) for row in zip(*columns)]
+
+    @staticmethod
+    def _run_column(kind: str, run_length: int, n: int, rng: random.Random, np_generator: Optional[Any]) -> list:
+        if kind == DIGIT_SLOT:
+            if np_generator is not None and run_length <= _MAX_NUMPY_DIGITS:
+                return np_generator.integers(0, 10 ** run_length, size=n).tolist()
+            bound = 10 ** run_length
+            return [rng.randrange(bound) for _ in range(n)]
+        if np_generator is not None:
+            return letter_strings(np_generator, n, run_length)
+        return ["".join(rng.choices(LETTERS, k=run_length)) for _ in range(n)]
+
+
+def letter_strings(np_generator: Any, n: int, length: int, alphabet: Optional[Any] = None) -> List[str]:
+    """Returns n random strings of `length` characters from alphabet (default LETTERS) in one NumPy draw."""
+    alphabet = _letter_array() if alphabet is None else alphabet
+    if length == 0:
+        return [""] * n
+    chars = alphabet[np_generator.integers(0, len(alphabet), size=(n, length))]
+    # A contiguous (n, length) array of 1-character strings reinterpreted as n strings of `length` characters
+    return chars.view(f"<U{length}").ravel().tolist()
+
+
+@functools.lru_cache(maxsize=None)
+def _letter_array() -> Any:
+    return optional_numpy().array(list(LETTERS))
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> PatternTemplate:
+    return PatternTemplate(pattern)
@@ -0,0 +1,239 @@
+# utils/record_writers.py
+import csv
+import itertools
+import json
+import uuid
+import datetime
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Tuple, Union
+
+from utils.generated_test_data import GeneratedTestData, ColumnarBatch, CompactRecord
+
+_DEFAULT_BUFFER_SIZE = 1 << 20
+# Records serialized per write() call when writing an arbitrary iterable
+_WRITE_CHUNK_SIZE = 10000
+
+
+def json_default(obj: Any) -> Any:
+    """json `default` hook for the non-JSON types generators produce (dates, datetimes, UUIDs)."""
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class CustomJSONEncoder(json.JSONEncoder):
+    """JSONEncoder understanding dates, datetimes and UUIDs (for json.dumps(..., cls=CustomJSONEncoder))."""
+    def default(self, obj):
+        try:
+            return json_default(obj)
+        except TypeError:
+            return json.JSONEncoder.default(self, obj)
+
+
+# One shared, compact encoder for containers and unexpected values: never built per record
+_fallback_encoder = json.JSONEncoder(default=json_default, separators=(",", ":"), check_circular=False)
+
+
+def _json_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _json_null(value: None) -> str:
+    return "null"
+
+
+def _json_float(value: float) -> str:
+    # float.__repr__ is what json uses too; nan/inf keep the encoder's spelling
+    return float.__repr__(value) if value == value and value not in (float("inf"), float("-inf")) else _fallback_encoder.encode(value)
+
+
+def _json_quoted_str(value: Any) -> str:
+    return f'"{value}"'
+
+
+def _json_isoformat(value: Union[datetime.date, datetime.datetime]) -> str:
+    return f'"{value.isoformat()}"'
+
+
+_JSON_SCALAR_SERIALIZERS: Dict[type, Callable[[Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _json_float,
+    bool: _json_bool,
+    type(None): _json_null,
+    uuid.UUID: _json_quoted_str,
+    datetime.date: _json_isoformat,
+    datetime.datetime: _json_isoformat,
+}
+
+
+def _json_value(value: Any) -> str:
+    return _JSON_SCALAR_SERIALIZERS.get(type(value), _fallback_encoder.encode)(value)
+
+
+def _record_data(record: Union[Dict[str, Any], GeneratedTestData, CompactRecord]) -> Dict[str, Any]:
+    return record.get_data() if isinstance(record, (GeneratedTestData, CompactRecord)) else record
+
+
+class NDJSONRecordEncoder:
+    """
+    Encodes records as compact single-line JSON.
+
+    The per-field serializers are chosen once, from the first record: every record of a plan has the
+    same keys in the same order, so each value only costs an exact type check and one serializer
+    call. Records with other keys, and values of an unexpected type, go through the generic path.
+    """
+    __slots__ = ("_keys", "_fields")
+
+    def __init__(self):
+        self._keys: Optional[Tuple[str, ...]] = None
+        self._fields: Tuple[Tuple[str, type, Callable[[Any], str]], ...] = ()
+
+    def _prepare(self, record: Dict[str, Any]) -> None:
+        self._keys = tuple(record)
+        self._fields = tuple((f"{encode_basestring_ascii(key)}:", type(value), _JSON_SCALAR_SERIALIZERS.get(type(value), _fallback_encoder.encode))
+                             for key, value in record.items())
+
+    def encode(self, record: Dict[str, Any]) -> str:
+        if self._keys is None:
+            self._prepare(record)
+        if tuple(record) != self._keys:
+            return _fallback_encoder.encode(record)
+        return "{" + ",".join([key_prefix + (serializer(value) if type(value) is value_type else _json_value(value))
+                               for (key_prefix, value_type, serializer), value in zip(self._fields, record.values())]) + "}"
+
+
+class _RecordWriter:
+    """Base class of the buffered writers: owns (or borrows) the output stream and counts records."""
+    def __init__(self, output: Union[str, IO[str]], buffer_size: int = _DEFAULT_BUFFER_SIZE, newline: Optional[str] = None):
+        if isinstance(output, str):
+            self._file = open(output, "w", encoding="utf-8", buffering=buffer_size, newline=newline)
+            self._owns_file = True
+        else:
+            self._file = output
+            self._owns_file = False
+        self.records_written = 0
+
+    def write(self, record: Union[Dict[str, Any], GeneratedTestData]) -> None:
+        self.write_many((record,))
+
+    def write_many(self, records: Iterable[Union[Dict[str, Any], GeneratedTestData]]) -> int:
+        """Writes records in chunks, so any iterable (including a lazy stream) is written in bounded memory."""
+        records = iter(records)
+        written = 0
+        while True:
+            chunk = [_record_data(record) for record in itertools.islice(records, _WRITE_CHUNK_SIZE)]
+            if not chunk:
+                return written
+            written += self._write_rows(chunk)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> int:
+        raise NotImplementedError
+
+    def write_batch(self, batch: ColumnarBatch) -> int:
+        return self.write_many(batch.to_rows())
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NDJSONWriter(_RecordWriter):
+    """Streams records to newline-delimited JSON, one compact object per line."""
+    def __init__(self, output: Union[str, IO[str]], buffer_size: int = _DEFAULT_BUFFER_SIZE):
+        super().__init__(output, buffer_size)
+        self._encoder = NDJSONRecordEncoder()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> int:
+        encode = self._encoder.encode
+        lines = [encode(row) for row in rows]
+        lines.append("")
+        self._file.write("\n".join(lines))
+        self.records_written += len(rows)
+        return len(rows)
+
+
+# Values csv.writer already renders correctly through str()
+_CSV_PASSTHROUGH_TYPES = frozenset((str, int, float, bool, type(None), uuid.UUID, datetime.date))
+
+
+def _csv_value(value: Any) -> Any:
+    if type(value) in _CSV_PASSTHROUGH_TYPES:
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return _fallback_encoder.encode(value)
+
+
+def _csv_column(column: Any) -> List[Any]:
+    column = column.tolist() if hasattr(column, 'tolist') else column
+    if set(map(type, column)) <= _CSV_PASSTHROUGH_TYPES:
+        return column
+    return [_csv_value(value) for value in column]
+
+
+def _flatten_layout(record: Dict[str, Any], prefix: str = "") -> Tuple[Tuple[str, Any], ...]:
+    # Same layout shape as ObjectNode.column_layout(): nested dicts become dotted columns
+    return tuple((key, _flatten_layout(value, f"{prefix}{key}.") if isinstance(value, dict) and value else f"{prefix}{key}")
+                 for key, value in record.items())
+
+
+def _layout_columns(layout: Tuple[Tuple[str, Any], ...]) -> List[str]:
+    columns = []
+    for _, entry in layout:
+        columns.extend(_layout_columns(entry) if isinstance(entry, tuple) else (entry,))
+    return columns
+
+
+class CSVWriter(_RecordWriter):
+    """
+    Streams records to CSV with a header row. Nested objects are flattened to dotted columns
+    (like ColumnarBatch), lists and dicts are written as JSON, datetimes in ISO format.
+    The columns are fixed by the first record or batch written.
+    """
+    def __init__(self, output: Union[str, IO[str]], buffer_size: int = _DEFAULT_BUFFER_SIZE):
+        super().__init__(output, buffer_size, newline="")
+        self._writer = csv.writer(self._file)
+        self._layout: Optional[Tuple[Tuple[str, Any], ...]] = None
+
+    def _write_header(self, layout: Tuple[Tuple[str, Any], ...]) -> None:
+        self._layout = layout
+        self._writer.writerow(_layout_columns(layout))
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> int:
+        if self._layout is None:
+            self._write_header(_flatten_layout(rows[0]))
+        return self._write_columns(ColumnarBatch.from_rows(rows, self._layout))
+
+    def write_batch(self, batch: ColumnarBatch) -> int:
+        if self._layout is None:
+            self._write_header(batch.layout)
+        return self._write_columns(batch)
+
+    def _write_columns(self, batch: ColumnarBatch) -> int:
+        columns = batch.get_columns()
+        self._writer.writerows(zip(*[_csv_column(columns[path]) for path in _layout_columns(self._layout)]))
+        self.records_written += len(batch)
+        return len(batch)
+
+
+def write_ndjson(records: Iterable[Union[Dict[str, Any], GeneratedTestData]], output: Union[str, IO[str]]) -> int:
+    """Writes records to an NDJSON file path or text stream. Returns the number of records written."""
+    with NDJSONWriter(output) as writer:
+        return writer.write_many(records)
+
+
+def write_csv(records: Iterable[Union[Dict[str, Any], GeneratedTestData]], output: Union[str, IO[str]]) -> int:
+    """Writes records to a CSV file path or text stream. Returns the number of records written."""
+    with CSVWriter(output) as writer:
+        return writer.write_many(records)
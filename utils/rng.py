@@ -0,0 +1,118 @@
+# utils/rng.py
+import os
+import random
+import hashlib
+from typing import Any
+
+MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix64(value: int) -> int:
+    """SplitMix64 finalizer: a cheap bijective mix of a 64-bit integer."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def derive_seed(seed: int, *counters: int) -> int:
+    """
+    Derives the seed of a substream from a master seed and a path of counters
+    (record index, field slot, shard, ...). Counter-based, so any substream can be
+    computed directly, in O(len(counters)), without generating the ones before it.
+    """
+    key = mix64(seed & MASK64)
+    for counter in counters:
+        key = mix64(key ^ ((counter + 1) * _GOLDEN_GAMMA & MASK64))
+    return key
+
+
+def _seed_to_int(seed: Any) -> int:
+    if seed is None:
+        return int.from_bytes(os.urandom(8), "little")
+    if isinstance(seed, int):
+        return seed & MASK64
+    if isinstance(seed, str):
+        seed = seed.encode("utf-8")
+    if isinstance(seed, float):
+        seed = repr(seed).encode("utf-8")
+    elif isinstance(seed, tuple):
+        if None in seed:
+            raise TypeError("A tuple seed cannot contain None.")
+        # Built from the elements' own seeds, so tuples are as stable across processes as their elements
+        seed = b"".join(_seed_to_int(element).to_bytes(8, "little") for element in seed)
+    if isinstance(seed, (bytes, bytearray)):
+        return int.from_bytes(hashlib.blake2b(seed, digest_size=8).digest(), "little")
+    # hash() of other objects changes from one process to the next (PYTHONHASHSEED)
+    raise TypeError(f"Unsupported seed type {type(seed).__name__!r}: use an int, str, bytes, float or a tuple of those.")
+
+
+class CounterRandom(random.Random):
+    """
+    A random.Random driven by a SplitMix64 counter instead of the Mersenne Twister.
+
+    Seeding only stores a 64-bit integer, so re-seeding a stream for every record and field is
+    O(1). All random.Random methods (randint, choice, uniform, ...) work on top of it, which
+    makes it a drop-in source for SyntheticDataGenerator and Faker (fake.random = CounterRandom()).
+    """
+    def __init__(self, seed: Any = None):
+        self._state = 0
+        super().__init__(seed)
+
+    def seed(self, a: Any = None, version: int = 2) -> None:
+        self._state = _seed_to_int(a)
+        self.gauss_next = None
+
+    def _next64(self) -> int:
+        self._state = (self._state + _GOLDEN_GAMMA) & MASK64
+        return mix64(self._state)
+
+    def random(self) -> float:
+        return (self._next64() >> 11) * 1.1102230246251565e-16  # 2 ** -53
+
+    def getrandbits(self, k: int) -> int:
+        if k <= 64:
+            return self._next64() >> (64 - k) if k > 0 else 0
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self._next64() << shift
+        return bits & ((1 << k) - 1)
+
+    def getstate(self) -> tuple:
+        return (self._state, self.gauss_next)
+
+    def setstate(self, state: tuple) -> None:
+        self._state, self.gauss_next = state
+
+
+class StreamContext:
+    """Seeding state of one generation run: the master seed and the key of the record in progress."""
+    __slots__ = ("seed", "record_key")
+
+    def __init__(self, seed: Any):
+        self.seed = _seed_to_int(seed)
+        self.record_key = 0
+
+    def begin_record(self, index: int) -> None:
+        self.record_key = derive_seed(self.seed, index)
+
+
+class SubStream:
+    """
+    RNG stream #slot of a seeded run. Its seed is re-derived for every record from
+    (master seed, record index, slot), so each generator/rule draws from an independent,
+    individually reproducible stream.
+    """
+    __slots__ = ("context", "slot", "random")
+
+    def __init__(self, context: StreamContext, slot: int):
+        self.context = context
+        self.slot = slot
+        self.random = CounterRandom(0)
+
+    def current_seed(self) -> int:
+        return mix64(self.context.record_key ^ ((self.slot + 1) * _GOLDEN_GAMMA & MASK64))
+
+    def next_random(self) -> CounterRandom:
+        self.random.seed(self.current_seed())
+        return self.random
@@ -0,0 +1,180 @@
+# utils/rule_index.py
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# A field path: field names, plus the position of each list item ("items", 0, "price")
+FieldPath = Tuple[Union[str, int], ...]
+
+_ANY_FIELD = "*"
+_ANY_DEPTH = "**"
+_ANY_ITEM = "[*]"
+_SEGMENT_PATTERN = re.compile(r"^([^\[\]]+)((?:\[(?:\*|\d+)\])*)$")
+_BRACKET_PATTERN = re.compile(r"\[(\*|\d+)\]")
+_LEGACY_ITEM_PATTERN = re.compile(r"^(.+)_item_(\d+)$")
+_LEGACY_ENTRY_PATTERN = re.compile(r"^(.+)_(key|value)_\d+$")
+
+
+def format_path(path: FieldPath) -> str:
+    """Display form of a field path, as used in diagnostics and statistics: 'items[0].price'."""
+    parts = []
+    for segment in path:
+        if isinstance(segment, int):
+            parts.append(f"[{segment}]")
+        else:
+            parts.append(f".{segment}" if parts else segment)
+    return "".join(parts)
+
+
+def parse_rule_path(rule_path: str) -> Optional[List[Union[str, int]]]:
+    """
+    Splits a rule path into segments: field names, '*' (any one field), '**' (any number of
+    fields and items), item positions (int) and '[*]' (any item). Returns None when the path is
+    not in that syntax, in which case it only matches a field path that formats to it exactly.
+    The historical '<field>.<field>_item_<i>' spelling of list items is read as '<field>[<i>]', and
+    '<field>.<field>_key_<i>' / '<field>_value_<i>' of dict entries as the '<field>_key' / '<field>_value'
+    node shared by every entry.
+    """
+    segments: List[Union[str, int]] = []
+    for part in rule_path.split("."):
+        match = _SEGMENT_PATTERN.match(part)
+        if match is None:
+            return None
+        name, brackets = match.groups()
+        legacy_item = _LEGACY_ITEM_PATTERN.match(name)
+        legacy_entry = _LEGACY_ENTRY_PATTERN.match(name)
+        if legacy_item is not None and segments and segments[-1] == legacy_item.group(1):
+            segments.append(int(legacy_item.group(2)))
+        elif legacy_entry is not None and segments and segments[-1] == legacy_entry.group(1):
+            segments.append(f"{legacy_entry.group(1)}_{legacy_entry.group(2)}")
+        else:
+            segments.append(name)
+        segments.extend(_ANY_ITEM if index == "*" else int(index) for index in _BRACKET_PATTERN.findall(brackets))
+    return segments
+
+
+def _specificity(segments: List[Union[str, int]]) -> Tuple[int, ...]:
+    # Named fields beat item positions, which beat '[*]'; then fewer '**', then fewer '*'
+    return (sum(isinstance(segment, str) and segment not in (_ANY_FIELD, _ANY_DEPTH, _ANY_ITEM) for segment in segments),
+            sum(isinstance(segment, int) for segment in segments),
+            sum(segment == _ANY_ITEM for segment in segments),
+            -sum(segment == _ANY_DEPTH for segment in segments),
+            -sum(segment == _ANY_FIELD for segment in segments))
+
+
+class _TrieNode:
+    __slots__ = ("children", "rule")
+
+    def __init__(self):
+        self.children: Dict[Union[str, int], "_TrieNode"] = {}
+        self.rule: Optional[Tuple[Tuple[int, ...], int, str]] = None  # (specificity, declaration order, rule path)
+
+
+class RuleIndex:
+    """
+    A rules dictionary compiled into a trie of rule paths, shared by the class and JSON compilers.
+
+    Rule paths name fields with dots ('shipping_address.city'); list items may be left out
+    ('items.price' applies to every item of 'items') or selected with '[*]' or a position
+    ('items[0].price'). '*' matches any one field name and '**' any run of fields and items, so
+    '*.city' is the city of any top-level object and '**.city' every city. When several paths
+    match a field, the most specific wins: the most named fields, then item positions, then '[*]',
+    then the fewest '**' and '*'. Between equally specific paths, the one declared last wins.
+    Matching happens once per field, when a plan is compiled.
+    """
+    __slots__ = ("rules", "_keys", "_root", "_verbatim", "_positions")
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        self.rules = rules if rules is not None else {}
+        self._keys = tuple(self.rules)
+        self._root = _TrieNode()
+        self._verbatim: Dict[str, str] = {}
+        # Trie of the rule path prefixes followed by a list position ('items' of 'items[2].price'); holds the highest position
+        self._positions = _TrieNode()
+        for order, rule_path in enumerate(self._keys):
+            segments = parse_rule_path(rule_path) if isinstance(rule_path, str) else None
+            if segments is None:
+                self._verbatim[str(rule_path)] = rule_path
+                continue
+            node = self._root
+            for segment in segments:
+                node = node.children.setdefault(segment, _TrieNode())
+            node.rule = (_specificity(segments), order, rule_path)
+            for position, segment in enumerate(segments):
+                if isinstance(segment, int):
+                    node = self._positions
+                    for prefix_segment in segments[:position]:
+                        node = node.children.setdefault(prefix_segment, _TrieNode())
+                    node.rule = max(segment, -1 if node.rule is None else node.rule)
+
+    @classmethod
+    def of(cls, rules: Optional[Union[Dict[str, Any], "RuleIndex"]]) -> "RuleIndex":
+        """The index of a rules dictionary, reused while the dictionary keeps the same rule paths."""
+        if isinstance(rules, RuleIndex):
+            return rules
+        if not rules:
+            return _EMPTY
+        cached = _indexes.get(id(rules))
+        if cached is not None and cached.rules is rules and cached._keys == tuple(rules):
+            return cached
+        if len(_indexes) >= _MAX_CACHED_INDEXES:
+            _indexes.clear()
+        index = _indexes[id(rules)] = cls(rules)
+        return index
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match_path(self, path: FieldPath) -> Optional[str]:
+        """The rule path that applies to a field path, or None."""
+        if not self.rules:
+            return None
+        found: List[Tuple[Tuple[int, ...], int, str]] = []
+        self._collect(self._root, path, 0, found)
+        verbatim = self._verbatim.get(format_path(path)) if self._verbatim else None
+        if verbatim is not None:
+            found.append(((len(path) + 1,), self._keys.index(verbatim), verbatim))
+        return max(found)[2] if found else None
+
+    def max_item_position(self, list_path: FieldPath) -> int:
+        """The highest position of the list at list_path that a rule names ('items[2].price' names 2), or -1."""
+        if not self.rules:
+            return -1
+        found: List[int] = []
+        self._collect(self._positions, list_path, 0, found)
+        return max(found, default=-1)
+
+    def match(self, path: FieldPath) -> Optional[Dict[str, Any]]:
+        """The rule that applies to a field path, or None."""
+        rule_path = self.match_path(path)
+        return None if rule_path is None else self.rules[rule_path]
+
+    def _collect(self, node: _TrieNode, path: FieldPath, position: int, found: list) -> None:
+        children = node.children
+        deep = children.get(_ANY_DEPTH)
+        if deep is not None:
+            for resume in range(position, len(path) + 1):
+                self._collect(deep, path, resume, found)
+        if position == len(path):
+            if node.rule is not None:
+                found.append(node.rule)
+            return
+        segment = path[position]
+        if isinstance(segment, int):
+            for child in (children.get(segment), children.get(_ANY_ITEM)):
+                if child is not None:
+                    self._collect(child, path, position + 1, found)
+            if position + 1 < len(path):
+                # Rule paths may leave list items out, but never end on one: 'items' is the list itself
+                self._collect(node, path, position + 1, found)
+        else:
+            for child in (children.get(segment), children.get(_ANY_FIELD)):
+                if child is not None:
+                    self._collect(child, path, position + 1, found)
+
+    def __reduce__(self):
+        return (RuleIndex, (self.rules,))
+
+
+_EMPTY = RuleIndex()
+_MAX_CACHED_INDEXES = 256
+_indexes: Dict[int, RuleIndex] = {}
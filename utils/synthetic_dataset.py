@@ -0,0 +1,69 @@
+# utils/synthetic_dataset.py
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+from utils.generation_plan import PlanNode, RecordGenerator, UniqueNode, ValueNode, iter_plan_nodes
+from utils.value_pools import ValuePool
+
+
+def order_dependent_fields(root: PlanNode) -> List[str]:
+    """
+    Describes the nodes of a plan whose values depend on the records generated before them:
+    unique rules (their dedup state) and value pools refreshed every N draws.
+    """
+    found = []
+    for node in iter_plan_nodes(root):
+        if isinstance(node, UniqueNode):
+            found.append("a unique rule")
+        elif isinstance(node, ValueNode) and isinstance(node.call, ValuePool) and node.call.refresh_interval is not None:
+            found.append("a refreshing value pool")
+    return found
+
+
+class SyntheticDataset:
+    """
+    A read-only sequence of `count` seeded records that are generated on access, never stored.
+
+    Record #index is computed directly from (plan, seed, index): list lengths, nested objects and
+    every field draw come from streams derived from that key alone (see RecordGenerator), so
+    dataset[48_213_007] costs the same as dataset[0] and always returns the same record. Slices
+    are lazy views over the same records; iterating generates them in index order.
+    """
+    __slots__ = ("_record_generator", "_indexes", "_wrap")
+
+    def __init__(self, record_generator: RecordGenerator, indexes: range, wrap: Callable[[Dict[str, Any]], Any]):
+        if record_generator.seed is None:
+            raise ValueError("A SyntheticDataset needs a seed: records are only addressable by index in seeded runs.")
+        self._record_generator = record_generator
+        self._indexes = indexes
+        self._wrap = wrap
+
+    @property
+    def seed(self) -> Any:
+        return self._record_generator.seed
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return SyntheticDataset(self._record_generator, self._indexes[index], self._wrap)
+        try:
+            record_index = self._indexes[index]
+        except IndexError:
+            raise IndexError(f"SyntheticDataset index {index} out of range for {len(self)} records") from None
+        return self._wrap(self._record_generator(record_index))
+
+    def __iter__(self) -> Iterator[Any]:
+        record_generator, wrap = self._record_generator, self._wrap
+        for record_index in self._indexes:
+            yield wrap(record_generator(record_index))
+
+    def to_list(self) -> List[Any]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        indexes = self._indexes
+        return f"SyntheticDataset({len(indexes)} records, indexes={indexes.start}..{indexes.stop} step {indexes.step}, seed={self.seed!r})"
+
+    def __reduce__(self):
+        return (SyntheticDataset, (self._record_generator, self._indexes, self._wrap))
@@ -0,0 +1,230 @@
+# utils/uniqueness.py
+import math
+import hashlib
+import weakref
+import functools
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+class DedupBackend:
+    """
+    Remembers which values a unique field has already produced.
+    add() records a value and returns False when it was (or, for probabilistic backends, may have been)
+    seen before. A backend may reject a value that is actually new, but must never accept a duplicate.
+    """
+    def add(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class ExactSetBackend(DedupBackend):
+    """Exact dedup with a Python set. Memory grows with every distinct value: meant for small runs."""
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, value: Any) -> bool:
+        try:
+            hash(value)
+        except TypeError:
+            value = repr(value)  # lists/dicts: dedup on their representation
+        if value in self._seen:
+            return False
+        self._seen.add(value)
+        return True
+
+    def clear(self) -> None:
+        self._seen.clear()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+def _value_bytes(value: Any) -> bytes:
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, bytes):
+        return value
+    return repr(value).encode("utf-8")
+
+
+class BloomFilterBackend(DedupBackend):
+    """
+    Memory-bounded dedup with a Bloom filter sized for `capacity` values at `error_rate`
+    (about 1.2 bytes per value at 1e-3, 3.6 at 1e-9). A false positive only costs a retry,
+    so uniqueness stays exact; the retry rate grows once more than `capacity` values are added.
+    """
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 1e-3):
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("capacity must be an integer greater than or equal to 1.")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _bit_positions(self, value: Any) -> List[int]:
+        # Double hashing (Kirsch-Mitzenmacher): k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(_value_bytes(value), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(first + i * second) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, value: Any) -> bool:
+        bits = self._bits
+        is_new = False
+        for position in self._bit_positions(value):
+            byte_index, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte_index] & mask:
+                bits[byte_index] |= mask
+                is_new = True
+        if is_new:
+            self._count += 1
+        return is_new
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+
+# name -> factory(**options) for the "backend" option of a unique rule
+_dedup_backends: Dict[str, Callable[..., DedupBackend]] = {
+    "exact": ExactSetBackend,
+    "bloom": BloomFilterBackend,
+}
+
+
+def register_dedup_backend(name: str, factory: Callable[..., DedupBackend]) -> None:
+    """Makes a DedupBackend factory available to rules as {"unique": {"backend": name, ...options}}."""
+    _dedup_backends[name] = factory
+
+
+class UniquenessStats:
+    """Retry-on-collision counters of one unique field path, shared by every plan using that path."""
+    __slots__ = ("backend", "unique_values", "collisions", "max_attempts")
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.unique_values = 0
+        self.collisions = 0
+        self.max_attempts = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        attempts = self.unique_values + self.collisions
+        return {
+            "backend": self.backend,
+            "unique_values": self.unique_values,
+            "collisions": self.collisions,
+            "collision_rate": self.collisions / attempts if attempts else 0.0,
+            "max_attempts": self.max_attempts,
+        }
+
+
+# Counters outlive the plans (and dedup backends) they were collected from, until reset_uniqueness()
+_field_stats: Dict[str, UniquenessStats] = {}
+# Every constraint alive in this process, so reset_uniqueness() can clear their backends
+_live_constraints: "weakref.WeakSet[UniqueConstraint]" = weakref.WeakSet()
+
+
+class UniqueConstraint:
+    """
+    The dedup state of one unique field (see UniqueNode). Values are only checked against the
+    backend, so no generated record is kept; retry statistics go to the field path's UniquenessStats.
+    Compiled plans keep the constraint of a rule and every run dedups against a renewed() copy, so
+    runs with the same seed produce the same values. The backend is built on first use, from
+    backend_factory; a backend given without a factory is shared by every run.
+    """
+    _DEFAULT_MAX_RETRIES = 100
+
+    def __init__(self, field_path: str, backend: Optional[DedupBackend] = None, max_retries: int = _DEFAULT_MAX_RETRIES,
+                 backend_factory: Optional[Callable[[], DedupBackend]] = None):
+        self.field_path = field_path
+        self.backend_factory = backend_factory if backend_factory is not None or backend is not None else ExactSetBackend
+        self._backend = backend
+        self.max_retries = max_retries
+        self._register()
+
+    def _register(self) -> None:
+        if self._backend is not None:
+            backend_name = type(self._backend).__name__
+        else:
+            factory = getattr(self.backend_factory, "func", self.backend_factory)  # unwrap the partial of a named backend
+            backend_name = getattr(factory, "__name__", type(factory).__name__)
+        self.stats = _field_stats.setdefault(self.field_path, UniquenessStats(backend_name))
+        _live_constraints.add(self)
+
+    @property
+    def backend(self) -> DedupBackend:
+        if self._backend is None:
+            self._backend = self.backend_factory()
+        return self._backend
+
+    def renewed(self) -> "UniqueConstraint":
+        """A constraint with the same options and an empty backend of its own, for a new run."""
+        if self.backend_factory is None:
+            return self
+        return UniqueConstraint(self.field_path, None, self.max_retries, self.backend_factory)
+
+    @classmethod
+    def from_rule(cls, field_path: str, option: Union[bool, Dict[str, Any]]) -> "UniqueConstraint":
+        """Builds a constraint from a rule's "unique" option: True, or a dict of backend/max_retries/backend options."""
+        if option is True:
+            return cls(field_path)
+        if not isinstance(option, dict):
+            raise TypeError(f"The 'unique' option of field '{field_path}' must be True or a dictionary.")
+        options = dict(option)
+        max_retries = options.pop("max_retries", cls._DEFAULT_MAX_RETRIES)
+        backend = options.pop("backend", "exact")
+        if isinstance(backend, str):
+            if backend not in _dedup_backends:
+                raise ValueError(f"Unknown dedup backend '{backend}' for field '{field_path}'. Available: {sorted(_dedup_backends)}.")
+            return cls(field_path, None, max_retries, functools.partial(_dedup_backends[backend], **options))
+        if not isinstance(backend, DedupBackend):
+            raise TypeError(f"The dedup backend of field '{field_path}' must be a backend name or a DedupBackend.")
+        return cls(field_path, backend, max_retries)
+
+    def record_attempts(self, attempts: int) -> None:
+        stats = self.stats
+        stats.unique_values += 1
+        stats.collisions += attempts - 1
+        if attempts > stats.max_attempts:
+            stats.max_attempts = attempts
+
+    def exhausted(self, value: Any) -> ValueError:
+        return ValueError(f"Could not generate a unique value for field '{self.field_path}' after {self.max_retries} "
+                          f"attempts ({len(self.backend)} unique values so far, last duplicate: {value!r}).")
+
+    def clear(self) -> None:
+        if self._backend is not None:
+            self._backend.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"field_path": self.field_path, "backend_factory": self.backend_factory, "_backend": self._backend, "max_retries": self.max_retries}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._register()
+
+
+def uniqueness_stats() -> Dict[str, Dict[str, Any]]:
+    """Retry-on-collision statistics of every unique field path seen since the last reset."""
+    return {field_path: stats.as_dict() for field_path, stats in _field_stats.items()}
+
+
+def reset_uniqueness() -> None:
+    """Clears the dedup backends of every live constraint and the collected statistics."""
+    for constraint in list(_live_constraints):
+        constraint.clear()
+    for stats in _field_stats.values():
+        stats.unique_values = stats.collisions = stats.max_attempts = 0
@@ -1,17 +1,35 @@
 # utils/utility.py
-import random
 import datetime
 import uuid
 import inspect
-from typing import Any, List, Dict, Union, Optional, get_origin, get_args
+import os
+import logging
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, IO, Iterator, List, Dict, Tuple, Union, Optional, get_origin, get_args
 
-from faker import Faker # Make sure Faker is imported directly here too
 from utils.synthetic_data_generator import SyntheticDataGenerator
-from utils.generated_test_data import GeneratedTestData
+from utils.generated_test_data import GeneratedTestData, ColumnarBatch, CompactRecord
+from utils.generator_dispatch import bind_generator, register_shared_instance
+from utils.generation_plan import PlanNode, ValueNode, ChoiceNode, NullableNode, UniqueNode, ForeignKeyNode, ListNode, DictNode, ObjectNode, ClassPlan, CompiledJsonSchema, RecordGenerator, RecordLocaleNode, localize_plan, renew_unique_constraints, record_schema, iter_plan_nodes
+from utils.parallel_generation import ParallelGenerationEngine
+from utils.record_writers import NDJSONWriter, CSVWriter
+from utils.value_pools import ValuePool, DEFAULT_POOLED_PROVIDERS, provider_name
+from utils.uniqueness import UniqueConstraint, uniqueness_stats, reset_uniqueness
+from utils.key_index import KeyIndex
+from utils.field_timing import FieldTimings, instrument_plan
+from utils.diagnostics import diagnostics, DiagnosticsCollector, INFO
+from utils.locale_pool import LocaleChoice, LocaleGeneratorPool, LocalizedCall, default_pool
+from utils.lazy_imports import is_faker_generator
+from utils.synthetic_dataset import SyntheticDataset, order_dependent_fields
+from utils.rule_index import RuleIndex, FieldPath, format_path
+from utils.cardinality import Cardinality
 
 class Utility:
     _data_generator = SyntheticDataGenerator()
-    _faker_instance = Faker('en_US') # Direct Faker instance for specific methods
+    # Faker instance for direct provider use, shared with the data generator: one Faker per process,
+    # built (and faker imported) on first use only
+    _faker_instance = _data_generator.fake
 
     _type_to_generator_map = {
         str: _data_generator.generate_str,
@@ -43,33 +61,170 @@ class Utility:
         "ip_address": _data_generator.generate_ip_address,
         "credit_card_number": _data_generator.generate_credit_card_number,
         "card_number": _data_generator.generate_credit_card_number,
-        "iban": _faker_instance.iban, # Direct Faker usage
-        "ssn": _faker_instance.ssn,   # Direct Faker usage
+        "iban": "faker.iban", # Direct Faker usage, resolved by name when a plan is compiled
+        "ssn": "faker.ssn",
         "is_active": _data_generator.generate_bool,
         "is_published": _data_generator.generate_bool,
         "is_resolved": _data_generator.generate_bool,
         "is_paid": _data_generator.generate_bool,
         # Specific address fields
-        "street": _faker_instance.street_address,
-        "city": _faker_instance.city,
-        "postal_code": _faker_instance.postcode,
+        "street": "faker.street_address",
+        "city": "faker.city",
+        "postal_code": "faker.postcode",
     }
 
+    # Default item counts of List/Dict fields; per path with a {"cardinality": ...} rule, see ConfigureCollectionSizes
+    _list_cardinality = Cardinality(1, 3)
+    _dict_cardinality = Cardinality(1, 2)
+    # Chance that a JSON field whose sample value is null is generated as null again
+    _NULL_SAMPLE_PROBABILITY = 0.2
+    # Records generated per batch by the streaming APIs when no chunk_size is given
+    _STREAM_BATCH_SIZE = 1024
+
+    # Set by EnableValuePools(); (generator, bound kwargs) -> ValuePool shared by every field using that binding
+    _value_pool_config: Optional[Dict[str, Any]] = None
+    _value_pools: Dict[Tuple[Any, Tuple[Tuple[str, Any], ...]], ValuePool] = {}
+
+    # Set by EnableLocales(): every record picks its locale from this choice while it is not None
+    _record_locales: Optional[LocaleChoice] = None
+
+    # Set by EnableFieldTiming(): plans are instrumented per run only while this is not None
+    _field_timings: Optional[FieldTimings] = None
+
+    # name -> KeyIndex of a generated parent entity, for {"foreign_key": name} rules; see BuildKeyIndex
+    _key_indexes: Dict[str, KeyIndex] = {}
+
+    # Set by ConfigureDatasetCache() (or the first GenerateCachedTestData call); see utils.dataset_cache
+    _dataset_cache: Optional[Any] = None
+
+    # (class, id(rules), parent path) -> (rules, ClassPlan), least recently used first; see GenerateSyntheticTestDataForClass
+    _class_plan_cache: "OrderedDict[Tuple[Any, int, FieldPath], Tuple[Optional[Dict[str, Any]], ClassPlan]]" = OrderedDict()
+    # Plans kept at most: callers passing a new rules dict literal per call only ever hold this many rules dicts alive
+    _MAX_CLASS_PLANS = 128
+
+    @staticmethod
+    def _get_class_field_annotations(target_class: type) -> Dict[str, Any]:
+        class_annotations = inspect.get_annotations(target_class)
+
+        init_annotations = {}
+        if hasattr(target_class, '__init__'):
+            init_signature = inspect.signature(target_class.__init__)
+            for param_name, param in init_signature.parameters.items():
+                if param_name != 'self' and param.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
+                    if param.annotation is not inspect.Parameter.empty:
+                        init_annotations[param_name] = param.annotation
+
+        return {**class_annotations, **init_annotations}
+
+    @staticmethod
+    def _compile_rule_node(field_rule: Optional[Dict[str, Any]], full_path: str, field_name: str, specific_kwargs: Dict[str, Any]) -> Optional[PlanNode]:
+        if not field_rule:
+            return None
+        if "choices" in field_rule:
+            return ChoiceNode(tuple(field_rule["choices"]))
+        if "foreign_key" in field_rule:
+            return ForeignKeyNode(Utility._resolve_key_index(field_rule["foreign_key"], full_path))
+        if "generator" in field_rule:
+            return Utility._compile_generator_node(field_rule["generator"], specific_kwargs, field_name, field_rule.get("pool"), field_rule.get("locale"))
+        return None
+
+    @staticmethod
+    def _apply_unique_rule(field_rule: Optional[Dict[str, Any]], full_path: str, node: PlanNode) -> PlanNode:
+        # {"unique": True} or {"unique": {"backend": "bloom", "capacity": ..., "max_retries": ...}} on a field's rule
+        unique_option = (field_rule or {}).get("unique")
+        if not unique_option:
+            return node
+        return UniqueNode(node, UniqueConstraint.from_rule(full_path, unique_option))
+
+    @staticmethod
+    def _resolve_key_index(reference: Any, full_path: str) -> KeyIndex:
+        if isinstance(reference, KeyIndex):
+            return reference
+        if reference in Utility._key_indexes:
+            return Utility._key_indexes[reference]
+        raise ValueError(f"Unknown key index {reference!r} in the foreign_key rule of field '{full_path}'. Build it first with Utility.BuildKeyIndex.")
+
     @staticmethod
-    def _resolve_generator(field_name: str, field_type: Any, path: List[str], rules: Dict[str, Any]):
-        # Check for specific rules first using the full path
-        full_path = ".".join(path + [field_name]) if path else field_name
-        if full_path in rules and "generator" in rules[full_path]:
-            # If a custom generator is specified in rules, use it
-            return rules[full_path]["generator"]
-        elif full_path in rules and "choices" in rules[full_path]:
-            # If choices are specified, return a lambda that picks from choices
-            return lambda: random.choice(rules[full_path]["choices"])
+    def _resolve_provider(generator: Any, field_name: str) -> Any:
+        """
+        Rules may name a provider instead of binding it, so defining them builds no Faker:
+        "faker.<provider>" is a Faker provider ("faker.city"), any other name a SyntheticDataGenerator
+        method ("generate_email" or just "email") or else a Faker provider ("postcode").
+        """
+        if not isinstance(generator, str):
+            return generator
+        if generator.startswith("faker."):
+            name = generator[len("faker."):]
+        else:
+            name = generator
+            method = getattr(Utility._data_generator, name if name.startswith("generate_") else f"generate_{name}", None)
+            if method is not None:
+                return method
+        provider = None if name.startswith("_") else getattr(Utility._faker_instance, name, None)
+        if not callable(provider):
+            raise ValueError(f"Unknown generator provider '{generator}' for field '{field_name}'.")
+        return provider
+
+    @staticmethod
+    def _compile_generator_node(generator: Any, specific_kwargs: Dict[str, Any], field_name: str, pool: Optional[bool] = None,
+                                locale: Optional[Any] = None) -> ValueNode:
+        """
+        Binds a named-field or rule generator. While value pools are enabled, generators of the pooled
+        providers (or any generator whose rule says "pool": True) sample from a shared ValuePool instead.
+        A rule's "locale" ('de_DE', a list, or {locale: weight}) binds the generator to pooled per-locale instances.
+        """
+        generator = Utility._resolve_provider(generator, field_name)
+        bound_call = bind_generator(generator, specific_kwargs, field_name)
+        if locale is not None:
+            localized_call = Utility._localized_call(bound_call, LocaleChoice.from_option(locale))
+            if localized_call is None:
+                raise ValueError(f"The 'locale' option of field '{field_name}' needs a SyntheticDataGenerator method or a Faker provider as generator.")
+            return ValueNode(localized_call)
+        config = Utility._value_pool_config
+        if config is None or pool is False or not callable(generator):
+            return ValueNode(bound_call)
+        if not pool and provider_name(generator) not in config["providers"]:
+            return ValueNode(bound_call)
+        try:
+            pool_key = (generator, tuple(sorted(bound_call.kwargs.items())))
+            value_pool = Utility._value_pools.get(pool_key)
+        except TypeError:
+            pool_key, value_pool = None, None  # unhashable kwargs: this binding gets its own pool
+        if value_pool is None:
+            value_pool = ValuePool(bound_call, config["pool_size"], config["refresh_interval"], config["refresh_count"])
+            if pool_key is not None:
+                Utility._value_pools[pool_key] = value_pool
+        return ValueNode(value_pool)
 
+    @staticmethod
+    def _localized_call(call: Any, locale_choice: Optional[LocaleChoice] = None) -> Optional[LocalizedCall]:
+        """The locale-pooled counterpart of a call bound to the default generator or Faker instance, if it is one."""
+        generator = getattr(call, 'generator', None)
+        owner = getattr(generator, '__self__', None)
+        if owner is None:
+            return None
+        if owner is Utility._data_generator:
+            return LocalizedCall(generator.__name__, "generator", call.kwargs, call.field_name, default_pool, locale_choice)
+        factory = getattr(owner, 'generator', None)
+        if is_faker_generator(factory) and Utility._faker_instance.is_built and factory in Utility._faker_instance.factories:
+            return LocalizedCall(generator.__name__, "faker", call.kwargs, call.field_name, default_pool, locale_choice)
+        return None
 
-        lower_field_name = field_name.lower()
+    @staticmethod
+    def _compile_type_node(field_name: Union[str, int], field_type: Any, path: FieldPath, rules: RuleIndex, specific_kwargs: Dict[str, Any]) -> PlanNode:
+        # field_name is an int for list items: their position in the list
+        field_path = path + (field_name,)
+        full_path = format_path(field_path)
+        name = field_name if isinstance(field_name, str) else format_path(field_path[-2:])
+        field_rule = rules.match(field_path)
+        rule_node = Utility._compile_rule_node(field_rule, full_path, name, specific_kwargs)
+        if rule_node is not None:
+            return rule_node
+
+        lower_field_name = name.lower()
         if lower_field_name in Utility._field_name_to_generator_map:
-            return Utility._field_name_to_generator_map[lower_field_name]
+            generator = Utility._field_name_to_generator_map[lower_field_name]
+            return Utility._compile_generator_node(generator, specific_kwargs, name)
 
         origin = get_origin(field_type)
         args = get_args(field_type)
@@ -83,148 +238,234 @@ class Utility:
 
         if origin is list:
             inner_type = args[0] if args else Any
-            def generate_list_field(**kwargs):
-                generated_list = []
-                num_items = random.randint(1, 3)
-                for i in range(num_items):
-                    # Pass the current path for nested rules
-                    item_generator = Utility._resolve_generator(f"{field_name}_item_{i}", inner_type, path + [field_name], rules)
-                    generated_list.append(Utility._call_generator_with_kwargs(item_generator, kwargs, f"{field_name}_item_{i}"))
-                return generated_list
-            return generate_list_field
+            cardinality = Utility._collection_cardinality(field_rule, Utility._list_cardinality)
+            # Item nodes at field paths <field>[<i>]; the last one generates every later item
+            item_nodes = tuple(
+                Utility._compile_type_node(i, inner_type, field_path, rules, specific_kwargs)
+                for i in range(Utility._item_node_count(cardinality, rules.max_item_position(field_path)))
+            )
+            return ListNode(item_nodes, cardinality)
         elif origin is dict:
             key_type = args[0] if args else str
             value_type = args[1] if args else Any
-            def generate_dict_field(**kwargs):
-                generated_dict = {}
-                num_items = random.randint(1, 2)
-                for i in range(num_items):
-                    # Pass the current path for nested rules
-                    key_gen = Utility._resolve_generator(f"{field_name}_key_{i}", key_type, path + [field_name], rules)
-                    value_gen = Utility._resolve_generator(f"{field_name}_value_{i}", value_type, path + [field_name], rules)
-                    generated_key = key_gen() if callable(key_gen) else key_gen
-                    generated_value = value_gen() if callable(value_gen) else value_gen
-                    generated_dict[generated_key] = generated_value
-                return generated_dict
-            return generate_dict_field
-        
+            # One key and one value node generate every entry
+            key_node = Utility._compile_type_node(f"{name}_key", key_type, field_path, rules, {})
+            value_node = Utility._compile_type_node(f"{name}_value", value_type, field_path, rules, {})
+            return DictNode((key_node,), (value_node,), Utility._collection_cardinality(field_rule, Utility._dict_cardinality))
+
         if origin is None and field_type in Utility._type_to_generator_map:
-            return Utility._type_to_generator_map[field_type]
-        
-        # Handle custom class types for nested objects
+            generator = Utility._type_to_generator_map[field_type]
+            return ValueNode(bind_generator(generator, specific_kwargs, name))
+
+        # Handle custom class types for nested objects: reuse (or build) the nested class plan
         if inspect.isclass(field_type) and field_type.__module__ != 'builtins':
-            def generate_nested_object(**kwargs):
-                # When generating a nested object, pass existing rules and append current field to path
-                instance = field_type()
-                return Utility.GenerateSyntheticTestDataFor(instance, parent_path=path + [field_name], rules=rules).get_data()
-            return generate_nested_object
+            return Utility._get_class_plan(field_type, field_path, rules).root
 
-        print(f"Warning: No specific generator found for field '{field_name}' of type '{field_type}'. Defaulting to generic string.")
-        return Utility._data_generator.generate_str
+        diagnostics.report("unknown_type", full_path, f"Warning: No specific generator found for field '{name}' of type '{field_type}'. Defaulting to generic string.")
+        return ValueNode(bind_generator(Utility._data_generator.generate_str, specific_kwargs, name))
 
+    @staticmethod
+    def _collection_cardinality(field_rule: Optional[Dict[str, Any]], default: Cardinality) -> Cardinality:
+        # {"cardinality": 5 | [min, max] | {count: weight}} on a List/Dict field's rule
+        option = (field_rule or {}).get("cardinality")
+        return default if option is None else Cardinality.from_option(option)
 
     @staticmethod
-    def _call_generator_with_kwargs(generator_func: Any, specific_kwargs: Dict[str, Any], field_name: str) -> Any:
-        try:
-            if not callable(generator_func):
-                return generator_func
-
-            # Special handling for Faker methods that don't take arbitrary kwargs
-            # Faker methods usually have fixed signatures.
-            # inspect.signature can help here but often safer to filter.
-            if hasattr(generator_func, '__self__') and isinstance(generator_func.__self__, Faker):
-                # For direct Faker methods, filter kwargs to only those accepted by its signature
-                try:
-                    sig = inspect.signature(generator_func)
-                    accepted_params = {p.name for p in sig.parameters.values() if p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD}
-                    filtered_kwargs = {k: v for k, v in specific_kwargs.items() if k in accepted_params}
-                    return generator_func(**filtered_kwargs)
-                except TypeError as e:
-                    # If kwargs still cause an issue, try without
-                    print(f"Warning: Faker method '{generator_func.__name__}' for field '{field_name}' received unaccepted kwargs. Attempting without. Error: {e}")
-                    return generator_func()
+    def _item_node_count(cardinality: Cardinality, last_specific_position: int) -> int:
+        # Positions up to the last one with position-specific rules/kwargs get their own node, plus one shared by all later items
+        return max(1, min(last_specific_position + 2, cardinality.max_items))
+
+    @staticmethod
+    def _collect_nested_classes(field_type: Any, found: set) -> set:
+        origin = get_origin(field_type)
+        if origin is not None:
+            for arg in get_args(field_type):
+                Utility._collect_nested_classes(arg, found)
+        elif (inspect.isclass(field_type) and field_type.__module__ != 'builtins'
+              and field_type not in Utility._type_to_generator_map and field_type not in found):
+            found.add(field_type)
+            for nested_type in Utility._get_class_field_annotations(field_type).values():
+                Utility._collect_nested_classes(nested_type, found)
+        return found
+
+    @staticmethod
+    def _compile_class_plan(target_class: type, path: FieldPath, rules: RuleIndex) -> ClassPlan:
+        field_types = tuple(Utility._get_class_field_annotations(target_class).items())
+        field_nodes = []
+        ruled_fields = set()
+        dependencies = {target_class}
+
+        for field_name, field_type in field_types:
+            full_field_path = format_path(path + (field_name,))
+            field_rule = rules.match(path + (field_name,))
+            node = Utility._compile_rule_node(field_rule, full_field_path, field_name, (field_rule or {}).get("kwargs", {}))
+            if node is not None:
+                ruled_fields.add(field_name)
             else:
-                # For our own generators, use the existing logic
-                func_signature = inspect.signature(generator_func)
-                accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in func_signature.parameters.values())
+                node = Utility._compile_type_node(field_name, field_type, path, rules, {})
+            field_nodes.append((field_name, Utility._apply_unique_rule(field_rule, full_field_path, node)))
 
-                if accepts_kwargs:
-                    return generator_func(**specific_kwargs)
-                else:
-                    accepted_params = {p.name for p in func_signature.parameters.values() if p.kind != inspect.Parameter.VAR_KEYWORD}
-                    filtered_kwargs = {k: v for k, v in specific_kwargs.items() if k in accepted_params}
-                    if len(filtered_kwargs) < len(specific_kwargs):
-                        unaccepted = set(specific_kwargs.keys()) - set(filtered_kwargs.keys())
-                        # Suppress this warning for 'choices' which is handled before calling generator
-                        if not any(k.startswith("field_name_") and 'choices' in specific_kwargs for k in unaccepted):
-                             print(f"Warning: Unaccepted kwargs {list(unaccepted)} for field '{field_name}' in '{generator_func.__name__}'. Ignoring.")
-                    return generator_func(**filtered_kwargs)
-        except TypeError as e:
-            if "Can't parse date string" in str(e) or "argument 'start_date'" in str(e):
-                print(f"Error calling generator '{generator_func.__name__}' for field '{field_name}' with args {specific_kwargs}: {e}. Falling back to default date/datetime.")
-                if generator_func == Utility._data_generator.generate_date:
-                    return Utility._data_generator.generate_date()
-                elif generator_func == Utility._data_generator.generate_datetime:
-                    return Utility._data_generator.generate_datetime()
-                # For other Faker methods, try calling without args as a fallback
-                return generator_func()
-            print(f"Error calling generator '{generator_func.__name__}' for field '{field_name}' with args {specific_kwargs}: {e}. Calling without args.")
-            return generator_func()
-        except Exception as e:
-            print(f"Unexpected error calling generator '{generator_func.__name__}' for field '{field_name}': {e}. Returning None.")
-            return None
+        # Record nested classes so that invalidating e.g. Address also drops the Order plan embedding it
+        for _, field_type in field_types:
+            Utility._collect_nested_classes(field_type, dependencies)
 
+        return ClassPlan(target_class, path, field_types, ObjectNode(tuple(field_nodes)), frozenset(ruled_fields), frozenset(dependencies))
 
     @staticmethod
-    def GenerateSyntheticTestDataFor(instance: Any, parent_path: List[str] = None, rules: Dict[str, Any] = None, **kwargs) -> GeneratedTestData:
-        generated_data = {}
-        target_class = instance.__class__
-        current_path = parent_path if parent_path is not None else []
-        rules = rules if rules is not None else {}
-
-        class_annotations = inspect.get_annotations(target_class)
+    def _get_class_plan(target_class: type, path: FieldPath, rules: RuleIndex) -> ClassPlan:
+        # Plans are keyed by rules identity; the cache keeps a reference to the rules dict so its id cannot be reused.
+        cache_key = (target_class, id(rules.rules) if rules else 0, path)
+        cached = Utility._class_plan_cache.get(cache_key)
+        if cached is not None:
+            Utility._class_plan_cache.move_to_end(cache_key)
+            return cached[1]
+        plan = Utility._compile_class_plan(target_class, path, rules)
+        Utility._class_plan_cache[cache_key] = (rules.rules if rules else None, plan)
+        if len(Utility._class_plan_cache) > Utility._MAX_CLASS_PLANS:
+            Utility._class_plan_cache.popitem(last=False)
+        return plan
 
-        init_annotations = {}
-        if hasattr(target_class, '__init__'):
-            init_signature = inspect.signature(target_class.__init__)
-            for param_name, param in init_signature.parameters.items():
-                if param_name != 'self' and param.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
-                    if param.annotation is not inspect.Parameter.empty:
-                        init_annotations[param_name] = param.annotation
-        
-        all_annotations = {**class_annotations, **init_annotations}
-
-        for field_name, field_type in all_annotations.items():
-            full_field_path = ".".join(current_path + [field_name])
-
-            # Check for direct rules for this field
-            if full_field_path in rules:
-                field_rule = rules[full_field_path]
-                if "choices" in field_rule:
-                    generated_data[field_name] = random.choice(field_rule["choices"])
-                    continue
-                # If a custom generator is specified, use it directly
-                elif "generator" in field_rule:
-                    generator_func = field_rule["generator"]
-                    specific_kwargs = field_rule.get("kwargs", {})
-                    generated_data[field_name] = Utility._call_generator_with_kwargs(generator_func, specific_kwargs, field_name)
-                    continue
-
-            # Fallback to field_kwargs_key from kwargs if no direct rule
-            field_kwargs_key = f"field_name_{field_name}"
-            specific_kwargs = kwargs.get(field_kwargs_key, {})
-            
-            # If choices are passed via old kwargs, handle them
+    @staticmethod
+    def _bind_class_plan(plan: ClassPlan, rules: RuleIndex, kwargs: Dict[str, Any]) -> ObjectNode:
+        # Per-call field_name_<field> kwargs only affect top-level fields without a rule, so only those are recompiled.
+        if not kwargs:
+            return plan.root
+        overrides = {}
+        for field_name, field_type in plan.field_types:
+            specific_kwargs = kwargs.get(f"field_name_{field_name}")
+            if not specific_kwargs or field_name in plan.ruled_fields:
+                continue
             if "choices" in specific_kwargs:
                 if not isinstance(specific_kwargs["choices"], (list, tuple)):
                     raise TypeError(f"Choices for field '{field_name}' must be a list or tuple.")
-                generated_data[field_name] = random.choice(specific_kwargs["choices"])
-                continue
+                overrides[field_name] = ChoiceNode(tuple(specific_kwargs["choices"]))
+            else:
+                overrides[field_name] = Utility._compile_type_node(field_name, field_type, plan.path, rules, specific_kwargs)
+        if not overrides:
+            return plan.root
+        # Overridden unique fields keep the cached plan's constraint options
+        for field_name, plan_node in plan.root.fields:
+            if field_name in overrides and isinstance(plan_node, UniqueNode):
+                overrides[field_name] = UniqueNode(overrides[field_name], plan_node.constraint)
+        return plan.root.with_fields(overrides)
+
+    @staticmethod
+    def _call_generator_with_kwargs(generator_func: Any, specific_kwargs: Dict[str, Any], field_name: str) -> Any:
+        # Signature inspection and kwargs filtering are cached per (generator, kwargs keys) by bind_generator
+        return bind_generator(generator_func, specific_kwargs, field_name)()
+
+    @staticmethod
+    def GenerateSyntheticTestDataFor(instance: Any, parent_path: List[str] = None, rules: Dict[str, Any] = None, **kwargs) -> GeneratedTestData:
+        """
+        Generates one record for the class of the given instance.
+        The class is introspected only once per (class, rules) pair; see GenerateSyntheticTestDataForClass.
+        """
+        current_path = tuple(parent_path) if parent_path else ()
+        rules = RuleIndex.of(rules)
+
+        plan = Utility._get_class_plan(instance.__class__, current_path, rules)
+        return GeneratedTestData(Utility._prepare_root(Utility._bind_class_plan(plan, rules, kwargs)).generate())
+
+    @staticmethod
+    def GenerateSyntheticTestDataForClass(target_class: type, count: int = 1, rules: Dict[str, Any] = None, seed: Optional[int] = None, **kwargs) -> List[GeneratedTestData]:
+        """
+        Generates `count` records for target_class without instantiating it.
+
+        The field list, generators and rule bindings are compiled into a plan the first time a
+        (class, rules) pair is seen and replayed for every record afterwards. Plans are cached by
+        rules identity: call InvalidateGenerationPlans() after mutating a rules dict in place.
+        With a seed, record #i only depends on (seed, i), so runs are reproducible.
+        """
+        return list(Utility.StreamSyntheticTestDataForClass(target_class, count, rules, seed=seed, **kwargs))
+
+    @staticmethod
+    def StreamSyntheticTestDataForClass(target_class: type, count: int = 1, rules: Dict[str, Any] = None, chunk_size: Optional[int] = None, seed: Optional[int] = None, **kwargs) -> Iterator[Union[GeneratedTestData, List[GeneratedTestData]]]:
+        """
+        Lazily yields `count` records for target_class, one at a time or, with chunk_size,
+        as lists of at most chunk_size records. Memory use is independent of count.
+        """
+        if not inspect.isclass(target_class):
+            raise TypeError("target_class must be a class.")
+        Utility._validate_stream_args(count, chunk_size)
+
+        root = Utility._resolve_plan_root(target_class, rules, kwargs)
+        return Utility._stream_records(RecordGenerator(root, seed), count, chunk_size)
+
+    @staticmethod
+    def InvalidateGenerationPlans(target_class: Optional[type] = None, rules: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Drops cached class generation plans and returns how many were removed.
+        With no arguments the whole cache is cleared; otherwise only plans that depend on
+        target_class (directly or as a nested field type) and/or were compiled for `rules`.
+        """
+        if target_class is None and rules is None:
+            removed = len(Utility._class_plan_cache)
+            Utility._class_plan_cache.clear()
+            return removed
+
+        stale_keys = [
+            cache_key for cache_key, (cached_rules, plan) in Utility._class_plan_cache.items()
+            if (target_class is None or target_class in plan.dependencies)
+            and (rules is None or cached_rules is rules)
+        ]
+        for cache_key in stale_keys:
+            del Utility._class_plan_cache[cache_key]
+        return len(stale_keys)
 
-            generator_func = Utility._resolve_generator(field_name, field_type, current_path, rules)
-            generated_data[field_name] = Utility._call_generator_with_kwargs(generator_func, specific_kwargs, field_name)
+    @staticmethod
+    def EnableValuePools(pool_size: int = 1000, refresh_interval: Optional[int] = None, refresh_count: Optional[int] = None,
+                         providers: Optional[Any] = None) -> None:
+        """
+        Switches expensive Faker-backed generators (names, emails, addresses, cities, jobs, card numbers,
+        IBANs, ...; see value_pools.DEFAULT_POOLED_PROVIDERS, or pass `providers`) to pooled mode: each
+        generator binding pre-generates pool_size values and samples from them. Every refresh_interval
+        draws, refresh_count slots are regenerated. Values are no longer unique in pooled mode.
+        Applies to schemas compiled afterwards; cached class plans are dropped. With a seed, the slot each
+        record draws is reproducible, and so are the values refreshed into the pool, but the pool contents
+        are generated unseeded when a pool is first filled.
+        """
+        if not isinstance(pool_size, int) or pool_size < 1:
+            raise ValueError("pool_size must be an integer greater than or equal to 1.")
+        Utility._value_pool_config = {
+            "pool_size": pool_size,
+            "refresh_interval": refresh_interval,
+            "refresh_count": refresh_count,
+            "providers": frozenset(providers) if providers is not None else DEFAULT_POOLED_PROVIDERS,
+        }
+        Utility._value_pools.clear()
+        Utility.InvalidateGenerationPlans()
 
-        return GeneratedTestData(generated_data)
+    @staticmethod
+    def DisableValuePools() -> None:
+        """Turns pooled mode off again for schemas compiled afterwards; cached class plans are dropped."""
+        Utility._value_pool_config = None
+        Utility._value_pools.clear()
+        Utility.InvalidateGenerationPlans()
+
+    @staticmethod
+    def ConfigureCollectionSizes(list_items: Any = (1, 3), dict_items: Any = (1, 2)) -> None:
+        """
+        Sets the default item counts of List/Dict fields (JSON sample lists included): an item count,
+        a [min, max] range or a {count: weight} dictionary. A field's rule can set its own with
+        {"cardinality": ...}, e.g. {"items": {"cardinality": [0, 500]}}. Applies to schemas compiled
+        afterwards; cached class plans are dropped.
+        """
+        Utility._list_cardinality = Cardinality.from_option(list_items)
+        Utility._dict_cardinality = Cardinality.from_option(dict_items)
+        Utility.InvalidateGenerationPlans()
+
+    @staticmethod
+    def GetUniquenessStats() -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the retry-on-collision statistics of every `unique` rule by field path: unique values
+        produced, collisions (retries), collision rate and the most attempts any single value needed.
+        """
+        return uniqueness_stats()
+
+    @staticmethod
+    def ResetUniqueness() -> None:
+        """Forgets every value seen by `unique` rules (later records may repeat earlier ones again) and zeroes their statistics."""
+        reset_uniqueness()
 
     @staticmethod
     def _infer_json_type(value: Any):
@@ -257,90 +498,458 @@ class Utility:
 
 
     @staticmethod
-    def _generate_value_from_json_sample(field_name: str, sample_value: Any, specific_kwargs: Dict[str, Any], path: List[str], rules: Dict[str, Any]):
-        full_field_path = ".".join(path + [field_name])
+    def _compile_json_value_node(field_name: Union[str, int], sample_value: Any, specific_kwargs: Dict[str, Any], path: FieldPath, rules: RuleIndex,
+                                 field_rule: Optional[Dict[str, Any]]) -> PlanNode:
+        # field_name is an int for list items (their position in the list); field_rule is the rule matched for the field, if any
+        field_path = path + (field_name,)
+        full_field_path = format_path(field_path)
+        name = field_name if isinstance(field_name, str) else format_path(field_path[-2:])
 
         # Check for direct rules for this field first
-        if full_field_path in rules:
-            field_rule = rules[full_field_path]
-            if "choices" in field_rule:
-                return random.choice(field_rule["choices"])
-            elif "generator" in field_rule:
-                generator_func = field_rule["generator"]
-                specific_kwargs_from_rule = field_rule.get("kwargs", {})
-                return Utility._call_generator_with_kwargs(generator_func, specific_kwargs_from_rule, field_name)
+        rule_node = Utility._compile_rule_node(field_rule, full_field_path, name, (field_rule or {}).get("kwargs", {}))
+        if rule_node is not None:
+            return rule_node
 
         # Fallback to existing kwargs method (like field_name_...)
         if "choices" in specific_kwargs:
             if not isinstance(specific_kwargs["choices"], (list, tuple)):
-                raise TypeError(f"Choices for field '{field_name}' must be a list or tuple.")
-            return random.choice(specific_kwargs["choices"])
+                raise TypeError(f"Choices for field '{name}' must be a list or tuple.")
+            return ChoiceNode(tuple(specific_kwargs["choices"]))
 
-        lower_field_name = field_name.lower()
+        lower_field_name = name.lower()
         if lower_field_name in Utility._field_name_to_generator_map:
             generator = Utility._field_name_to_generator_map[lower_field_name]
-            return Utility._call_generator_with_kwargs(generator, specific_kwargs, field_name)
+            return Utility._compile_generator_node(generator, specific_kwargs, name)
 
         if sample_value is None:
-            if random.random() < 0.2:
-                return None
-            print(f"Info: Field '{field_name}' had a null sample. Generating string as default. Consider explicit type/format hints for better generation.")
-            return Utility._data_generator.generate_str(**specific_kwargs)
+            diagnostics.report("null_sample", full_field_path, f"Info: Field '{name}' had a null sample. Generating string as default. Consider explicit type/format hints for better generation.", INFO)
+            return NullableNode(ValueNode(bind_generator(Utility._data_generator.generate_str, specific_kwargs, name)), Utility._NULL_SAMPLE_PROBABILITY)
 
         if isinstance(sample_value, dict):
-            # Recursively generate nested dictionary, passing current path and rules
-            return Utility._generate_data_from_json_dict(sample_value, specific_kwargs, path + [field_name], rules)
+            # Nested dictionary: compile with the current path appended so nested rules match
+            return Utility._compile_json_object_node(sample_value, specific_kwargs, field_path, rules)
         elif isinstance(sample_value, list):
-            num_items = random.randint(1, 3)
-            generated_list = []
+            cardinality = Utility._collection_cardinality(field_rule, Utility._list_cardinality)
             if sample_value:
                 item_sample = sample_value[0]
-                for i in range(num_items):
-                    item_kwargs = specific_kwargs.get(f"item_kwargs_{i}", specific_kwargs.get("item_kwargs", {}))
-                    generated_list.append(Utility._generate_value_from_json_sample(f"{field_name}_item_{i}", item_sample, item_kwargs, path + [field_name], rules))
+                kwargs_positions = [int(key[len("item_kwargs_"):]) for key in specific_kwargs
+                                    if key.startswith("item_kwargs_") and key[len("item_kwargs_"):].isdigit()]
+                item_nodes = tuple(
+                    Utility._compile_json_value_node(
+                        i, item_sample,
+                        specific_kwargs.get(f"item_kwargs_{i}", specific_kwargs.get("item_kwargs", {})),
+                        field_path, rules, rules.match(field_path + (i,)))
+                    for i in range(Utility._item_node_count(cardinality, max([rules.max_item_position(field_path)] + kwargs_positions)))
+                )
             else:
-                for i in range(num_items):
-                    generated_list.append(Utility._data_generator.generate_str(min_length=3, max_length=10))
-            return generated_list
-        else:
-            inferred_type = Utility._infer_json_type(sample_value)
-            generator = None
-            if inferred_type in Utility._type_to_generator_map:
-                generator = Utility._type_to_generator_map[inferred_type]
-            elif inferred_type == uuid.UUID:
-                generator = Utility._data_generator.generate_uuid
-            
-            if generator:
-                return Utility._call_generator_with_kwargs(generator, specific_kwargs, field_name)
-            
-            print(f"Warning: Could not find specific generator for JSON value of type {type(sample_value)} for field '{field_name}'. Using default string generator.")
-            return Utility._data_generator.generate_str(**specific_kwargs)
-
-    @staticmethod
-    def _generate_data_from_json_dict(json_dict: Dict[str, Any], parent_kwargs: Dict[str, Any], current_path: List[str], rules: Dict[str, Any]) -> Dict[str, Any]:
-        generated_object_data = {}
-        for key, value_sample in json_dict.items():
-            field_kwargs_key = f"field_name_{key}"
-            specific_kwargs = parent_kwargs.get(field_kwargs_key, {})
-            
-            generated_object_data[key] = Utility._generate_value_from_json_sample(
-                key, value_sample, specific_kwargs, current_path, rules
-            )
-        return generated_object_data
+                item_nodes = (ValueNode(bind_generator(Utility._data_generator.generate_str, {"min_length": 3, "max_length": 10}, name)),)
+            return ListNode(item_nodes, cardinality)
+
+        inferred_type = Utility._infer_json_type(sample_value)
+        if inferred_type in Utility._type_to_generator_map:
+            return ValueNode(bind_generator(Utility._type_to_generator_map[inferred_type], specific_kwargs, name))
 
+        diagnostics.report("unknown_json_type", full_field_path, f"Warning: Could not find specific generator for JSON value of type {type(sample_value)} for field '{name}'. Using default string generator.")
+        return ValueNode(bind_generator(Utility._data_generator.generate_str, specific_kwargs, name))
+
+    @staticmethod
+    def _compile_json_object_node(json_dict: Dict[str, Any], parent_kwargs: Dict[str, Any], current_path: FieldPath, rules: RuleIndex) -> ObjectNode:
+        fields = []
+        for key, value_sample in json_dict.items():
+            field_rule = rules.match(current_path + (key,))
+            node = Utility._compile_json_value_node(key, value_sample, parent_kwargs.get(f"field_name_{key}", {}), current_path, rules, field_rule)
+            fields.append((key, Utility._apply_unique_rule(field_rule, format_path(current_path + (key,)), node)))
+        return ObjectNode(tuple(fields))
 
     @staticmethod
-    def GenerateSyntheticTestDataFromJson(json_schema: Dict[str, Any], count: int = 1, rules: Dict[str, Any] = None, **kwargs) -> List[GeneratedTestData]:
+    def CompileJsonSchema(json_schema: Dict[str, Any], rules: Dict[str, Any] = None, **kwargs) -> CompiledJsonSchema:
+        """
+        Compiles a JSON sample plus rules into an immutable tree of node generators.
+
+        Type inference, rule matching and generator binding happen here, once. The result can be
+        passed to GenerateSyntheticTestDataFromJson any number of times and is picklable, so it can
+        be shipped to worker processes.
+        """
         if not isinstance(json_schema, dict):
             raise TypeError("json_schema must be a dictionary representing a JSON object.")
+
+        return CompiledJsonSchema(Utility._compile_json_object_node(json_schema, kwargs, (), RuleIndex.of(rules)))
+
+    @staticmethod
+    def GenerateSyntheticTestDataFromJson(json_schema: Union[Dict[str, Any], CompiledJsonSchema], count: int = 1, rules: Dict[str, Any] = None, seed: Optional[int] = None, **kwargs) -> List[GeneratedTestData]:
+        return list(Utility.StreamSyntheticTestDataFromJson(json_schema, count, rules, seed=seed, **kwargs))
+
+    @staticmethod
+    def StreamSyntheticTestDataFromJson(json_schema: Union[Dict[str, Any], CompiledJsonSchema], count: int = 1, rules: Dict[str, Any] = None, chunk_size: Optional[int] = None, seed: Optional[int] = None, **kwargs) -> Iterator[Union[GeneratedTestData, List[GeneratedTestData]]]:
+        """
+        Lazily yields `count` records generated from a JSON sample (or a CompiledJsonSchema),
+        one at a time or, with chunk_size, as lists of at most chunk_size records.
+        Arguments are validated and the schema compiled eagerly; records are only produced as the
+        iterator is consumed, so memory use is independent of count.
+        With a seed, record #i only depends on (seed, i), so runs are reproducible.
+        """
+        Utility._validate_stream_args(count, chunk_size)
+        if not isinstance(json_schema, (dict, CompiledJsonSchema)):
+            raise TypeError("json_schema must be a dictionary representing a JSON object.")
+
+        root = Utility._resolve_plan_root(json_schema, rules, kwargs)
+        return Utility._stream_records(RecordGenerator(root, seed), count, chunk_size)
+
+    @staticmethod
+    def _validate_stream_args(count: int, chunk_size: Optional[int]) -> None:
         if not isinstance(count, int) or count < 1:
             raise ValueError("count must be an integer greater than or equal to 1.")
-        
-        rules = rules if rules is not None else {}
-
-        generated_list = []
-        for _ in range(count):
-            generated_data = Utility._generate_data_from_json_dict(json_schema, kwargs, [], rules)
-            generated_list.append(GeneratedTestData(generated_data))
-        
-        return generated_list
\ No newline at end of file
+        if chunk_size is not None and (not isinstance(chunk_size, int) or chunk_size < 1):
+            raise ValueError("chunk_size must be an integer greater than or equal to 1.")
+
+    @staticmethod
+    def _stream_records(record_generator: RecordGenerator, count: int, chunk_size: Optional[int],
+                        wrap: Callable[[Dict[str, Any]], Any] = GeneratedTestData) -> Iterator[Union[GeneratedTestData, List[GeneratedTestData]]]:
+        # Records are produced in batches so unseeded plans can fill whole columns at once
+        batch_size = chunk_size or Utility._STREAM_BATCH_SIZE
+        for batch_start in range(0, count, batch_size):
+            records = record_generator.generate_batch(batch_start, min(batch_start + batch_size, count))
+            if chunk_size is None:
+                for record in records:
+                    yield wrap(record)
+            else:
+                yield [wrap(record) for record in records]
+        diagnostics.end_run()
+
+    @staticmethod
+    def _resolve_plan_root(target: Any, rules: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> PlanNode:
+        # Accepts a JSON sample dict, a CompiledJsonSchema or a class
+        if isinstance(target, CompiledJsonSchema):
+            return Utility._prepare_root(target.root)
+        if isinstance(target, dict):
+            return Utility._prepare_root(Utility.CompileJsonSchema(target, rules, **kwargs).root)
+        if inspect.isclass(target):
+            rules = RuleIndex.of(rules)
+            return Utility._prepare_root(Utility._bind_class_plan(Utility._get_class_plan(target, (), rules), rules, kwargs))
+        raise TypeError("target must be a JSON sample dictionary, a CompiledJsonSchema or a class.")
+
+    @staticmethod
+    def _prepare_root(root: PlanNode) -> PlanNode:
+        # Per-run state and wrappers, a single check each while record locales and field timing are off
+        root = renew_unique_constraints(root)
+        if Utility._record_locales is not None:
+            root = RecordLocaleNode(localize_plan(root, Utility._localized_call), Utility._record_locales)
+        if Utility._field_timings is not None:
+            root = instrument_plan(root, Utility._field_timings)
+        return root
+
+    @staticmethod
+    def EnableLocales(locales: Any, pool_size: Optional[int] = None, warm_up: bool = True) -> None:
+        """
+        Generates every record of the runs started afterwards in one locale, picked per record from
+        `locales`: a locale, a list of locales (uniform) or a {locale: weight} dictionary. Fields filled
+        by the built-in generators or Faker providers use that record's locale; rules with their own
+        "locale" keep it, and value-pooled fields keep sampling their pool. Locales are served from a pool of at most pool_size Faker-backed generators
+        with least-recently-used eviction; warm_up builds them now instead of on first use.
+        """
+        locale_choice = LocaleChoice.from_option(locales)
+        if pool_size is not None:
+            default_pool.resize(pool_size)
+        if warm_up:
+            default_pool.warm_up(locale_choice.locales)
+        Utility._record_locales = locale_choice
+
+    @staticmethod
+    def DisableLocales() -> None:
+        Utility._record_locales = None
+
+    @staticmethod
+    def ConfigureLocalePool(max_size: int = 8, warm_up: Optional[List[str]] = None) -> LocaleGeneratorPool:
+        """Sets how many per-locale generators are kept alive (LRU eviction beyond that) and optionally builds some now."""
+        default_pool.resize(max_size)
+        if warm_up:
+            default_pool.warm_up(warm_up)
+        return default_pool
+
+    @staticmethod
+    def GetLocalePoolStats() -> Dict[str, Any]:
+        """Pooled locales (least recently used first), max_size, and hit/miss/eviction counts."""
+        return default_pool.stats()
+
+    @staticmethod
+    def EnableFieldTiming(reservoir_size: int = 1024) -> FieldTimings:
+        """
+        Starts recording call counts and cumulative/percentile latency per dotted field path and per
+        generator for every run started afterwards (JSON and class paths). Returns the collector;
+        export it with .as_table() or .to_json(). Records generated in worker processes are not timed.
+        """
+        Utility._field_timings = FieldTimings(reservoir_size)
+        return Utility._field_timings
+
+    @staticmethod
+    def GetFieldTimings() -> Optional[FieldTimings]:
+        return Utility._field_timings
+
+    @staticmethod
+    def DisableFieldTiming() -> Optional[FieldTimings]:
+        """Stops timing runs started afterwards and returns the timings collected so far."""
+        field_timings, Utility._field_timings = Utility._field_timings, None
+        return field_timings
+
+    @staticmethod
+    def ConfigureDiagnostics(logger: Optional[logging.Logger] = None, max_messages_per_second: Optional[float] = None, summary: bool = True) -> DiagnosticsCollector:
+        """
+        Routes generation warnings/errors to `logger` (stdout when None), emitting at most
+        max_messages_per_second individual messages. Each (field path, kind) is emitted once; repeats
+        are counted and, with summary=True, reported at the end of every streaming/writing run.
+        """
+        diagnostics.configure(logger, max_messages_per_second, summary)
+        return diagnostics
+
+    @staticmethod
+    def GetDiagnostics() -> Dict[str, Dict[str, Any]]:
+        """Every diagnostic seen since the last reset, keyed by '<field path>:<kind>', with its occurrence count."""
+        return diagnostics.as_dict()
+
+    @staticmethod
+    def ResetDiagnostics() -> None:
+        diagnostics.reset()
+
+    @staticmethod
+    def GenerateSyntheticTestDataColumns(target: Any, count: int = 1, rules: Dict[str, Any] = None, seed: Optional[int] = None, **kwargs) -> ColumnarBatch:
+        """
+        Generates `count` records for a JSON sample, CompiledJsonSchema or class as one ColumnarBatch:
+        a column per field path (nested objects flattened to 'parent.child'), without building a
+        dict or GeneratedTestData per record. Use .to_rows()/.to_records() to get rows back.
+        """
+        return next(Utility.StreamSyntheticTestDataColumns(target, count, rules, chunk_size=count, seed=seed, **kwargs))
+
+    @staticmethod
+    def StreamSyntheticTestDataColumns(target: Any, count: int = 1, rules: Dict[str, Any] = None, chunk_size: int = 10000, seed: Optional[int] = None, **kwargs) -> Iterator[ColumnarBatch]:
+        """Lazily yields `count` records as ColumnarBatches of at most chunk_size rows."""
+        Utility._validate_stream_args(count, chunk_size)
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        return Utility._stream_column_batches(record_generator, count, chunk_size)
+
+    @staticmethod
+    def _stream_column_batches(record_generator: RecordGenerator, count: int, chunk_size: int) -> Iterator[ColumnarBatch]:
+        for start in range(0, count, chunk_size):
+            yield record_generator.generate_column_batch(start, min(start + chunk_size, count))
+        diagnostics.end_run()
+
+    @staticmethod
+    def GenerateSyntheticTestDataCompact(target: Any, count: int = 1, rules: Dict[str, Any] = None, seed: Optional[int] = None, **kwargs) -> List[CompactRecord]:
+        """
+        Generates `count` records for a JSON sample, CompiledJsonSchema or class as CompactRecords:
+        tuples sharing one field index per record shape instead of a dict and a GeneratedTestData
+        each, for datasets held in memory. Nested objects and lists of objects are compact too;
+        record['field'], keys(), items() and get_data() work as for GeneratedTestData.
+        """
+        return list(Utility.StreamSyntheticTestDataCompact(target, count, rules, seed=seed, **kwargs))
+
+    @staticmethod
+    def StreamSyntheticTestDataCompact(target: Any, count: int = 1, rules: Dict[str, Any] = None, chunk_size: Optional[int] = None, seed: Optional[int] = None, **kwargs) -> Iterator[Union[CompactRecord, List[CompactRecord]]]:
+        """Lazily yields `count` CompactRecords one at a time or, with chunk_size, as lists of at most chunk_size records."""
+        Utility._validate_stream_args(count, chunk_size)
+        root = Utility._resolve_plan_root(target, rules, kwargs)
+        schema = record_schema(root, target.__name__ if inspect.isclass(target) else "Record")
+        return Utility._stream_records(RecordGenerator(root, seed), count, chunk_size, schema.convert)
+
+    @staticmethod
+    def OpenSyntheticDataset(target: Any, count: int, seed: Any, rules: Dict[str, Any] = None, compact: bool = False, **kwargs) -> SyntheticDataset:
+        """
+        Returns the `count` records of a JSON sample, CompiledJsonSchema or class for `seed` as a
+        SyntheticDataset: dataset[i] generates record #i directly from (plan, seed, i) in constant
+        time, without generating the records before it, and equals record #i of
+        StreamSyntheticTestDataFromJson/ForClass(..., seed=seed). Slices are lazy views.
+        Records are GeneratedTestData, or CompactRecords with compact=True. Unique rules and
+        refreshing value pools depend on earlier records, so plans using them are rejected.
+        """
+        if seed is None:
+            raise ValueError("OpenSyntheticDataset needs a seed: records are only addressable by index in seeded runs.")
+        if not isinstance(count, int) or count < 0:
+            raise ValueError("count must be an integer greater than or equal to 0.")
+        root = Utility._resolve_plan_root(target, rules, kwargs)
+        order_dependent = order_dependent_fields(root)
+        if order_dependent:
+            raise ValueError(f"Records cannot be generated by index from a plan using {', '.join(sorted(set(order_dependent)))}.")
+        wrap = record_schema(root, target.__name__ if inspect.isclass(target) else "Record").convert if compact else GeneratedTestData
+        return SyntheticDataset(RecordGenerator(root, seed), range(count), wrap)
+
+    @staticmethod
+    def ConfigureDatasetCache(directory: Optional[str] = None, max_bytes: int = 1 << 30) -> Any:
+        """
+        Sets where GenerateCachedTestData keeps datasets: `directory` (default: $SYNTHETIC_DATA_CACHE_DIR,
+        else .synthetic_data_cache in the working directory), holding at most max_bytes of datasets
+        with least-recently-used eviction. Returns the DatasetCache.
+        """
+        from utils.dataset_cache import DatasetCache
+        directory = directory or os.environ.get("SYNTHETIC_DATA_CACHE_DIR") or ".synthetic_data_cache"
+        Utility._dataset_cache = DatasetCache(directory, max_bytes)
+        return Utility._dataset_cache
+
+    @staticmethod
+    def GenerateCachedTestData(target: Any, count: int, seed: Any, rules: Dict[str, Any] = None, chunk_size: int = 10000, **kwargs) -> Any:
+        """
+        Returns the `count` seeded records of a JSON sample or class from the dataset cache,
+        generating and storing them first on a miss. Datasets are keyed by a fingerprint of the
+        sample or class definition (nested classes included), rules, kwargs, seed, count, the
+        locale/value pool/key index/collection size settings and the library version, so any change regenerates.
+        The result is a CachedDataset read through a memory map; close it when done.
+        Rules must be fingerprintable: JSON-like values, functions, bound generator/Faker methods.
+        """
+        from utils.dataset_cache import dataset_fingerprint
+        if seed is None:
+            raise ValueError("GenerateCachedTestData needs a seed: only reproducible datasets can be cached.")
+        if isinstance(target, CompiledJsonSchema):
+            raise TypeError("Cache a JSON sample dictionary or a class: a CompiledJsonSchema no longer has its sample and rules.")
+        Utility._validate_stream_args(count, chunk_size)
+        cache = Utility._dataset_cache or Utility.ConfigureDatasetCache()
+        fingerprint = dataset_fingerprint(target, rules, seed, count, kwargs=kwargs, locales=Utility._record_locales,
+                                          value_pools=Utility._value_pool_config, key_indexes=Utility._key_indexes,
+                                          list_cardinality=Utility._list_cardinality, dict_cardinality=Utility._dict_cardinality)
+
+        def generate_chunks() -> Iterator[List[Dict[str, Any]]]:
+            record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+            for start in range(0, count, chunk_size):
+                yield record_generator.generate_batch(start, min(start + chunk_size, count))
+            diagnostics.end_run()
+
+        return cache.get_or_generate(fingerprint, generate_chunks)
+
+    @staticmethod
+    def WriteSyntheticTestData(target: Any, count: int, output: Union[str, IO[str]], format: str = "ndjson", rules: Dict[str, Any] = None,
+                               chunk_size: int = 10000, seed: Optional[int] = None, workers: Optional[int] = None,
+                               progress: Optional[Callable[[int], None]] = None, **kwargs) -> int:
+        """
+        Generates `count` records for a JSON sample, CompiledJsonSchema or class and streams them to
+        an NDJSON or CSV file (path or text stream), chunk_size records at a time, without building
+        GeneratedTestData wrappers. Returns the number of records written.
+        With workers > 1, chunks are generated in a process pool (see StreamSyntheticTestDataParallel)
+        and still written in index order. progress, if given, is called with the number of records
+        written so far after every chunk.
+        """
+        Utility._validate_stream_args(count, chunk_size)
+        if format not in ("ndjson", "csv"):
+            raise ValueError("format must be 'ndjson' or 'csv'.")
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        with (NDJSONWriter(output) if format == "ndjson" else CSVWriter(output)) as writer:
+            if workers is not None and workers > 1:
+                for records in ParallelGenerationEngine(workers, chunk_size).stream_shards(record_generator, count):
+                    writer.write_many(records)
+                    if progress is not None:
+                        progress(writer.records_written)
+            else:
+                for start in range(0, count, chunk_size):
+                    stop = min(start + chunk_size, count)
+                    if format == "csv":
+                        writer.write_batch(record_generator.generate_column_batch(start, stop))
+                    else:
+                        writer.write_many(record_generator.generate_batch(start, stop))
+                    if progress is not None:
+                        progress(writer.records_written)
+        diagnostics.end_run()
+        return writer.records_written
+
+    @staticmethod
+    def BuildKeyIndex(target: Any, count: int, key_field: str, name: Optional[str] = None, rules: Dict[str, Any] = None,
+                      output: Optional[Union[str, IO[str]]] = None, format: str = "ndjson", chunk_size: int = 10000,
+                      seed: Optional[int] = None, **kwargs) -> KeyIndex:
+        """
+        Generates `count` parent records (JSON sample, CompiledJsonSchema or class) and returns a compact
+        KeyIndex of their `key_field` (a dotted path) values, without keeping the records. If `output`
+        is given, the parents are streamed to it (NDJSON or CSV) at the same time.
+        With a name, child rules can refer to the index as {"foreign_key": name}; a KeyIndex object
+        can always be used directly: {"foreign_key": index}. Rebuilding an index under the same name
+        drops the cached class plans that sample the previous one. Combine with {"unique": True} on the key
+        field for primary keys that are guaranteed distinct.
+        """
+        Utility._validate_stream_args(count, chunk_size)
+        if format not in ("ndjson", "csv"):
+            raise ValueError("format must be 'ndjson' or 'csv'.")
+        key_path = key_field.split(".")
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        key_index = KeyIndex(name or key_field)
+        writer = None if output is None else (NDJSONWriter(output) if format == "ndjson" else CSVWriter(output))
+        try:
+            for start in range(0, count, chunk_size):
+                records = record_generator.generate_batch(start, min(start + chunk_size, count))
+                for record in records:
+                    key = record
+                    for key_part in key_path:
+                        key = key[key_part]
+                    key_index.add(key)
+                if writer is not None:
+                    writer.write_many(records)
+        except KeyError:
+            raise ValueError(f"Key field '{key_field}' is not part of the generated records.") from None
+        finally:
+            if writer is not None:
+                writer.close()
+        diagnostics.end_run()
+        if name is not None:
+            previous = Utility._key_indexes.get(name)
+            Utility._key_indexes[name] = key_index
+            if previous is not None:
+                # Cached class plans resolved the name to the previous index when they were compiled
+                stale_keys = [cache_key for cache_key, (_, plan) in Utility._class_plan_cache.items()
+                              if any(isinstance(node, ForeignKeyNode) and node.key_index is previous for node in iter_plan_nodes(plan.root))]
+                for cache_key in stale_keys:
+                    del Utility._class_plan_cache[cache_key]
+        return key_index
+
+    @staticmethod
+    def StreamSyntheticTestDataParallel(target: Any, count: int, rules: Dict[str, Any] = None, seed: Optional[int] = None,
+                                        workers: Optional[int] = None, shard_size: int = 10000, **kwargs) -> Iterator[GeneratedTestData]:
+        """
+        Generates `count` records for a JSON sample, CompiledJsonSchema or class in a process pool
+        and yields them in index order. With the same seed, the output is identical to
+        StreamSyntheticTestDataFromJson/ForClass(..., seed=seed) whatever the number of workers.
+        Rule generators must be picklable (bound methods and module-level functions, not lambdas).
+        Plans with unique rules or refreshing value pools are generated serially, so uniqueness and pool
+        turnover hold across the whole run.
+        """
+        Utility._validate_stream_args(count, None)
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        engine = ParallelGenerationEngine(workers, shard_size)
+        return (GeneratedTestData(record) for record in engine.stream(record_generator, count))
+
+    @staticmethod
+    def StreamSyntheticTestDataAsync(target: Any, count: int = 1, rules: Dict[str, Any] = None, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                                     max_pending_chunks: int = 2, executor: Optional[Executor] = None, **kwargs) -> AsyncIterator[Union[GeneratedTestData, List[GeneratedTestData]]]:
+        """
+        Async counterpart of StreamSyntheticTestDataFromJson/ForClass for a JSON sample, CompiledJsonSchema
+        or class: `async for` yields records one at a time or, with chunk_size, as lists of at most
+        chunk_size records. Records are generated off the event loop (on a dedicated worker thread
+        unless an executor is given), one chunk at a time and at most max_pending_chunks chunks
+        ahead of the consumer.
+        """
+        Utility._validate_stream_args(count, chunk_size)
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        from utils.async_generation import AsyncGenerationEngine  # asyncio is only imported by async callers
+        engine = AsyncGenerationEngine(chunk_size or Utility._STREAM_BATCH_SIZE, max_pending_chunks, executor)
+        return Utility._stream_records_async(engine.stream(record_generator, count), chunk_size)
+
+    @staticmethod
+    async def _stream_records_async(chunks: AsyncIterator[List[Dict[str, Any]]], chunk_size: Optional[int]) -> AsyncIterator[Union[GeneratedTestData, List[GeneratedTestData]]]:
+        try:
+            async for records in chunks:
+                if chunk_size is None:
+                    for record in records:
+                        yield GeneratedTestData(record)
+                else:
+                    yield [GeneratedTestData(record) for record in records]
+        finally:
+            await chunks.aclose()
+        diagnostics.end_run()
+
+    @staticmethod
+    def WriteSyntheticTestDataShards(target: Any, count: int, output_dir: str, rules: Dict[str, Any] = None, seed: Optional[int] = None,
+                                     workers: Optional[int] = None, shard_size: int = 10000, **kwargs) -> List[str]:
+        """
+        Like StreamSyntheticTestDataParallel, but each worker writes its shards straight to
+        NDJSON files in output_dir. Returns the shard file paths in index order.
+        """
+        Utility._validate_stream_args(count, None)
+        record_generator = RecordGenerator(Utility._resolve_plan_root(target, rules, kwargs), seed)
+        engine = ParallelGenerationEngine(workers, shard_size)
+        return engine.write_shards(record_generator, count, output_dir)
+
+
+register_shared_instance("data_generator", Utility._data_generator)
+register_shared_instance("faker", Utility._faker_instance)
@@ -0,0 +1,80 @@
+# utils/value_pools.py
+from typing import Any, Callable, FrozenSet, List, Optional
+
+from utils.rng import CounterRandom
+
+# Provider names (Faker method names, or SyntheticDataGenerator methods without their "generate_" prefix)
+# whose values are expensive to produce and pooled by default when value pools are enabled
+DEFAULT_POOLED_PROVIDERS: FrozenSet[str] = frozenset({
+    "name", "first_name", "last_name", "user_name", "email", "address", "street_address", "city",
+    "postcode", "country", "company", "job", "phone_number", "credit_card_number", "iban", "ssn",
+    "sentence", "paragraph", "text",
+})
+
+
+def provider_name(generator: Any) -> Optional[str]:
+    """Returns the provider name a generator is pooled under ('generate_city' and 'city' both give 'city')."""
+    name = getattr(generator, '__name__', None)
+    return name[len("generate_"):] if name and name.startswith("generate_") else name
+
+
+class ValuePool:
+    """
+    A pool of pre-generated values for one generator binding, sampled with replacement.
+
+    Filling the pool calls the generator `size` times; every draw afterwards is an index lookup.
+    With refresh_interval, `refresh_count` random slots are regenerated every refresh_interval draws,
+    so the pool slowly turns over and diversity can be tuned between a fixed pool (no refresh) and
+    the unpooled generator (refresh_count == refresh_interval). Pooled values are not unique.
+    """
+    __slots__ = ("source", "size", "refresh_interval", "refresh_count", "random", "values", "_draws_until_refresh")
+
+    def __init__(self, source: Callable[[], Any], size: int = 1000, refresh_interval: Optional[int] = None,
+                 refresh_count: Optional[int] = None, seed: Optional[int] = None):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("size must be an integer greater than or equal to 1.")
+        if refresh_interval is not None and (not isinstance(refresh_interval, int) or refresh_interval < 1):
+            raise ValueError("refresh_interval must be an integer greater than or equal to 1.")
+        self.source = source
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.refresh_count = min(refresh_count or max(size // 100, 1), size)
+        self.random = CounterRandom(seed)
+        self.values: List[Any] = [source() for _ in range(size)]
+        self._draws_until_refresh = refresh_interval or 0
+
+    def __call__(self) -> Any:
+        if self.refresh_interval is not None:
+            self._draws_until_refresh -= 1
+            if self._draws_until_refresh <= 0:
+                self.refresh()
+        return self.values[int(self.random.random() * self.size)]
+
+    def sample_batch(self, n: int) -> List[Any]:
+        """Draws n values at once; refreshes that fall due during the batch happen before sampling."""
+        if self.refresh_interval is not None:
+            self._draws_until_refresh -= n
+            while self._draws_until_refresh <= 0:
+                self.refresh(reset_countdown=False)
+                self._draws_until_refresh += self.refresh_interval
+        return self.random.choices(self.values, k=n)
+
+    def renewed(self) -> "ValuePool":
+        """A copy of this pool with the same values and a fresh refresh countdown; drawing from it leaves this pool as is."""
+        pool = ValuePool.__new__(ValuePool)
+        pool.source = self.source
+        pool.size = self.size
+        pool.refresh_interval = self.refresh_interval
+        pool.refresh_count = self.refresh_count
+        pool.random = CounterRandom()
+        pool.values = list(self.values)
+        pool._draws_until_refresh = self.refresh_interval or 0
+        return pool
+
+    def refresh(self, count: Optional[int] = None, reset_countdown: bool = True) -> None:
+        """Evicts `count` (default refresh_count) random slots and refills them from the generator."""
+        for slot in self.random.sample(range(self.size), min(count or self.refresh_count, self.size)):
+            self.values[slot] = self.source()
+        if reset_countdown:
+            self._draws_until_refresh = self.refresh_interval or 0
+